@@ -0,0 +1,94 @@
+"""
+Saving and loading a model bundle of an `ArtifactStore`, and the scoring latency while a `HotSwapScorer`
+swaps versions. The model is trained on the sample dataset with the notebook steps.
+
+Run from the repository root:
+    python -m benchmarks.bench_artifacts --swaps 10
+"""
+## import needed packages
+import argparse
+import tempfile
+import threading
+import time
+import numpy as np
+from fraud_predictor.preprocessors.preprocessing import load_df, drop_unnecessary_columns
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.features.feature_state import FeatureState
+from fraud_predictor.model.model_and_metrics import split_data, convert_object_to_category, train_optimized_lightgbm
+from fraud_predictor.model.artifacts import ArtifactStore
+from fraud_predictor.serving.hot_swap import HotSwapScorer
+
+BEST_PARAMS = {'n_estimators': 200, 'max_depth': 7, 'learning_rate': 0.1, 'max_bin': 1500, 'num_leaves': 50}
+
+
+def timed(func, repeat=20):
+    """Return the median time of func in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1e3
+
+
+def score_continuously(scorer, rows, stop, timings, errors):
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            scorer.predict_proba(rows[i % len(rows)])
+        except Exception:
+            errors.append(i)
+        timings.append(time.perf_counter() - start)
+        i += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--swaps', type=int, default=10)
+    parser.add_argument('--scorer', choices=['compiled', 'booster'], default='booster')
+    args = parser.parse_args()
+
+    raw = drop_unnecessary_columns(load_df())
+    feature_state = FeatureState().fit(raw.copy())
+    df = build_features(raw)
+    X_train, X_test, y_train, _ = split_data(df)
+    X_train, X_test = convert_object_to_category(X_train, X_test)
+    model = train_optimized_lightgbm(X_train, y_train, BEST_PARAMS)
+    rows = [[row] for row in X_test.astype(object).to_dict('records')[:500]]
+
+    with tempfile.TemporaryDirectory() as root:
+        store = ArtifactStore(root)
+        start = time.perf_counter()
+        store.save(model, X_train, feature_state=feature_state)
+        print(f"save                          {(time.perf_counter() - start) * 1e3:.1f}ms")
+        print(f"load (memory-mapped)          {timed(store.load):.2f}ms")
+        print(f"load (read)                   {timed(lambda: store.load(mmap=False)):.2f}ms")
+        print(f"load + booster scorer         {timed(lambda: store.load().scorer('booster')):.2f}ms")
+
+        scorer = HotSwapScorer(store, kind=args.scorer)
+        for _ in range(args.swaps):
+            store.save(model, X_train, feature_state=feature_state)
+        versions = store.versions()
+
+        for phase in ['steady', 'swapping']:
+            stop, timings, errors = threading.Event(), [], []
+            worker = threading.Thread(target=score_continuously, args=(scorer, rows, stop, timings, errors))
+            worker.start()
+            swap_times = []
+            for version in versions[1:]:
+                time.sleep(0.05)
+                if phase == 'swapping':
+                    scorer.swap(version)
+                    swap_times.append(scorer.last_swap_seconds * 1e3)
+            stop.set()
+            worker.join()
+            timings = np.array(timings) * 1e3
+            print(f"scoring ({phase:<8})            requests={len(timings)}  errors={len(errors)}  "
+                  f"p50={np.percentile(timings, 50):.3f}ms  p99={np.percentile(timings, 99):.3f}ms  "
+                  f"max={timings.max():.3f}ms" + (f"  swaps={len(swap_times)} median swap={np.median(swap_times):.1f}ms"
+                                                  if swap_times else ""))
+
+
+if __name__ == '__main__':
+    main()
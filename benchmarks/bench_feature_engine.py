@@ -0,0 +1,67 @@
+"""
+Compare the chained `create_features` with the fused `build_features` engine.
+
+Run from the repository root:
+    python -m benchmarks.bench_feature_engine --rows 10000000
+"""
+## import needed packages
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from fraud_predictor.features.features_creation import create_features
+from fraud_predictor.features.feature_engine import build_features
+
+## Feature config of the notebook (amount normalized by merchant category)
+NOTEBOOK_CONFIG = {
+    'interactions': [{'col1': 'amount', 'col2': 'merchant_category', 'new_col_name': 'value_by_category'}]
+}
+
+
+def make_transactions(n_rows, seed=0):
+    """Generate a frame with the columns used by the feature functions."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-09-30', tz='UTC').value
+    timestamps = pd.to_datetime(start + rng.integers(0, 31 * 86_400 * 10**9, n_rows), utc=True)
+    return pd.DataFrame({
+        'customer_id': 'CUST_' + pd.Series(rng.integers(10_000, 99_999, n_rows)).astype(str),
+        'timestamp': timestamps.astype(str),
+        'merchant_category': rng.choice(['Retail', 'Gas', 'Grocery', 'Travel', 'Education',
+                                         'Restaurant', 'Healthcare', 'Entertainment'], n_rows),
+        'amount': rng.lognormal(6, 2, n_rows).round(2),
+        'device': rng.choice(['Chip Reader', 'Edge', 'Chrome', 'Magnetic Stripe', 'iOS App', 'Safari',
+                              'Android App', 'Firefox', 'NFC Payment'], n_rows),
+        'channel': rng.choice(['web', 'mobile', 'pos'], n_rows),
+        'transaction_hour': timestamps.hour
+    })
+
+
+def best_of(func, repeat, setup=lambda: None):
+    """Return the best wall time of `repeat` runs of func, calling it on the (untimed) output of setup."""
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_transactions(args.rows)
+    # Both versions get the timestamp already parsed, so the comparison is not dominated by string parsing
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+
+    # create_features mutates its input, so it gets a fresh copy made outside the timed section
+    chained = best_of(lambda frame: create_features(frame, NOTEBOOK_CONFIG), args.repeat, setup=df.copy)
+    fused = best_of(lambda frame: build_features(df, NOTEBOOK_CONFIG), args.repeat)
+    print(f"rows={args.rows:,}  chained={chained:.3f}s  fused={fused:.3f}s  speedup={chained / fused:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
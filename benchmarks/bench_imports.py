@@ -0,0 +1,81 @@
+"""
+Import time and memory of every fraud_predictor package, each imported in a fresh interpreter, checked
+against a budget: no package may load the heavy dependencies (lightgbm, scikit-learn, scipy, matplotlib)
+at import time, nor take longer than `--max-seconds` over a bare `import pandas`. Exits with status 1 when
+a package is over budget, so it can run in CI.
+
+Run from the repository root:
+    python -m benchmarks.bench_imports
+    python -m benchmarks.bench_imports --max-seconds 0.2 --repeat 5
+"""
+## import needed packages
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PACKAGES = ['fraud_predictor.preprocessors', 'fraud_predictor.merging', 'fraud_predictor.features', 'fraud_predictor.model',
+            'fraud_predictor.pipeline']
+
+## Dependencies that must only be loaded on first use
+HEAVY_MODULES = ['lightgbm', 'sklearn', 'scipy', 'matplotlib']
+
+_MEASURE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': seconds,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'loaded': sorted(name for name in {heavy!r} if name in sys.modules)
+}}))
+"""
+
+
+def measure_import(module, repeat=3):
+    """Import module in `repeat` fresh interpreters; return the fastest time, its peak RSS and the heavy modules loaded."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')]))}
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _MEASURE.format(module=module, heavy=HEAVY_MODULES)],
+                                capture_output=True, text=True, check=True, env=env).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return min(runs, key=lambda run: run['seconds'])
+
+
+def check_budget(packages=PACKAGES, max_seconds=0.5, repeat=3):
+    """Return the measurements of every package and one message per package over budget."""
+    baseline = measure_import('pandas', repeat)
+    results, failures = {}, []
+    for package in packages:
+        result = measure_import(package, repeat)
+        result['extra_seconds'] = result['seconds'] - baseline['seconds']
+        results[package] = result
+        if result['loaded']:
+            failures.append(f"{package} loads {', '.join(result['loaded'])} at import time")
+        if result['extra_seconds'] > max_seconds:
+            failures.append(f"{package} takes {result['extra_seconds']:.3f}s over pandas (budget {max_seconds}s)")
+    return baseline, results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-seconds', type=float, default=0.5, help="Import time budget over `import pandas`")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    baseline, results, failures = check_budget(max_seconds=args.max_seconds, repeat=args.repeat)
+    print(f"{'pandas':<32} {baseline['seconds']:7.3f}s  rss={baseline['max_rss_mb']:6.0f}MB")
+    for package, result in results.items():
+        print(f"{package:<32} {result['seconds']:7.3f}s  rss={result['max_rss_mb']:6.0f}MB  "
+              f"({result['extra_seconds']:+.3f}s)  heavy={result['loaded'] or '-'}")
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
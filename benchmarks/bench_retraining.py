@@ -0,0 +1,52 @@
+"""
+Incremental against full retraining on synthetic transactions in time order: the first part of the data
+trains the base model, the rest arrives in slices (e.g. days). After every slice, one model continues
+boosting on the slice only (`IncrementalTrainer`) and one is retrained from scratch on the whole history;
+both are scored on the next slice. Prints the wall time and ROC AUC of both strategies.
+
+Run from the repository root:
+    python -m benchmarks.bench_retraining --rows 1000000 --slices 7
+    python -m benchmarks.bench_retraining --rows 1000000 --refit-window 2
+"""
+## import needed packages
+import argparse
+import numpy as np
+from fraud_predictor.preprocessors.preprocessing import drop_unnecessary_columns
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.model.model_and_metrics import convert_object_to_category
+from fraud_predictor.model.retraining import compare_retraining
+from .synthetic import make_transactions
+
+BEST_PARAMS = {'n_estimators': 200, 'max_depth': 7, 'learning_rate': 0.1, 'max_bin': 1500, 'num_leaves': 50}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--base-share', type=float, default=0.5, help="Share of the rows in the base model")
+    parser.add_argument('--slices', type=int, default=7)
+    parser.add_argument('--n-estimators', type=int, default=50, help="Trees added by every increment")
+    parser.add_argument('--refit-window', type=int, default=None)
+    args = parser.parse_args()
+
+    # make_transactions gives the rows in time order
+    df = build_features(drop_unnecessary_columns(make_transactions(args.rows)))
+    X, y = df.drop(columns='is_fraud'), df['is_fraud']
+    n_base = int(len(df) * args.base_share)
+    bounds = np.linspace(n_base, len(df), args.slices + 2).astype(int)
+    X_base, _ = convert_object_to_category(X.iloc[:n_base].copy(), X.iloc[:1].copy())
+    slices = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        _, X_slice = convert_object_to_category(X.iloc[:n_base].copy(), X.iloc[start:end].copy())
+        slices.append((X_slice, y.iloc[start:end]))
+
+    report = compare_retraining(X_base, y.iloc[:n_base], slices, BEST_PARAMS, n_estimators=args.n_estimators,
+                                refit_window=args.refit_window)
+    print(report.to_string(index=False, float_format='{:.4f}'.format))
+    print(f"total: incremental={report['incremental_seconds'].sum():.1f}s  full={report['full_seconds'].sum():.1f}s  "
+          f"mean ROC AUC incremental={report['incremental_roc_auc'].mean():.4f}  "
+          f"full={report['full_roc_auc'].mean():.4f}")
+
+
+if __name__ == '__main__':
+    main()
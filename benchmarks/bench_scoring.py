@@ -0,0 +1,63 @@
+"""
+Latency of scoring one transaction: `predict_proba` on a one-row DataFrame against `TransactionScorer`
+on a dict and on an encoded NumPy row. The model is trained on the sample dataset with the notebook steps.
+
+Run from the repository root:
+    python -m benchmarks.bench_scoring --requests 2000
+"""
+## import needed packages
+import argparse
+import time
+import numpy as np
+from fraud_predictor.preprocessors.preprocessing import load_df, drop_unnecessary_columns
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.model.model_and_metrics import (
+    split_data, convert_object_to_category, train_optimized_lightgbm, predict_proba
+)
+from fraud_predictor.model.scoring import TransactionScorer
+
+BEST_PARAMS = {'n_estimators': 200, 'max_depth': 7, 'learning_rate': 0.1, 'max_bin': 1500, 'num_leaves': 50}
+
+
+def latencies(func, inputs):
+    """Return the latency in milliseconds of func on every input."""
+    timings = np.empty(len(inputs))
+    for i, value in enumerate(inputs):
+        start = time.perf_counter()
+        func(value)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e3
+
+
+def report(name, timings):
+    print(f"{name:<32} p50={np.percentile(timings, 50):.3f}ms  p99={np.percentile(timings, 99):.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    df = build_features(drop_unnecessary_columns(load_df()))
+    X_train, X_test, y_train, _ = split_data(df)
+    X_train, X_test = convert_object_to_category(X_train, X_test)
+    model = train_optimized_lightgbm(X_train, y_train, BEST_PARAMS)
+    scorer = TransactionScorer(model, X_train)
+
+    indices = np.random.default_rng(0).integers(0, len(X_test), args.requests)
+    frames = [X_test.iloc[[i]] for i in indices]
+    records = X_test.astype(object).to_dict('records')
+    dicts = [records[i] for i in indices]
+    encoded = [scorer.encode(row) for row in dicts]
+
+    # Warm up every path once before measuring
+    predict_proba(model, frames[0])
+    scorer.predict_proba(dicts[0])
+
+    report('predict_proba (DataFrame row)', latencies(lambda row: predict_proba(model, row), frames))
+    report('TransactionScorer (dict)', latencies(scorer.predict_proba, dicts))
+    report('TransactionScorer (NumPy row)', latencies(scorer.predict_proba, encoded))
+
+
+if __name__ == '__main__':
+    main()
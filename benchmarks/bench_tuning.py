@@ -0,0 +1,67 @@
+"""
+Compare the exhaustive RandomizedSearchCV of `tune_lightgbm` with the successive-halving search: wall-clock
+time of the search and test ROC AUC of the model trained with the returned parameters.
+
+With --subsample, also compare tuning on the full training data with `tune_lightgbm_on_subsample` (tuning
+on a stratified, negative-downsampled subsample, validation on larger samples and one refit): the time
+saved and the gap in test ROC AUC. Use --rows for synthetic data larger than the sample file.
+
+Run from the repository root:
+    python -m benchmarks.bench_tuning --n-iter 50
+    python -m benchmarks.bench_tuning --rows 1000000 --methods halving --subsample 50000 --negative-rate 0.2
+"""
+## import needed packages
+import argparse
+import time
+from fraud_predictor.preprocessors.preprocessing import load_df, drop_unnecessary_columns
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.model.model_and_metrics import (
+    split_data, convert_object_to_category, tune_lightgbm, tune_lightgbm_on_subsample, train_optimized_lightgbm,
+    calculate_roc_auc
+)
+from .synthetic import make_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-iter', type=int, default=50)
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=None, help="Synthetic rows (default: the sample file)")
+    parser.add_argument('--methods', nargs='+', default=['random', 'halving'])
+    parser.add_argument('--subsample', type=int, default=None, help="Sample size of the subsample-then-refit mode")
+    parser.add_argument('--negative-rate', type=float, default=1.0)
+    args = parser.parse_args()
+
+    df = load_df() if args.rows is None else make_transactions(args.rows)
+    df = build_features(drop_unnecessary_columns(df))
+    X_train, X_test, y_train, y_test = split_data(df)
+    X_train, X_test = convert_object_to_category(X_train, X_test)
+
+    results = {}
+    for method in args.methods:
+        start = time.perf_counter()
+        best_params, _ = tune_lightgbm(X_train, y_train, n_iter=args.n_iter, cv=args.cv, verbose=0, method=method)
+        elapsed = time.perf_counter() - start
+        model = train_optimized_lightgbm(X_train, y_train, best_params)
+        results[method] = (elapsed, calculate_roc_auc(model, X_test, y_test))
+        print(f"{method:<8} search={elapsed:.1f}s  test ROC AUC={results[method][1]:.4f}  {best_params}")
+
+    if args.subsample:
+        method = args.methods[-1]
+        start = time.perf_counter()
+        best_params, model, report = tune_lightgbm_on_subsample(
+            X_train, y_train, sample_size=args.subsample, negative_rate=args.negative_rate, method=method,
+            n_iter=args.n_iter, cv=args.cv, verbose=0
+        )
+        # Search time comparable with the full-data search: tuning and validation, without the refit
+        elapsed = report.loc[report['step'] != 'refit', 'seconds'].sum()
+        roc_auc = calculate_roc_auc(model, X_test, y_test)
+        print(report.to_string(index=False))
+        full_elapsed, full_roc_auc = results[method]
+        print(f"subsample ({method}) search={elapsed:.1f}s  test ROC AUC={roc_auc:.4f}  {best_params}")
+        print(f"time saved={full_elapsed - elapsed:.1f}s ({full_elapsed / elapsed:.1f}x)  "
+              f"ROC AUC gap={full_roc_auc - roc_auc:+.4f}  total={time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
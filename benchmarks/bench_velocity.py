@@ -0,0 +1,41 @@
+"""
+Time of parsing the velocity_last_hour column into its numeric fields: the vectorized `parse_velocity`
+against `ast.literal_eval` per row, next to the time pandas takes to read the column from the csv.
+
+Run from the repository root:
+    python -m benchmarks.bench_velocity --rows 1000000
+"""
+## import needed packages
+import argparse
+import io
+import time
+import pandas as pd
+from fraud_predictor.preprocessors.velocity import parse_velocity, parse_velocity_literal_eval
+from .synthetic import make_transactions
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--skip-literal-eval', action='store_true')
+    args = parser.parse_args()
+
+    csv = make_transactions(args.rows)[['velocity_last_hour']].to_csv(index=False)
+    values, csv_seconds = timed(lambda: pd.read_csv(io.StringIO(csv))['velocity_last_hour'])
+    parsed, seconds = timed(parse_velocity, values)
+    print(f"read column from csv  {csv_seconds:7.2f}s")
+    print(f"parse_velocity        {seconds:7.2f}s  ({args.rows / seconds:,.0f} rows/s)")
+    if not args.skip_literal_eval:
+        expected, baseline_seconds = timed(parse_velocity_literal_eval, values)
+        pd.testing.assert_frame_equal(parsed, expected)
+        print(f"ast.literal_eval      {baseline_seconds:7.2f}s  ({baseline_seconds / seconds:.1f}x slower)")
+
+
+if __name__ == '__main__':
+    main()
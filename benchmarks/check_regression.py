@@ -0,0 +1,63 @@
+"""
+Compare two `benchmarks.pipeline_suite` result files and fail when a stage got slower than allowed.
+
+A stage regresses when its time on the same number of rows exceeds the baseline by more than
+`--threshold` (a ratio, 1.25 = 25% slower) and by more than `--min-seconds`, so that very short stages
+do not fail on timer noise. Peak memory is checked the same way with `--memory-threshold`.
+
+Run from the repository root:
+    python -m benchmarks.check_regression baseline.json current.json --threshold 1.25
+"""
+## import needed packages
+import argparse
+import json
+import sys
+
+
+def _index(report):
+    return {(record['rows'], record['stage']): record for record in report['results']}
+
+
+def find_regressions(baseline, current, threshold=1.25, min_seconds=0.05, memory_threshold=None):
+    """Return one message per stage of current that is slower (or bigger) than in baseline past the thresholds."""
+    regressions = []
+    baseline_records = _index(baseline)
+    for key, record in _index(current).items():
+        reference = baseline_records.get(key)
+        if reference is None:
+            continue
+        rows, stage = key
+        seconds, reference_seconds = record['seconds'], reference['seconds']
+        if seconds > reference_seconds * threshold and seconds - reference_seconds > min_seconds:
+            regressions.append(f"{stage} (rows={rows:,}): {reference_seconds:.3f}s -> {seconds:.3f}s "
+                               f"({seconds / reference_seconds:.2f}x)")
+        if memory_threshold is not None:
+            peak, reference_peak = record['peak_rss_mb'], reference['peak_rss_mb']
+            if peak > reference_peak * memory_threshold:
+                regressions.append(f"{stage} (rows={rows:,}): peak RSS {reference_peak:.0f}MB -> {peak:.0f}MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--min-seconds', type=float, default=0.05)
+    parser.add_argument('--memory-threshold', type=float, default=None)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = find_regressions(baseline, current, args.threshold, args.min_seconds, args.memory_threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if regressions:
+        sys.exit(1)
+    print(f"No stage regressed past {args.threshold:.2f}x ({baseline.get('commit')} -> {current.get('commit')})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Load generator for the scoring server: keeps `--concurrency` keep-alive connections busy posting single
+transactions to /score, then prints the throughput, the client-side latencies and the server batch sizes.
+
+Start a server, then run from the repository root:
+    python -m fraud_predictor.serving.http_server --port 8080
+    python -m benchmarks.load_generator --port 8080 --requests 5000 --concurrency 32
+"""
+## import needed packages
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from fraud_predictor.preprocessors.preprocessing import load_df, drop_unnecessary_columns
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.model.model_and_metrics import split_data
+
+
+def sample_transactions(n, seed=0):
+    """Return n feature rows of the sample test set as JSON-ready dicts."""
+    df = build_features(drop_unnecessary_columns(load_df()))
+    _, X_test, _, _ = split_data(df)
+    records = json.loads(X_test.to_json(orient='records'))
+    indices = np.random.default_rng(seed).integers(0, len(records), n)
+    return [records[i] for i in indices]
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Send one HTTP/1.1 request on a keep-alive connection and return the decoded JSON response."""
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return json.loads(await reader.readexactly(int(headers.get('content-length', 0))))
+
+
+async def worker(host, port, transactions, timings):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for transaction in transactions:
+            start = time.perf_counter()
+            await request(reader, writer, 'POST', '/score', {'transaction': transaction})
+            timings.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    transactions = sample_transactions(args.requests)
+    timings = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(args.host, args.port, transactions[i::args.concurrency], timings) for i in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    metrics = await request(reader, writer, 'GET', '/metrics')
+    writer.close()
+
+    timings = np.array(timings) * 1e3
+    print(f"{len(timings)} requests in {elapsed:.2f}s ({len(timings) / elapsed:.0f} req/s)")
+    print(f"latency p50={np.percentile(timings, 50):.3f}ms  p99={np.percentile(timings, 99):.3f}ms")
+    batch_size = metrics['batch_size']
+    print(f"server batches={batch_size['count']}  mean batch size={batch_size['sum'] / max(batch_size['count'], 1):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Time and peak memory of every stage of the pipeline (load, merge, each feature function, tuning, training
+and scoring) on synthetic data with the `dropped_df.csv` schema, at one or more sizes.
+
+The results are written as JSON so runs on different commits can be compared with
+`benchmarks.check_regression`.
+
+Run from the repository root:
+    python -m benchmarks.pipeline_suite --rows 10000 1000000 10000000 --output results.json
+    python -m benchmarks.pipeline_suite --rows 1000000 --skip tune_lightgbm
+    python -m benchmarks.pipeline_suite --rows 100000 --trace trace.json   # + a Chrome trace of every stage
+"""
+## import needed packages
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+import pandas as pd
+from fraud_predictor.preprocessors.preprocessing import load_df_chunked, drop_unnecessary_columns
+from fraud_predictor.preprocessors.dtype_planning import compact_frame
+from fraud_predictor.merging.merging_df import (
+    load_df2, load_df3, rename_columns, rename_values, add_column_by_merge, gdp_capita_columns_keep
+)
+from fraud_predictor.merging.table_cache import DEFAULT_TABLE_CONFIG
+from fraud_predictor.merging.country_enrichment import CountryIndex
+from fraud_predictor.features.features_creation import (
+    DEFAULT_FEATURE_CONFIG, transform_to_datetime_type, create_time_columns, categorize_hour_column,
+    drop_redundant_columns, create_channel_usage, create_interaction_by_category, create_payment_safety,
+    create_features
+)
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.features.parallel import build_features_parallel
+from fraud_predictor.model.model_and_metrics import (
+    split_data, convert_object_to_category, tune_lightgbm, train_optimized_lightgbm, predict_proba
+)
+from fraud_predictor.model.out_of_core import train_lightgbm_out_of_core
+from fraud_predictor.profiling.profiler import Profiler, read_peak_rss, reset_peak_rss
+from .synthetic import write_transactions
+
+BEST_PARAMS = {'n_estimators': 200, 'max_depth': 7, 'learning_rate': 0.1, 'max_bin': 1500, 'num_leaves': 50}
+
+## Feature config of the notebook (amount normalized by merchant category)
+NOTEBOOK_FEATURE_CONFIG = {
+    'interactions': [{'col1': 'amount', 'col2': 'merchant_category', 'new_col_name': 'value_by_category'}]
+}
+
+## Search settings of the tune_lightgbm stage, kept small so the stage stays tractable on large data
+TUNING_KWARGS = {'n_iter': 9, 'cv': 3, 'verbose': 0, 'method': 'halving'}
+
+## The stage is named after the search it measures: the halving search, not the default random search of
+## the notebook, which is too slow past the smallest sizes (see benchmarks.bench_tuning for both)
+TUNING_STAGE = f"tune_lightgbm[{TUNING_KWARGS['method']}]"
+
+
+def measure(stage, func, *args):
+    """Run func(*args) and return its output and a record with its wall time and peak RSS."""
+    gc.collect()
+    exact_peak = reset_peak_rss()
+    start_rss = read_peak_rss()
+    start = time.perf_counter()
+    output = func(*args)
+    seconds = time.perf_counter() - start
+    peak_rss = read_peak_rss()
+    return output, {
+        'stage': stage,
+        'seconds': seconds,
+        'peak_rss_mb': peak_rss,
+        # Without a peak reset, the process peak may come from an earlier stage
+        'peak_rss_increase_mb': peak_rss - start_rss if exact_peak else None
+    }
+
+
+def _load_gdp_tables(config=DEFAULT_TABLE_CONFIG):
+    df2 = rename_columns(load_df2(config['gdp_file']), {'Country Name': 'country', '2023': 'GDP'})
+    df3 = load_df3(config['gdp_per_capita_file'], **config['gdp_per_capita_read_kwargs'])
+    df3 = rename_columns(gdp_capita_columns_keep(df3), {'Country Name': 'country', '2023': 'GDP_per_capita'})
+    return df2, df3
+
+
+def run_pipeline(csv_path, skip=()):
+    """Run every stage on the transactions of csv_path, in the order of the notebook, and return the records."""
+    records = []
+
+    def stage(name, func, *args):
+        if name in skip:
+            return func(*args)
+        output, record = measure(name, func, *args)
+        records.append(record)
+        return output
+
+    # `load_df` reads the sample file with a plain read_csv, the stage does the same on the synthetic file
+    df = stage('load_df', pd.read_csv, csv_path)
+    df = stage('drop_unnecessary_columns', drop_unnecessary_columns, df)
+    stage('load_df_chunked', load_df_chunked, csv_path)
+    stage('compact_frame', compact_frame, df)
+
+    df2, df3 = _load_gdp_tables()
+    country_index = CountryIndex.from_files()
+    stage('enrich_countries', country_index.enrich, df.copy())
+    df = stage('rename_values', rename_values, df, DEFAULT_TABLE_CONFIG['country_mapping'])
+    df = stage('add_column_by_merge[GDP]', add_column_by_merge, df, df2, ['country'], ['GDP'])
+    df = stage('add_column_by_merge[GDP_per_capita]', add_column_by_merge, df, df3, ['country'], ['GDP_per_capita'])
+
+    config = {**DEFAULT_FEATURE_CONFIG, **NOTEBOOK_FEATURE_CONFIG}
+    stage('create_features', create_features, df.copy(), config)
+    stage('build_features', build_features, df, config)
+    stage('build_features_parallel', build_features_parallel, df, config)
+
+    # The feature functions one by one, each on the output of the previous one as in the notebook
+    features = df.copy()
+    del df
+    features = stage('transform_to_datetime_type', transform_to_datetime_type, features)
+    features = stage('create_time_columns', create_time_columns, features)
+    features = stage('categorize_hour_column', categorize_hour_column, features)
+    features = stage('drop_redundant_columns', drop_redundant_columns, features, config['columns_to_drop'])
+    features = stage('create_channel_usage', create_channel_usage, features)
+    for interaction in config['interactions']:
+        features = stage('create_interaction_by_category', create_interaction_by_category, features,
+                         interaction['col1'], interaction['col2'], interaction['new_col_name'])
+    features = stage('create_payment_safety', create_payment_safety, features, config['device_col'],
+                     config['safety_col'], config['device_mapping'])
+
+    X_train, X_test, y_train, _ = split_data(features)
+    X_train, X_test = convert_object_to_category(X_train, X_test)
+    del features
+    if not {'tune_lightgbm', TUNING_STAGE} & set(skip):
+        stage(TUNING_STAGE, lambda X, y: tune_lightgbm(X, y, **TUNING_KWARGS), X_train, y_train)
+    model = stage('train_optimized_lightgbm', train_optimized_lightgbm, X_train, y_train, BEST_PARAMS)
+    stage('predict_proba', predict_proba, model, X_test)
+    del X_train, X_test, model
+
+    # The same training streamed from the file, without the frame in memory
+    if 'train_lightgbm_out_of_core' not in skip:
+        _, streamed = stage('train_lightgbm_out_of_core', train_lightgbm_out_of_core, csv_path, BEST_PARAMS, config)
+        streamed.cleanup()
+    return records
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(row_counts, skip=(), seed=0, trace=None):
+    """
+    Run the pipeline on synthetic data of every size and return the results with the run metadata.
+
+    - trace : Path of a Chrome trace of every profiled function of the run (nested in the stages), with
+      the number of rows inserted before the extension when there are several sizes.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in row_counts:
+            csv_path = write_transactions(os.path.join(tmp_dir, f'transactions_{n_rows}.csv'), n_rows, seed=seed)
+            # The stages measure the peak RSS themselves, the profiler must not reset it under them
+            with Profiler(peak_rss=False) if trace else contextlib.nullcontext() as profiler:
+                records = run_pipeline(csv_path, skip=skip)
+            if trace:
+                root, ext = os.path.splitext(trace)
+                profiler.to_chrome_trace(trace if len(row_counts) == 1 else f'{root}_{n_rows}{ext}')
+            for record in records:
+                results.append({'rows': n_rows, **record})
+                print(f"rows={n_rows:<10,} {record['stage']:<38} {record['seconds']:9.3f}s  "
+                      f"peak={record['peak_rss_mb']:8.0f}MB")
+            os.remove(csv_path)
+    return {
+        'commit': _git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--skip', nargs='*', default=[], help="Stages not to measure, e.g. tune_lightgbm")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="JSON file for the results (default: print only)")
+    parser.add_argument('--trace', default=None, help="Chrome trace file of the profiled functions")
+    args = parser.parse_args()
+
+    report = run_suite(args.rows, skip=set(args.skip), seed=args.seed, trace=args.trace)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Synthetic transactions with the schema and distributions of `dropped_df.csv`, at any number of rows.
+
+Rows are drawn with replacement from the sample, so the categorical frequencies and the joint
+distribution of the columns (including the fraud rate and its relation to the features) are kept. The
+columns that must not repeat are then regenerated: unique transaction ids, customer ids from a fixed pool
+(the full dataset has about 5,000 customers whatever its size), timestamps spread over the month of the
+sample with `transaction_hour` and `weekend_transaction` derived from them, and amounts jittered by a few
+percent so there are no exact duplicates.
+
+Write 1M rows to a csv from the repository root:
+    python -m benchmarks.synthetic --rows 1000000 --output /tmp/synthetic_1M.csv
+"""
+## import needed packages
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+SAMPLE_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../fraud_predictor/data/dropped_df.csv'))
+
+## Customers of the full dataset; the customer ids are drawn from a pool of this size
+N_CUSTOMERS = 5_000
+
+_NS_PER_HOUR = 3_600 * 10**9
+
+
+def load_sample():
+    return pd.read_csv(SAMPLE_FILE)
+
+
+def make_transactions(n_rows, sample=None, seed=0, n_customers=N_CUSTOMERS):
+    """Return a frame of n_rows synthetic transactions with the columns of `dropped_df.csv`."""
+    sample = load_sample() if sample is None else sample
+    rng = np.random.default_rng(seed)
+    df = sample.iloc[rng.integers(0, len(sample), n_rows)].reset_index(drop=True)
+
+    df['transaction_id'] = 'TX_' + pd.Series(rng.integers(0, 16**8, n_rows)).map('{:08x}'.format)
+    df['customer_id'] = 'CUST_' + pd.Series(rng.integers(10_000, 10_000 + n_customers, n_rows)).astype(str)
+
+    times = pd.to_datetime(sample['timestamp'], utc=True)
+    start, end = times.min().value, times.max().value
+    timestamps = pd.to_datetime(np.sort(rng.integers(start, end, n_rows)), utc=True)
+    df['timestamp'] = timestamps.astype(str)
+    df['transaction_hour'] = timestamps.hour
+    df['weekend_transaction'] = timestamps.dayofweek >= 5
+
+    df['amount'] = (df['amount'] * rng.lognormal(0, 0.05, n_rows)).round(2)
+    return df
+
+
+def write_transactions(path, n_rows, seed=0, chunksize=1_000_000):
+    """Write n_rows synthetic transactions to a csv, generating them in chunks so memory stays bounded."""
+    sample = load_sample()
+    for i, start in enumerate(range(0, n_rows, chunksize)):
+        chunk = make_transactions(min(chunksize, n_rows - start), sample=sample, seed=seed + i)
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_transactions(args.output, args.rows, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,13 @@
 # fraud_predictor/features/__init__.py
 
 from .features_creation import create_features
+from .feature_engine import build_features
+from .feature_state import FeatureState
+from .online_aggregates import ChannelUsageStore
+from .parallel import build_features_parallel
+from .rolling_windows import create_window_features, CustomerWindows
 
-__all__ = ['create_features']
+__all__ = [
+    'create_features', 'build_features', 'FeatureState', 'ChannelUsageStore', 'build_features_parallel',
+    'create_window_features', 'CustomerWindows'
+]
@@ -0,0 +1,166 @@
+## import needed packages
+import numpy as np
+import pandas as pd
+from .features_creation import DEFAULT_FEATURE_CONFIG
+from ..profiling.profiler import profiled
+
+## Same bins and labels as `categorize_hour_column`
+TIME_BINS = np.array([0, 6, 12, 15, 19, 21, 24])
+TIME_LABELS = ['morning', 'lunch', 'afternoon', 'dinner', 'evening', 'night']
+
+_NS_PER_DAY = 86_400 * 10**9
+_NS_PER_HOUR = 3_600 * 10**9
+
+
+def parse_timestamp(timestamp):
+    """Parse a timestamp column as `transform_to_datetime_type` does, without writing it back to the df."""
+    try:
+        return pd.to_datetime(timestamp)
+    except Exception as e:
+        raise ValueError(f"Failed to convert the 'timestamp' column to datetime: {e}")
+
+
+def time_parts(timestamp):
+    """
+    Compute the month, day and hour of a datetime column from a single int64 view of the epoch nanoseconds,
+    with the same values (and NaN for NaT) as `.dt.month`, `.dt.day` and `.dt.hour`.
+    """
+    if timestamp.dt.tz is not None:
+        # .dt accessors give the wall time of the timezone, so work on the local (naive) clock as well
+        timestamp = timestamp.dt.tz_localize(None)
+    ns = timestamp.to_numpy().view(np.int64)
+    is_nat = timestamp.isna().to_numpy()
+
+    days, ns_of_day = np.divmod(ns, _NS_PER_DAY)
+    hour = ns_of_day // _NS_PER_HOUR
+
+    # Days since epoch -> civil date (H. Hinnant's days_from_civil inverse, valid for the proleptic calendar)
+    z = days + 719468
+    era = np.floor_divide(z, 146097)
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+
+    if is_nat.any():
+        month, day, hour = (np.where(is_nat, np.nan, part) for part in (month, day, hour))
+    return month, day, hour
+
+
+def hour_category(hour):
+    """Categorize hours into time-of-day categories, as `pd.cut` does in `categorize_hour_column`."""
+    hour = np.asarray(hour, dtype=np.float64)
+    codes = np.searchsorted(TIME_BINS, hour, side='right') - 1
+    codes[np.isnan(hour) | (codes < 0) | (codes >= len(TIME_LABELS))] = -1
+    return pd.Categorical.from_codes(codes, categories=TIME_LABELS, ordered=True)
+
+
+def _factorize(columns, col, factorized):
+    """Factorize a column once, reusing the codes when another feature groups by the same column."""
+    if col not in factorized:
+        values = columns[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, n_groups = values.cat.codes.to_numpy().astype(np.int64), len(values.cat.categories)
+        else:
+            codes, uniques = pd.factorize(values)
+            codes, n_groups = codes.astype(np.int64), len(uniques)
+        factorized[col] = (codes, n_groups)
+    return factorized[col]
+
+
+def channel_usage(customer_codes, n_customers, channel_codes, n_channels):
+    """
+    Compute `create_channel_usage` from factorized customer and channel codes with two bincounts,
+    instead of two groupbys that factorize the customers twice.
+    """
+    valid = (customer_codes >= 0) & (channel_codes >= 0)
+    pair_codes = customer_codes * n_channels + channel_codes
+
+    if n_customers * n_channels <= 4 * len(pair_codes):
+        pair_counts = np.bincount(pair_codes[valid], minlength=n_customers * n_channels)
+        channel_count = pair_counts[np.where(valid, pair_codes, 0)]
+    else:
+        pair_codes = pd.factorize(pair_codes)[0]
+        channel_count = np.bincount(pair_codes[valid], minlength=len(pair_codes))[pair_codes]
+    total_transactions = np.bincount(customer_codes[valid], minlength=n_customers)[np.where(valid, customer_codes, 0)]
+
+    usage = channel_count / total_transactions
+    usage[~valid] = np.nan
+    return usage
+
+
+def interaction_by_category(values, category_codes, n_categories):
+    """
+    Compute `create_interaction_by_category` from factorized category codes.
+    The group means go through the same pandas kernel as the groupby, so the values are bit-identical.
+    """
+    category_mean = values.groupby(category_codes).mean().reindex(np.arange(n_categories)).to_numpy()
+    category_mean = category_mean[np.maximum(category_codes, 0)]
+    category_mean[category_codes < 0] = np.nan
+    return values / pd.Series(category_mean, index=values.index)
+
+
+@profiled
+def build_features(df, config=None, state=None):
+    """
+    Create the same features as `create_features` in a single planned pass, without mutating df or copying
+    the frame between steps (the returned df shares the memory of the columns it keeps from df).
+
+    The timestamp is parsed once and month/day/hour come from one int64 epoch view, every key column is
+    factorized at most once (shared by the channel usage and the interactions), and the output frame is
+    assembled once at the end.
+
+    - config : A dictionary overriding the keys of `DEFAULT_FEATURE_CONFIG` (the config of `state` by default).
+    - state : A fitted `FeatureState`. When given, the channel usage and the interactions are looked up in
+      the statistics learned on the training data instead of being computed over df, which is what
+      scoring a (small) batch of new transactions needs.
+    """
+    if state is not None and config is None:
+        config = state.config
+    config = {**DEFAULT_FEATURE_CONFIG, **(config or {})}
+    if 'timestamp' not in df.columns:
+        raise ValueError("The column 'timestamp' does not exist in the DataFrame.")
+    if config['device_mapping'] is None:
+        raise ValueError("You must provide a device_mapping dictionary.")
+
+    # Plan of the output: the original columns followed by the derived ones, in the order of `create_features`
+    columns = {col: df[col] for col in df.columns}
+
+    timestamp = parse_timestamp(df['timestamp'])
+    month, day, hour = time_parts(timestamp)
+    columns['timestamp'] = timestamp
+    columns['transaction_month'] = pd.Series(month, index=df.index)
+    columns['transaction_day'] = pd.Series(day, index=df.index)
+    columns['transaction_hour'] = pd.Series(hour, index=df.index)
+    columns['hour_category'] = pd.Series(hour_category(hour), index=df.index)
+
+    missing_columns = [col for col in config['columns_to_drop'] if col not in columns]
+    if missing_columns:
+        raise KeyError(f"{missing_columns} not found in axis")
+    for col in config['columns_to_drop']:
+        del columns[col]
+
+    customers, channels = columns[config['customer_col']], columns[config['channel_col']]
+    factorized = {}
+    if state is None:
+        customer_codes, n_customers = _factorize(columns, config['customer_col'], factorized)
+        channel_codes, n_channels = _factorize(columns, config['channel_col'], factorized)
+        usage = channel_usage(customer_codes, n_customers, channel_codes, n_channels)
+    else:
+        usage = state.channel_usage.lookup(customers, channels)
+    columns['channel_usage'] = pd.Series(usage, index=df.index)
+
+    for i, interaction in enumerate(config['interactions']):
+        values, categories = columns[interaction['col1']], columns[interaction['col2']]
+        if state is None:
+            category_codes, n_categories = _factorize(columns, interaction['col2'], factorized)
+            columns[interaction['new_col_name']] = interaction_by_category(values, category_codes, n_categories)
+        else:
+            columns[interaction['new_col_name']] = state.interactions[i].apply(values, categories)
+
+    columns[config['safety_col']] = columns[config['device_col']].map(config['device_mapping'])
+
+    # The untouched columns are shared with df rather than copied into a new consolidated frame
+    return pd.concat(columns, axis=1, copy=False)
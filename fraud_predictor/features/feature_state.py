@@ -0,0 +1,214 @@
+## import needed packages
+import json
+import numpy as np
+import pandas as pd
+from .features_creation import DEFAULT_FEATURE_CONFIG
+from .feature_engine import build_features
+
+
+def _to_key_array(keys):
+    """Convert lookup keys to a plain numpy array that can be saved without pickling."""
+    keys = pd.Index(keys)
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = pd.Index(keys.to_numpy())
+    if keys.dtype == object:
+        if not all(isinstance(key, str) for key in keys):
+            raise TypeError("Lookup keys must be all strings or all numbers to be persisted.")
+        return keys.to_numpy().astype(str)
+    return keys.to_numpy()
+
+
+def _lookup(index, values):
+    """
+    Return the position of every value in `index` (-1 when unseen), as a vectorized join.
+    Categorical values are looked up through their categories, so only the distinct values are hashed.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        positions = index.get_indexer(values.cat.categories)
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, positions[codes], -1)
+    return index.get_indexer(values)
+
+
+class ChannelUsageTransformer:
+    """
+    Learn on the training data the frequency with which each customer uses each channel (the statistic of
+    `create_channel_usage`) and apply it to new transactions with a lookup instead of a groupby.
+
+    The table is stored as the sorted customer and channel keys plus a dense (customers x channels) array
+    of usage ratios. Unseen customers get `fill_value`; a known customer on a channel never used in
+    training gets 0.
+    """
+
+    def __init__(self, customer_col='customer_id', channel_col='channel', new_col_name='channel_usage',
+                 fill_value=np.nan):
+        self.customer_col = customer_col
+        self.channel_col = channel_col
+        self.new_col_name = new_col_name
+        self.fill_value = fill_value
+        self.customers = None
+        self.channels = None
+        self.usage = None
+        self._indexes = None
+
+    def fit(self, df):
+        """Learn the per-customer channel frequencies from df."""
+        counts = df.groupby([self.customer_col, self.channel_col], observed=True).size()
+        counts = counts.unstack(fill_value=0).sort_index().sort_index(axis=1)
+        self.customers = _to_key_array(counts.index)
+        self.channels = _to_key_array(counts.columns)
+        counts = counts.to_numpy()
+        self.usage = counts / counts.sum(axis=1, keepdims=True)
+        self._indexes = None
+        return self
+
+    def _check_is_fitted(self):
+        if self.usage is None:
+            raise ValueError("The transformer is not fitted yet, call fit first.")
+
+    def lookup(self, customers, channels):
+        """Return the learned channel usage of every (customer, channel) pair as a numpy array."""
+        self._check_is_fitted()
+        if self._indexes is None:
+            self._indexes = pd.Index(self.customers), pd.Index(self.channels)
+        customer_pos = _lookup(self._indexes[0], pd.Series(customers))
+        channel_pos = _lookup(self._indexes[1], pd.Series(channels))
+        found = (customer_pos >= 0) & (channel_pos >= 0)
+        usage = self.usage[np.maximum(customer_pos, 0), np.maximum(channel_pos, 0)]
+        usage[~found] = self.fill_value
+        return usage
+
+    def transform(self, df):
+        """Add the learned channel usage of every transaction of df as a new column."""
+        df[self.new_col_name] = self.lookup(df[self.customer_col], df[self.channel_col])
+        return df
+
+    def get_state(self):
+        """Return the fitted table as a dictionary of numpy arrays."""
+        self._check_is_fitted()
+        return {'customers': self.customers, 'channels': self.channels, 'usage': self.usage}
+
+    def set_state(self, state):
+        """Restore a fitted table from the dictionary of `get_state`."""
+        self.customers = np.asarray(state['customers'])
+        self.channels = np.asarray(state['channels'])
+        self.usage = np.asarray(state['usage'])
+        self._indexes = None
+        return self
+
+
+class CategoryInteractionTransformer:
+    """
+    Learn on the training data the mean of col1 within each category of col2 (the statistic of
+    `create_interaction_by_category`) and normalize new transactions with it.
+    Categories unseen in training give NaN.
+    """
+
+    def __init__(self, col1, col2, new_col_name):
+        self.col1 = col1
+        self.col2 = col2
+        self.new_col_name = new_col_name
+        self.categories = None
+        self.means = None
+        self._index = None
+
+    def fit(self, df):
+        """Learn the mean of col1 per category of col2 from df."""
+        category_mean = df.groupby(self.col2, observed=True)[self.col1].mean().sort_index()
+        self.categories = _to_key_array(category_mean.index)
+        self.means = category_mean.to_numpy()
+        self._index = None
+        return self
+
+    def _check_is_fitted(self):
+        if self.means is None:
+            raise ValueError("The transformer is not fitted yet, call fit first.")
+
+    def lookup(self, categories):
+        """Return the learned mean of the category of every row as a numpy array."""
+        self._check_is_fitted()
+        if self._index is None:
+            self._index = pd.Index(self.categories)
+        positions = _lookup(self._index, pd.Series(categories))
+        means = self.means[np.maximum(positions, 0)]
+        means[positions < 0] = np.nan
+        return means
+
+    def apply(self, values, categories):
+        """Normalize col1 values by the learned mean of their categories."""
+        values = pd.Series(values)
+        return values / pd.Series(self.lookup(categories), index=values.index)
+
+    def transform(self, df):
+        """Add the normalized col1 of every transaction of df as a new column."""
+        df[self.new_col_name] = self.apply(df[self.col1], df[self.col2])
+        return df
+
+    def get_state(self):
+        """Return the fitted table as a dictionary of numpy arrays."""
+        self._check_is_fitted()
+        return {'categories': self.categories, 'means': self.means}
+
+    def set_state(self, state):
+        """Restore a fitted table from the dictionary of `get_state`."""
+        self.categories = np.asarray(state['categories'])
+        self.means = np.asarray(state['means'])
+        self._index = None
+        return self
+
+
+class FeatureState:
+    """
+    The fitted statistics of the feature pipeline: the channel usage table and one table per interaction
+    of the feature config. Pass it to `build_features(df, state=...)` to score new transactions with the
+    statistics of the training data instead of the ones of the scoring batch.
+    """
+
+    def __init__(self, config=None):
+        self.config = {**DEFAULT_FEATURE_CONFIG, **(config or {})}
+        self.channel_usage = ChannelUsageTransformer(
+            customer_col=self.config['customer_col'], channel_col=self.config['channel_col']
+        )
+        self.interactions = [CategoryInteractionTransformer(**interaction)
+                             for interaction in self.config['interactions']]
+
+    def fit(self, df):
+        """Learn every statistic on the training df (before the features are created)."""
+        features = build_features(df, self.config)
+        self.channel_usage.fit(features)
+        for interaction in self.interactions:
+            interaction.fit(features)
+        return self
+
+    def get_state(self):
+        """Return the config and every fitted table as a flat dictionary of numpy arrays."""
+        state = {'config': np.array(json.dumps(self.config))}
+        for key, values in self.channel_usage.get_state().items():
+            state['channel_usage.' + key] = values
+        for i, interaction in enumerate(self.interactions):
+            for key, values in interaction.get_state().items():
+                state[f'interaction_{i}.' + key] = values
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a fitted FeatureState from the dictionary of `get_state`."""
+        feature_state = cls(json.loads(str(state['config'])))
+        feature_state.channel_usage.set_state(
+            {key: state['channel_usage.' + key] for key in ['customers', 'channels', 'usage']}
+        )
+        for i, interaction in enumerate(feature_state.interactions):
+            interaction.set_state({key: state[f'interaction_{i}.' + key] for key in ['categories', 'means']})
+        return feature_state
+
+    def save(self, path):
+        """Save the fitted state as an uncompressed .npz file (no pickled objects)."""
+        with open(path, 'wb') as f:
+            np.savez(f, **self.get_state())
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load a state saved with `save`."""
+        with np.load(path, allow_pickle=False) as state:
+            return cls.from_state({key: state[key] for key in state.files})
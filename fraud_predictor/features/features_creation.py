@@ -1,6 +1,8 @@
 ## import needed packages
 import pandas as pd
+from ..profiling.profiler import profiled
         
+@profiled
 def transform_to_datetime_type(df):
     """
     Transform the 'timestamp' column of a DataFrame to datetime format.
@@ -14,6 +16,7 @@ def transform_to_datetime_type(df):
     return df
 
 
+@profiled
 def create_time_columns(df):
     """
     Create columns for month, day, and hour from the 'timestamp' column.
@@ -27,6 +30,7 @@ def create_time_columns(df):
     return df
 
 
+@profiled
 def categorize_hour_column(df):
     """
     Categorize the 'transaction_hour' column into time-of-day categories.
@@ -40,6 +44,7 @@ def categorize_hour_column(df):
     return df
 
 
+@profiled
 def drop_redundant_columns(df, columns_to_drop):
     """
     Drop columns that became redundant and/or unnecessary after the variable transformations performed.
@@ -49,6 +54,7 @@ def drop_redundant_columns(df, columns_to_drop):
     return df.drop(columns=columns_to_drop)
 
 
+@profiled
 def create_channel_usage(df, customer_col='customer_id', channel_col='channel'):
     """
     Calculate the frequency with which each customer makes purchases using each channel.
@@ -64,6 +70,7 @@ def create_channel_usage(df, customer_col='customer_id', channel_col='channel'):
     return df
 
 
+@profiled
 def create_interaction_by_category(df, col1, col2, new_col_name):
     """
     Create an interaction term by normalizing a numeric column (col1) within each category (col2).
@@ -80,6 +87,7 @@ def create_interaction_by_category(df, col1, col2, new_col_name):
     return df
 
 
+@profiled
 def create_payment_safety(df, device_col='device', safety_col='payment_safety', device_mapping=None):
     """
     Map the values of the 'device' column to payment safety levels and add the result
@@ -93,4 +101,52 @@ def create_payment_safety(df, device_col='device', safety_col='payment_safety',
         raise ValueError("You must provide a device_mapping dictionary.")
     
     df[safety_col] = df[device_col].map(device_mapping)
-    return df
\ No newline at end of file
+    return df
+
+## Configuration of the feature functions, shared by `create_features` and the fused `build_features` engine
+DEFAULT_FEATURE_CONFIG = {
+    'columns_to_drop': ['timestamp', 'transaction_hour'],
+    'customer_col': 'customer_id',
+    'channel_col': 'channel',
+    'interactions': [
+        {'col1': 'channel_usage', 'col2': 'hour_category', 'new_col_name': 'channel_hour_interaction'}
+    ],
+    'device_col': 'device',
+    'safety_col': 'payment_safety',
+    'device_mapping': {
+        'Edge': 1,
+        'Chrome': 1,
+        'Safari': 1,
+        'Firefox': 1,
+        'iOS App': 2,
+        'Android App': 2,
+        'NFC Payment': 3,
+        'Chip Reader': 4,
+        'Magnetic Stripe': 4
+    }
+}
+
+
+@profiled
+def create_features(df, config=None):
+    """
+    Create all the features by chaining the functions above, in the same order as the notebook.
+
+    - config : A dictionary overriding the keys of `DEFAULT_FEATURE_CONFIG`. Each entry of 'interactions'
+      holds the col1, col2 and new_col_name arguments of `create_interaction_by_category`.
+    """
+    config = {**DEFAULT_FEATURE_CONFIG, **(config or {})}
+    df = transform_to_datetime_type(df)
+    df = create_time_columns(df)
+    df = categorize_hour_column(df)
+    df = drop_redundant_columns(df, config['columns_to_drop'])
+    df = create_channel_usage(df, customer_col=config['customer_col'], channel_col=config['channel_col'])
+    for interaction in config['interactions']:
+        df = create_interaction_by_category(df, **interaction)
+    df = create_payment_safety(
+        df,
+        device_col=config['device_col'],
+        safety_col=config['safety_col'],
+        device_mapping=config['device_mapping']
+    )
+    return df
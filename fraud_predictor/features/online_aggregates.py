@@ -0,0 +1,143 @@
+## import needed packages
+import numpy as np
+import pandas as pd
+from .feature_state import ChannelUsageTransformer
+
+
+def _to_seconds(timestamp):
+    """Convert a timestamp (string, datetime or number of seconds) to epoch seconds."""
+    if isinstance(timestamp, (int, float, np.integer, np.floating)):
+        return float(timestamp)
+    return pd.Timestamp(timestamp).value / 1e9
+
+
+class ChannelUsageStore:
+    """
+    Keep per-customer, per-channel transaction counts up to date as transactions arrive, so the
+    `channel_usage` of a transaction costs O(1) instead of a groupby over the whole history.
+
+    Replaying `update` over the same data gives exactly the values of `create_channel_usage`.
+
+    - half_life : Optional half-life in seconds. When set, each transaction weighs 2**(-age / half_life),
+      so recent channel habits count more than old ones. The weights of a customer are kept relative to
+      its latest transaction, so an update only rescales the entry of that customer.
+    """
+
+    def __init__(self, customer_col='customer_id', channel_col='channel', timestamp_col='timestamp',
+                 half_life=None):
+        if half_life is not None and half_life <= 0:
+            raise ValueError("half_life must be a positive number of seconds")
+        self.customer_col = customer_col
+        self.channel_col = channel_col
+        self.timestamp_col = timestamp_col
+        self.half_life = half_life
+        # customer -> [total, {channel: count}, last_seen]
+        self._customers = {}
+
+    def __len__(self):
+        return len(self._customers)
+
+    def _add_counts(self, customer, channel, weight, seconds):
+        """
+        Add a weight to a (customer, channel) pair. With a half-life, `weight` is relative to `seconds`
+        and the entry is moved to the latest of its own time and `seconds` before adding.
+        """
+        entry = self._customers.get(customer)
+        if entry is None:
+            entry = self._customers[customer] = [0, {}, seconds]
+        if self.half_life is not None:
+            if seconds > entry[2]:
+                factor = 2.0 ** (-(seconds - entry[2]) / self.half_life)
+                entry[0] *= factor
+                for key in entry[1]:
+                    entry[1][key] *= factor
+                entry[2] = seconds
+            else:
+                weight *= 2.0 ** (-(entry[2] - seconds) / self.half_life)
+        elif seconds is not None and (entry[2] is None or seconds > entry[2]):
+            entry[2] = seconds
+        entry[0] += weight
+        entry[1][channel] = entry[1].get(channel, 0) + weight
+
+    def add(self, customer, channel, timestamp=None):
+        """
+        Add one transaction and return its `channel_usage` (which, as in `create_channel_usage`,
+        includes the transaction itself).
+        """
+        if pd.isna(customer) or pd.isna(channel):
+            return np.nan
+        seconds = None if timestamp is None else _to_seconds(timestamp)
+        if self.half_life is not None and seconds is None:
+            raise ValueError("A timestamp is needed when half_life is set.")
+        self._add_counts(customer, channel, 1, seconds)
+        return self.channel_usage(customer, channel)
+
+    def update(self, df_chunk):
+        """
+        Add a chunk of transactions. The counts are aggregated with one groupby over the chunk,
+        so the Python work is per distinct (customer, channel) pair, not per row.
+        """
+        keys = [self.customer_col, self.channel_col]
+        has_time = self.timestamp_col in df_chunk.columns
+        if self.half_life is not None and not has_time:
+            raise ValueError(f"The column '{self.timestamp_col}' is needed when half_life is set.")
+
+        chunk = df_chunk[keys].copy()
+        if has_time:
+            timestamp = pd.to_datetime(df_chunk[self.timestamp_col], utc=True)
+            chunk['_seconds'] = np.where(timestamp.isna(), np.nan, timestamp.values.view(np.int64) / 1e9)
+        if self.half_life is None:
+            chunk['_weight'] = 1
+        else:
+            # A transaction without a time cannot be weighted
+            chunk = chunk[chunk['_seconds'].notna()].copy()
+            # Weights relative to the latest transaction of each customer in the chunk
+            latest = chunk.groupby(self.customer_col, observed=True)['_seconds'].transform('max')
+            chunk['_weight'] = np.exp2((chunk['_seconds'] - latest).to_numpy() / self.half_life)
+            chunk['_seconds'] = latest
+
+        grouped = chunk.groupby(keys, observed=True, sort=False)
+        weights = grouped['_weight'].sum()
+        last_seen = grouped['_seconds'].max() if has_time else pd.Series(None, index=weights.index, dtype=object)
+        for (customer, channel), weight, seconds in zip(weights.index, weights.to_numpy(), last_seen.to_numpy()):
+            self._add_counts(customer, channel, weight.item(), None if pd.isna(seconds) else float(seconds))
+        return self
+
+    def channel_usage(self, customer, channel):
+        """Return the current `channel_usage` of a (customer, channel) pair, NaN for an unknown customer."""
+        entry = self._customers.get(customer)
+        if entry is None or not entry[0]:
+            return np.nan
+        return entry[1].get(channel, 0) / entry[0]
+
+    def usage_for(self, df):
+        """Return the current `channel_usage` of every transaction of df."""
+        return np.array([
+            self.channel_usage(customer, channel)
+            for customer, channel in zip(df[self.customer_col], df[self.channel_col])
+        ], dtype=np.float64)
+
+    def expire(self, before):
+        """Forget the customers without any transaction since `before`, and return how many were removed."""
+        before = _to_seconds(before)
+        expired = [customer for customer, entry in self._customers.items()
+                   if entry[2] is not None and entry[2] < before]
+        for customer in expired:
+            del self._customers[customer]
+        return len(expired)
+
+    def to_transformer(self):
+        """Snapshot the current counts into a `ChannelUsageTransformer`, for vectorized batch lookups."""
+        customers = sorted(customer for customer, entry in self._customers.items() if entry[0])
+        channels = sorted({channel for customer in customers for channel in self._customers[customer][1]})
+        channel_pos = {channel: i for i, channel in enumerate(channels)}
+        usage = np.zeros((len(customers), len(channels)), dtype=np.float64)
+        for i, customer in enumerate(customers):
+            total, counts, _ = self._customers[customer]
+            for channel, count in counts.items():
+                usage[i, channel_pos[channel]] = count / total
+
+        transformer = ChannelUsageTransformer(customer_col=self.customer_col, channel_col=self.channel_col)
+        return transformer.set_state({
+            'customers': np.asarray(customers), 'channels': np.asarray(channels), 'usage': usage
+        })
@@ -0,0 +1,141 @@
+## import needed packages
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from .features_creation import DEFAULT_FEATURE_CONFIG
+from .feature_engine import build_features
+from .feature_state import CategoryInteractionTransformer
+from ..profiling.profiler import profiled
+
+## Columns of the input that `build_features` rebuilds instead of passing through
+REBUILT_COLUMNS = ['timestamp', 'transaction_hour']
+
+
+def partition_ids(customers, n_partitions):
+    """
+    Hash-partition rows by customer, so all the transactions of a customer land in the same partition.
+    The hash is computed from the values (also for categoricals), so it does not depend on the row order.
+    """
+    hashes = pd.util.hash_pandas_object(pd.Series(customers), index=False).to_numpy()
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+def _write_arrow(df, path):
+    """Write a df as an Arrow IPC file, which the reader memory-maps instead of unpickling a copy."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def _read_arrow(path):
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _check_interactions(config):
+    """Raise a ValueError when an interaction is built on the output of another interaction."""
+    outputs = [interaction['new_col_name'] for interaction in config['interactions']]
+    for interaction in config['interactions']:
+        if interaction['col1'] in outputs or interaction['col2'] in outputs:
+            raise ValueError("An interaction cannot be built on the output of another interaction.")
+
+
+def _partition_features(input_path, output_path, config):
+    """
+    Worker: build the features of one partition, except the interactions, and write the derived columns
+    to output_path. Returns the sum and count of col1 per category of col2 for every interaction, the
+    partial statistics reduced by the parent into the global means.
+    """
+    df = _read_arrow(input_path)
+    features = build_features(df, {**config, 'interactions': []})
+
+    stats = []
+    for interaction in config['interactions']:
+        values = pd.Series(features[interaction['col1']].to_numpy(), name='value')
+        keys = pd.Series(features[interaction['col2']].to_numpy(), name='key')
+        stats.append(values.groupby(keys, observed=True).agg(['sum', 'count']))
+
+    derived = [col for col in features.columns if col not in df.columns or col in REBUILT_COLUMNS]
+    _write_arrow(features[derived], output_path)
+    return stats
+
+
+def _reduce_means(partial_stats):
+    """Combine the per-partition sums and counts of one interaction into the mean of every category."""
+    totals = pd.concat(partial_stats).groupby(level=0).sum()
+    return totals['sum'] / totals['count']
+
+
+@profiled
+def build_features_parallel(df, config=None, n_workers=None, n_partitions=None, tmp_dir=None):
+    """
+    Create the same features as `build_features` with a pool of processes.
+
+    The rows are hash-partitioned by customer, so the channel usage of a customer is computed entirely
+    within one partition, and the row-wise features do not depend on the partitioning. Only the columns
+    the features read are sent to the workers, as Arrow files that they memory-map, and the workers send
+    back only the derived columns the same way, so no frame is pickled. The interactions normalize by
+    a mean over all the rows: the workers return the sum and count of col1 per category of col2, the
+    parent reduces them into the global means and applies them. The result is in the row order of df,
+    with the columns of `build_features`.
+
+    - n_workers : Number of processes, the number of CPUs by default.
+    - n_partitions : Number of partitions, `n_workers` by default.
+    - tmp_dir : Folder for the Arrow files (e.g. /dev/shm to keep them in memory).
+    """
+    config = {**DEFAULT_FEATURE_CONFIG, **(config or {})}
+    n_workers = n_workers or os.cpu_count() or 1
+    n_partitions = n_partitions or n_workers
+    if n_partitions == 1 or len(df) == 0:
+        return build_features(df, config)
+
+    _check_interactions(config)
+
+    # The schema of the result, from the same function on an empty frame
+    schema = build_features(df.iloc[:0], config).columns
+
+    input_columns = ['timestamp', config['customer_col'], config['channel_col'], config['device_col']]
+    for interaction in config['interactions']:
+        input_columns += [interaction['col1'], interaction['col2']]
+    input_columns = [col for col in dict.fromkeys(input_columns) if col in df.columns]
+
+    partitions = partition_ids(df[config['customer_col']], n_partitions)
+    order = np.argsort(partitions, kind='stable')
+    bounds = np.searchsorted(partitions[order], np.arange(n_partitions + 1))
+    inputs = df[input_columns].take(order)
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        input_paths, output_paths = [], []
+        for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if end > start:
+                input_paths.append(_write_arrow(inputs.iloc[start:end], os.path.join(tmp, f'input_{i}.arrow')))
+                output_paths.append(os.path.join(tmp, f'output_{i}.arrow'))
+        del inputs
+
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(input_paths))) as pool:
+            stats = list(pool.map(_partition_features, input_paths, output_paths, [config] * len(input_paths)))
+        derived = pd.concat([_read_arrow(path) for path in output_paths], ignore_index=True)
+
+    # Back to the row order of df
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    derived = derived.take(inverse)
+    derived.index = df.index
+
+    columns = {}
+    for col in schema:
+        if col in derived.columns:
+            columns[col] = derived[col]
+        elif col in df.columns:
+            columns[col] = df[col]
+    for i, interaction in enumerate(config['interactions']):
+        means = _reduce_means([partition_stats[i] for partition_stats in stats])
+        transformer = CategoryInteractionTransformer(**interaction).set_state(
+            {'categories': means.index.to_numpy(), 'means': means.to_numpy()}
+        )
+        columns[interaction['new_col_name']] = transformer.apply(columns[interaction['col1']], columns[interaction['col2']])
+    return pd.concat({col: columns[col] for col in schema}, axis=1, copy=False)
@@ -0,0 +1,170 @@
+## import needed packages
+import numpy as np
+import pandas as pd
+from ..profiling.profiler import profiled
+
+## Windows of the features, as name -> pandas Timedelta string
+DEFAULT_WINDOWS = {'1h': '1h', '24h': '24h', '7d': '7d'}
+
+## Configuration of the window features: a count for every window, plus the sum of every `sum_cols` column
+## and the number of distinct values of every `distinct_cols` column (column -> name of the feature)
+DEFAULT_WINDOW_CONFIG = {
+    'customer_col': 'customer_id',
+    'timestamp_col': 'timestamp',
+    'windows': DEFAULT_WINDOWS,
+    'sum_cols': {'amount': 'amount_sum'},
+    'distinct_cols': {'country': 'distinct_countries', 'merchant_category': 'distinct_merchant_categories'},
+    # Distinct counts cost one pass per value, so they are meant for low-cardinality columns
+    'max_distinct_values': 1024
+}
+
+
+def _nanoseconds(timestamps):
+    """Epoch nanoseconds of a column of timestamps (strings or datetimes), with NaT as NaN-like int64 min."""
+    return pd.to_datetime(timestamps, utc=True).values.view(np.int64)
+
+
+def _window_columns(config):
+    columns = []
+    for window in config['windows']:
+        columns.append(f'txn_count_{window}')
+        columns += [f'{name}_{window}' for name in config['sum_cols'].values()]
+        columns += [f'{name}_{window}' for name in config['distinct_cols'].values()]
+    return columns
+
+
+def _compute_windows(frame, config):
+    """
+    Return the window features of every row of frame (columns: customer, '_ns', sum and distinct columns),
+    counting for each row only the transactions of the same customer strictly earlier, within the window.
+
+    The rows are sorted once by (customer, time), and the window of every row is the range [lo, hi) of the
+    sorted rows, found for all the rows at once by searchsorted on a (customer, time rank) key: counts are
+    hi - lo, sums differences of cumulative sums, and a value is in the window when its cumulative count
+    grows between lo and hi.
+    """
+    n_rows = len(frame)
+    ns = frame['_ns'].to_numpy()
+    customers = pd.factorize(frame[config['customer_col']])[0]
+    valid = (customers >= 0) & (ns != np.iinfo(np.int64).min)
+
+    # Stable sort by time, then by customer: the rows end sorted by (customer, time) and the time ranks
+    # come from the first sort
+    time_order = np.argsort(np.where(valid, ns, np.iinfo(np.int64).max), kind='stable')
+    time_order = time_order[:int(valid.sum())]
+    time_ns = ns[time_order]
+    is_new_time = np.r_[True, time_ns[1:] != time_ns[:-1]]
+    rank = np.cumsum(is_new_time) - 1
+    distinct_ns = time_ns[is_new_time]
+    by_customer = np.argsort(customers[time_order], kind='stable')
+    order = time_order[by_customer]
+
+    sorted_customers = customers[order].astype(np.int64)
+    stride = len(distinct_ns) + 1
+    key = sorted_customers * stride + rank[by_customer]
+    # Strictly earlier: the window ends at the first row of the same customer at the same time
+    positions = np.arange(len(order))
+    hi = np.maximum.accumulate(np.where(np.r_[True, key[1:] != key[:-1]], positions, 0))
+
+    sums = {col: np.r_[0.0, np.cumsum(np.nan_to_num(frame[col].to_numpy(dtype=np.float64)[order]))]
+            for col in config['sum_cols']}
+    distinct_codes = {}
+    for col in config['distinct_cols']:
+        codes, uniques = pd.factorize(frame[col])
+        if len(uniques) > config['max_distinct_values']:
+            raise ValueError(f"The column '{col}' has {len(uniques)} distinct values, more than "
+                             f"max_distinct_values={config['max_distinct_values']}.")
+        distinct_codes[col] = (codes[order], len(uniques))
+
+    features = {}
+    bounds = {}
+    for window, length in config['windows'].items():
+        # Rank of the first time in the window, searched in time order (sorted queries) then put in key order
+        start_rank = np.searchsorted(distinct_ns, time_ns - pd.Timedelta(length).value, side='left')[by_customer]
+        lo = np.searchsorted(key, sorted_customers * stride + start_rank, side='left')
+        bounds[window] = lo
+        features[f'txn_count_{window}'] = (hi - lo).astype(np.float32)
+        for col, name in config['sum_cols'].items():
+            features[f'{name}_{window}'] = sums[col][hi] - sums[col][lo]
+    for col, name in config['distinct_cols'].items():
+        codes, n_values = distinct_codes[col]
+        counts = {window: np.zeros(len(order), dtype=np.float32) for window in config['windows']}
+        for value in range(n_values):
+            seen = np.r_[0, np.cumsum(codes == value, dtype=np.int64)]
+            for window, lo in bounds.items():
+                counts[window] += seen[hi] > seen[lo]
+        for window in config['windows']:
+            features[f'{name}_{window}'] = counts[window]
+
+    result = pd.DataFrame(index=frame.index)
+    for col in _window_columns(config):
+        values = np.full(n_rows, np.nan, dtype=features[col].dtype)
+        values[order] = features[col]
+        result[col] = values
+    return result
+
+
+@profiled
+def create_window_features(df, config=None):
+    """
+    Add per-customer rolling window features: for every window of config['windows'] (1h, 24h and 7d by
+    default), the number of transactions of the customer, the sum of the amounts and the number of distinct
+    countries and merchant categories, over the transactions strictly earlier than the current one (so a
+    transaction never sees itself, nor the ones at the same time).
+
+    - config : A dictionary overriding the keys of `DEFAULT_WINDOW_CONFIG`.
+
+    The rows can be in any order; rows without a customer or a timestamp get NaN features.
+    """
+    config = {**DEFAULT_WINDOW_CONFIG, **(config or {})}
+    columns = [config['customer_col'], *config['sum_cols'], *config['distinct_cols']]
+    frame = df[columns].copy()
+    frame['_ns'] = _nanoseconds(df[config['timestamp_col']])
+    features = _compute_windows(frame, config)
+    for col in features.columns:
+        df[col] = features[col]
+    return df
+
+
+class CustomerWindows:
+    """
+    Compute the features of `create_window_features` over a stream of chunks in time order (every chunk no
+    earlier than the previous ones), giving the same values as one call on the whole data.
+
+    The rows of the previous chunks that a later transaction can still see (the ones within the longest
+    window of the latest time) are kept as history and prepended to the next chunk.
+
+    - config : A dictionary overriding the keys of `DEFAULT_WINDOW_CONFIG`.
+    """
+
+    def __init__(self, config=None):
+        self.config = {**DEFAULT_WINDOW_CONFIG, **(config or {})}
+        self._max_window = max(pd.Timedelta(length).value for length in self.config['windows'].values())
+        self._columns = [self.config['customer_col'], *self.config['sum_cols'], *self.config['distinct_cols']]
+        self._history = None
+        self.latest_ns = None
+
+    def __len__(self):
+        """Number of rows kept as history."""
+        return 0 if self._history is None else len(self._history)
+
+    def transform(self, df_chunk):
+        """Add the window features to the next chunk (in place, as `create_window_features`) and return it."""
+        frame = df_chunk[self._columns].copy()
+        frame['_ns'] = _nanoseconds(df_chunk[self.config['timestamp_col']])
+        times = frame['_ns'][frame['_ns'] != np.iinfo(np.int64).min]
+        if self.latest_ns is not None and len(times) and times.min() < self.latest_ns:
+            raise ValueError("The chunks must be in time order: this chunk has transactions earlier than the "
+                             "previous chunks.")
+
+        combined = frame if self._history is None else pd.concat([self._history, frame], ignore_index=True)
+        features = _compute_windows(combined, self.config)
+        for col in features.columns:
+            df_chunk[col] = features[col].to_numpy()[len(combined) - len(frame):]
+
+        if len(times):
+            self.latest_ns = int(times.max())
+        if self.latest_ns is not None:
+            keep = combined['_ns'].to_numpy() >= self.latest_ns - self._max_window
+            self._history = combined[keep].reset_index(drop=True)
+        return df_chunk
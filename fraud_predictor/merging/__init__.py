@@ -1,5 +1,7 @@
 # fraud_predictor/merging/__init__.py
 
 from .merging_df import add_column_by_merge
+from .table_cache import load_merged_table
+from .country_enrichment import CountryIndex, enrich_countries
 
-__all__ = ['add_column_by_merge']
\ No newline at end of file
+__all__ = ['add_column_by_merge', 'load_merged_table', 'CountryIndex', 'enrich_countries']
\ No newline at end of file
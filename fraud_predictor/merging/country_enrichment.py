@@ -0,0 +1,119 @@
+## import needed packages
+import numpy as np
+import pandas as pd
+from .merging_df import load_df2, load_df3
+from ..profiling.profiler import profiled
+
+## Names of the transaction countries that differ from the World Bank names, as normalized keys
+COUNTRY_ALIASES = {'usa': 'united states', 'uk': 'united kingdom', 'russia': 'russian federation'}
+
+## Indicator column -> (file, pd.read_csv arguments, year column) of the World Bank exports
+DEFAULT_INDICATORS = {
+    'GDP': ('gdp_country.csv', {}, '2023'),
+    'GDP_per_capita': ('gdp_per_capita.csv', {'sep': ';', 'header': 0}, '2023')
+}
+
+
+def normalize_country(values):
+    """Normalize country names into lookup keys: lower case, with surrounding and repeated spaces removed."""
+    return pd.Index(values).astype(str).str.strip().str.lower().str.replace(r'\s+', ' ', regex=True)
+
+
+def normalize_aliases(aliases):
+    """Normalize both sides of an alias mapping into country keys."""
+    return dict(zip(normalize_country(list(aliases.keys())), normalize_country(list(aliases.values()))))
+
+
+class CountryIndex:
+    """
+    One lookup table of country indicators (GDP, GDP per capita, ...), indexed by normalized country name.
+
+    Replaces the rename_values + add_column_by_merge steps: instead of merging the whole transaction frame
+    once per indicator, the distinct countries of the frame (a few dozen at most) are looked up in the
+    index once, and every indicator column is filled with a `take` through the country codes. The rows keep
+    their order, the frame is not copied, and names are matched case-insensitively and through `aliases`.
+
+    After `enrich`, `unmatched_countries_` lists the countries of the frame that are not in the index.
+    """
+
+    def __init__(self, keys, values, aliases=None):
+        keys = normalize_country(keys)
+        if keys.has_duplicates:
+            raise ValueError("The country keys of the index must be unique.")
+        positions = {key: i for i, key in enumerate(keys)}
+
+        # Aliases point to the row of the name they stand for, so one get_indexer resolves both
+        alias_keys, alias_positions = [], []
+        for alias, name in normalize_aliases(aliases or {}).items():
+            if name in positions and alias not in positions:
+                alias_keys.append(alias)
+                alias_positions.append(positions[name])
+        rows = np.concatenate([np.arange(len(keys)), np.array(alias_positions, dtype=np.int64)])
+
+        self.keys = keys.append(pd.Index(alias_keys, dtype=object))
+        # The last row is all NaN, it is the one taken by the unmatched countries
+        self.values = {
+            col: np.append(np.asarray(column, dtype=np.float64)[rows], np.nan) for col, column in values.items()
+        }
+        self.unmatched_countries_ = []
+
+    @classmethod
+    def from_files(cls, indicators=None, aliases=None):
+        """
+        Build the index from the World Bank files of the data folder.
+
+        - indicators : A dictionary column -> (file name, read_csv arguments, year column), `DEFAULT_INDICATORS`
+          by default. Every file is read with its 'Country Name' column and the given year column.
+        - aliases : A dictionary transaction country -> World Bank name, `COUNTRY_ALIASES` by default.
+        """
+        indicators = DEFAULT_INDICATORS if indicators is None else indicators
+        aliases = COUNTRY_ALIASES if aliases is None else aliases
+        table = None
+        for col, (file_name, read_csv_kwargs, year) in indicators.items():
+            if read_csv_kwargs:
+                df = load_df3(file_name, **read_csv_kwargs)
+            else:
+                df = load_df2(file_name)
+            column = pd.Series(df[year].to_numpy(), index=normalize_country(df['Country Name']), name=col)
+            column = column[~column.index.duplicated()]
+            table = column.to_frame() if table is None else table.join(column, how='outer')
+        return cls(table.index, {col: table[col].to_numpy() for col in table.columns}, aliases=aliases)
+
+    def positions(self, countries):
+        """Return the row of every country in the index, -1 when the country is unknown."""
+        if isinstance(countries.dtype, pd.CategoricalDtype):
+            codes, uniques = countries.cat.codes.to_numpy(), countries.cat.categories
+        else:
+            codes, uniques = pd.factorize(countries)
+        unique_positions = self.keys.get_indexer(normalize_country(uniques))
+        # Unused categories of a categorical column are not reported
+        used = np.bincount(codes[codes >= 0], minlength=len(uniques)) > 0
+        self.unmatched_countries_ = sorted(str(value) for value in uniques[(unique_positions < 0) & used])
+        # Missing countries have code -1, which picks the -1 appended at the end
+        return np.append(unique_positions, -1)[codes]
+
+    @profiled
+    def enrich(self, df, columns=None, country_col='country'):
+        """
+        Add the indicator `columns` (all by default) to df, looked up from its `country_col`, and return it.
+        Missing and unknown countries get NaN; the unknown ones are listed in `unmatched_countries_`.
+        """
+        columns = list(self.values) if columns is None else list(columns)
+        missing_columns = [col for col in columns if col not in self.values]
+        if missing_columns:
+            raise ValueError(f"The indicators {missing_columns} are not in the country index.")
+
+        positions = self.positions(df[country_col])
+        for col in columns:
+            df[col] = self.values[col].take(positions)
+        return df
+
+
+def enrich_countries(df, columns=None, country_col='country', country_index=None):
+    """
+    Add the GDP indicators of every transaction country to df, in one pass (see `CountryIndex`).
+
+    - country_index : A `CountryIndex` to reuse between calls, built from the data files by default.
+    """
+    country_index = CountryIndex.from_files() if country_index is None else country_index
+    return country_index.enrich(df, columns=columns, country_col=country_col)
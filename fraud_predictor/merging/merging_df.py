@@ -1,11 +1,7 @@
 ## import needed packages
 import os
 import pandas as pd
-import lightgbm as lgb
-from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
-import matplotlib.pyplot as plt
-from scipy.stats import uniform
+from ..profiling.profiler import profiled
         
 ## Functions associated with GDP dataset ##
 def load_df2(file_name):
@@ -29,6 +25,7 @@ def rename_columns(df, column_mapping):
     return df
 
 
+@profiled
 def rename_values(df, column_mapping):
     """
     Apply a mapping to map values in specific columns of a DataFrame.
@@ -45,6 +42,7 @@ def rename_values(df, column_mapping):
     return df
 
 
+@profiled
 def add_column_by_merge(df, df_to_merge, merge_on, columns_to_merge, how='left'):
     """
     Add specific columns to the main DataFrame by merging it with another DataFrame.
@@ -58,14 +56,17 @@ def add_column_by_merge(df, df_to_merge, merge_on, columns_to_merge, how='left')
 
 
 ## Functions associated with GDP per capita datset ##
-def load_df3(file_name):
+def load_df3(file_name, **read_csv_kwargs):
     """
     Load a CSV file, specifying the path when calling the function.
+
+    - read_csv_kwargs : Extra arguments for pd.read_csv (e.g. sep=';', header=0 for the semicolon export
+      of the World Bank file), overriding the default header=2.
     """
     file_path = os.path.join(os.path.dirname(__file__), '../data/' + file_name)
     absolute_path = os.path.abspath(file_path) 
     
-    return pd.read_csv(absolute_path, header=2)
+    return pd.read_csv(absolute_path, **{'header': 2, **read_csv_kwargs})
 
 
 def gdp_capita_columns_keep(df):
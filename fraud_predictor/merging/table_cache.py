@@ -0,0 +1,218 @@
+## import needed packages
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ..preprocessors.preprocessing import _data_path, load_df_chunked
+from .merging_df import (
+    load_df2, load_df3, rename_columns, rename_values, add_column_by_merge, gdp_capita_columns_keep
+)
+from .country_enrichment import CountryIndex
+from ..profiling.profiler import profiled
+
+## Bump when the layout of the cache on disk changes, so old caches are not read back
+CACHE_FORMAT_VERSION = 1
+
+## Column holding the original row position, used to give back the rows in the order they were built
+ROW_COLUMN = '_row'
+
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/cache'))
+
+## Configuration of the load -> drop -> rename -> merge steps of the notebook
+DEFAULT_TABLE_CONFIG = {
+    'transactions_file': 'dropped_df.csv',
+    'chunksize': 500_000,
+    'gdp_file': 'gdp_country.csv',
+    'gdp_per_capita_file': 'gdp_per_capita.csv',
+    'gdp_per_capita_read_kwargs': {'sep': ';', 'header': 0},
+    'country_mapping': {'country': {'usa': 'united states', 'uk': 'united kingdom', 'russia': 'russian federation'}},
+    'partition_col': 'country',
+    # 'merge' runs rename_values + add_column_by_merge as the notebook does, 'lookup' the one-pass CountryIndex
+    'country_enrichment': 'merge'
+}
+
+
+def _file_digest(file_path, block_size=1 << 20):
+    """Hash the content of a file, reading it in blocks so large files are never fully loaded."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_merged_table(config=None):
+    """
+    Run the load, drop, rename and GDP merge steps of the notebook and return the merged df.
+    With config['country_enrichment'] = 'lookup', the rename and merges are replaced by one `CountryIndex` pass.
+
+    - config : A dictionary overriding the keys of `DEFAULT_TABLE_CONFIG`.
+    """
+    config = {**DEFAULT_TABLE_CONFIG, **(config or {})}
+    df = load_df_chunked(config['transactions_file'], chunksize=config['chunksize'])
+    return enrich_transactions(df, config)
+
+
+def _rename_through_categories(values, mapping):
+    """
+    Rename the values of a column once per distinct value (the categories of a categorical column) and
+    rebuild it with one take over the codes, instead of a replace over every row. The dtype is kept.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        renamed = pd.Index([mapping.get(value, value) for value in values.cat.categories])
+        categories = renamed.unique()
+        # The code -1 of the missing values takes the -1 appended at the end
+        codes = np.append(categories.get_indexer(renamed), -1).take(values.cat.codes.to_numpy())
+        return pd.Series(pd.Categorical.from_codes(codes, categories), index=values.index, name=values.name)
+    codes, uniques = pd.factorize(values)
+    renamed = np.array([mapping.get(value, value) for value in uniques] + [np.nan], dtype=object)
+    return pd.Series(renamed.take(codes), index=values.index, name=values.name)
+
+
+def build_country_index(config=None):
+    """
+    Build the `CountryIndex` of the GDP files of a table config, with the names of its country_mapping as
+    aliases (config overrides the keys of `DEFAULT_TABLE_CONFIG`).
+    """
+    config = {**DEFAULT_TABLE_CONFIG, **(config or {})}
+    return CountryIndex.from_files(
+        indicators={
+            'GDP': (config['gdp_file'], {}, '2023'),
+            'GDP_per_capita': (config['gdp_per_capita_file'], config['gdp_per_capita_read_kwargs'], '2023')
+        },
+        aliases=config['country_mapping'].get('country', {})
+    )
+
+
+def enrich_transactions(df, config=None):
+    """
+    Run the rename and GDP merge steps of the notebook on the loaded transactions (the single `CountryIndex`
+    pass with config['country_enrichment'] = 'lookup', which resolves the country_mapping names as aliases and
+    keeps the dtype of the country column; the merges give back an object column).
+
+    - config : A dictionary overriding the keys of `DEFAULT_TABLE_CONFIG`.
+    """
+    config = {**DEFAULT_TABLE_CONFIG, **(config or {})}
+    if config['country_enrichment'] == 'lookup':
+        df = build_country_index(config).enrich(df)
+        # The same country values as the merge mode, renamed once per category
+        df['country'] = _rename_through_categories(df['country'], config['country_mapping'].get('country', {}))
+        return df
+    if config['country_enrichment'] != 'merge':
+        raise ValueError(f"Unknown country_enrichment '{config['country_enrichment']}', expected 'merge' or 'lookup'.")
+
+    df2 = load_df2(config['gdp_file'])
+    df2 = rename_columns(df2, {'Country Name': 'country', '2023': 'GDP'})
+
+    df3 = load_df3(config['gdp_per_capita_file'], **config['gdp_per_capita_read_kwargs'])
+    df3 = gdp_capita_columns_keep(df3)
+    df3 = rename_columns(df3, {'Country Name': 'country', '2023': 'GDP_per_capita'})
+
+    df = rename_values(df, config['country_mapping'])
+    df = add_column_by_merge(df, df2, merge_on=['country'], columns_to_merge=['GDP'], how='left')
+    df = add_column_by_merge(df, df3, merge_on=['country'], columns_to_merge=['GDP_per_capita'], how='left')
+    return df
+
+
+def cache_key(config=None):
+    """
+    Compute the key of the cached table: a hash of the content of the source files plus the pipeline config.
+    Any change in the data files or in the config gives a new key, so a stale cache is never read.
+    """
+    config = {**DEFAULT_TABLE_CONFIG, **(config or {})}
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps({'version': CACHE_FORMAT_VERSION, 'config': config}, sort_keys=True).encode())
+    for key in ['transactions_file', 'gdp_file', 'gdp_per_capita_file']:
+        digest.update(_file_digest(_data_path(config[key])).encode())
+    return digest.hexdigest()
+
+
+def write_table_cache(df, path, partition_col=None):
+    """
+    Write a df as a partitioned Parquet dataset, together with the metadata needed to read it back as it was.
+
+    The dataset is first written to a temporary folder next to `path` and then moved in place,
+    so a reader never sees a half-written cache.
+    """
+    if partition_col is not None and partition_col not in df.columns:
+        raise ValueError(f"The partition column '{partition_col}' does not exist in the DataFrame.")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.append_column(ROW_COLUMN, pa.array(np.arange(len(df), dtype=np.int64)))
+    metadata = {
+        'columns': list(df.columns),
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+        'num_rows': len(df),
+        'partition_col': partition_col
+    }
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    try:
+        pq.write_to_dataset(table, tmp_path, partition_cols=[partition_col] if partition_col else None)
+        with open(os.path.join(tmp_path, '_metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return path
+
+
+def read_table_cache(path, columns=None, filters=None):
+    """
+    Read a cache written by `write_table_cache`, memory-mapping the Parquet files.
+
+    - columns : The columns to read; the other columns are never decoded.
+    - filters : Parquet filters (e.g. [('country', 'in', ['France', 'Japan'])]); partitions that don't
+      match are skipped entirely.
+    """
+    with open(os.path.join(path, '_metadata.json')) as f:
+        metadata = json.load(f)
+
+    if columns is None:
+        columns = metadata['columns']
+    missing_columns = [col for col in columns if col not in metadata['columns']]
+    if missing_columns:
+        raise ValueError(f"The columns {missing_columns} do not exist in the cached table.")
+
+    table = pq.read_table(path, columns=list(columns) + [ROW_COLUMN], filters=filters, memory_map=True)
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+
+    # Partitions are read one after the other, the stored row position gives back the original order
+    df = df.set_index(ROW_COLUMN).sort_index()
+    df.index.name = None
+    if len(df) == metadata['num_rows']:
+        df = df.reset_index(drop=True)
+
+    for col in columns:
+        if str(df[col].dtype) != metadata['dtypes'][col]:
+            df[col] = df[col].astype(metadata['dtypes'][col])
+    return df[list(columns)]
+
+
+@profiled
+def load_merged_table(config=None, cache_dir=DEFAULT_CACHE_DIR, columns=None, filters=None, refresh=False):
+    """
+    Return the cleaned, merged transaction table, building it only when there is no cache for the current
+    source files and config. A warm start skips the CSV parsing and merges, and only reads `columns`.
+
+    - config : A dictionary overriding the keys of `DEFAULT_TABLE_CONFIG`.
+    - refresh : Rebuild the table even if a cache exists.
+    """
+    config = {**DEFAULT_TABLE_CONFIG, **(config or {})}
+    path = os.path.join(cache_dir, cache_key(config))
+    if refresh or not os.path.exists(path):
+        df = build_merged_table(config)
+        write_table_cache(df, path, partition_col=config['partition_col'])
+        del df
+    return read_table_cache(path, columns=columns, filters=filters)
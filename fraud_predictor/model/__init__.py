@@ -1,27 +1,51 @@
 # fraud_predictor/model/__init__.py
 
-from .model_and_metrics import (
-    split_data,
-    convert_object_to_category,
-    tune_lightgbm,
-    train_optimized_lightgbm,
-    predict,
-    predict_proba,
-    calculate_accuracy,
-    calculate_roc_auc,
-    calculate_f1,
-    plot_feature_importance
-)
+# The names are imported from their module on first access (PEP 562), so `import fraud_predictor.model`
+# loads neither lightgbm, scikit-learn nor scipy: a scoring worker using `CompiledModel` only loads NumPy.
+import importlib
 
-__all__ = [
-    'split_data',
-    'convert_object_to_category',
-    'tune_lightgbm',
-    'train_optimized_lightgbm',
-    'predict',
-    'predict_proba',
-    'calculate_accuracy',
-    'calculate_roc_auc',
-    'calculate_f1',
-    'plot_feature_importance'
-]
+_EXPORTS = {
+    'split_data': 'model_and_metrics',
+    'convert_object_to_category': 'model_and_metrics',
+    'tune_lightgbm': 'model_and_metrics',
+    'tune_lightgbm_on_subsample': 'model_and_metrics',
+    'train_optimized_lightgbm': 'model_and_metrics',
+    'predict': 'model_and_metrics',
+    'predict_proba': 'model_and_metrics',
+    'calculate_accuracy': 'model_and_metrics',
+    'calculate_roc_auc': 'model_and_metrics',
+    'calculate_f1': 'model_and_metrics',
+    'plot_feature_importance': 'model_and_metrics',
+    'TransactionScorer': 'scoring',
+    'CompiledModel': 'compiled',
+    'export_compiled_model': 'compiled',
+    'ArtifactStore': 'artifacts',
+    'ModelBundle': 'artifacts',
+    'CategoryEncoder': 'encoding',
+    'encode_categories': 'encoding',
+    'IncrementalTrainer': 'retraining',
+    'continue_training': 'retraining',
+    'refit_leaves': 'retraining',
+    'compare_retraining': 'retraining',
+    'ThresholdSweep': 'evaluation',
+    'evaluate_model': 'evaluation',
+    'SuccessiveHalvingSearch': 'tuning',
+    'train_binned_lightgbm': 'tuning',
+    'BinnedDatasets': 'binned_dataset',
+    'StreamedFeatures': 'out_of_core',
+    'train_lightgbm_out_of_core': 'out_of_core'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,234 @@
+## import needed packages
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from .compiled import CompiledModel
+
+## Version of the bundle layout, written in every manifest
+BUNDLE_FORMAT = 1
+
+## Name of the file of the store holding the active version
+CURRENT_FILE = 'CURRENT'
+
+
+def _save_arrays(directory, state):
+    """Save a flat dictionary of arrays as one .npy file per array (no pickled objects)."""
+    os.makedirs(directory)
+    for key, values in state.items():
+        np.save(os.path.join(directory, key + '.npy'), np.asarray(values), allow_pickle=False)
+    return sorted(state)
+
+
+def _load_arrays(directory, keys, mmap=True):
+    """Load the arrays of `_save_arrays`, memory-mapped (read-only) when mmap is True."""
+    # np.asarray drops the memmap subclass (a view, no copy), so the arrays behave as plain ndarrays
+    return {key: np.asarray(np.load(os.path.join(directory, key + '.npy'), mmap_mode='r' if mmap else None,
+                                    allow_pickle=False))
+            for key in keys}
+
+
+def _schema(X_reference, booster):
+    """The columns of X_reference with their dtype, the categories of LightGBM for the category columns."""
+    categories = iter(booster.pandas_categorical or [])
+    schema = []
+    for col, dtype in X_reference.dtypes.items():
+        if dtype.name == 'category':
+            schema.append({'name': col, 'dtype': 'category', 'categories': np.asarray(next(categories)).tolist()})
+        else:
+            schema.append({'name': col, 'dtype': dtype.name})
+    return schema
+
+
+class ModelBundle:
+    """
+    A model loaded from an `ArtifactStore`: the manifest, the compiled model (its node arrays memory-mapped),
+    and the fitted feature statistics and category encoder when the bundle has them. The LightGBM booster is
+    only parsed on first access, so a worker scoring with the compiled model never imports LightGBM.
+
+    - version : The version of the bundle in its store.
+    - manifest : The content of manifest.json (schema, files, metadata...).
+    """
+
+    def __init__(self, directory, manifest, mmap=True):
+        self.directory = directory
+        self.manifest = manifest
+        self.version = manifest['version']
+        self.feature_names = [column['name'] for column in manifest['schema']]
+        self.category_maps = {column['name']: column['categories'] for column in manifest['schema']
+                              if column['dtype'] == 'category'}
+        compiled = manifest['compiled']
+        self.compiled = CompiledModel(
+            compiled['feature_names'],
+            {col: {value: code for code, value in enumerate(categories)}
+             for col, categories in compiled['category_maps'].items()},
+            compiled['dtype'], compiled['sigmoid'],
+            _load_arrays(os.path.join(directory, 'compiled'), CompiledModel.ARRAYS, mmap)
+        )
+        self.feature_state = None
+        if manifest['feature_state'] is not None:
+            from ..features.feature_state import FeatureState
+            self.feature_state = FeatureState.from_state(
+                _load_arrays(os.path.join(directory, 'feature_state'), manifest['feature_state'], mmap))
+        self.encoder = None
+        if manifest['encoder'] is not None:
+            from .encoding import CategoryEncoder
+            self.encoder = CategoryEncoder.from_state(
+                _load_arrays(os.path.join(directory, 'encoder'), manifest['encoder'], mmap))
+        self._booster = None
+
+    @property
+    def booster(self):
+        """The LightGBM Booster of the bundle, parsed from booster.txt on first access."""
+        if self._booster is None:
+            import lightgbm as lgb
+            self._booster = lgb.Booster(model_file=os.path.join(self.directory, 'booster.txt'))
+        return self._booster
+
+    def reference_frame(self):
+        """An empty DataFrame with the training schema (column order, dtypes and categories)."""
+        import pandas as pd
+        return pd.DataFrame({
+            column['name']: pd.Series(dtype=pd.CategoricalDtype(column['categories']) if column['dtype'] == 'category'
+                                      else column['dtype'])
+            for column in self.manifest['schema']
+        })
+
+    def scorer(self, kind='booster', num_threads=1):
+        """
+        Return an object with a `predict_proba(rows)` method for this model:
+            'booster' : a `TransactionScorer` around the LightGBM booster (the lowest latency per call);
+            'compiled' : the `CompiledModel`, for workers without LightGBM (the fastest to load).
+        """
+        if kind == 'compiled':
+            return self.compiled
+        if kind == 'booster':
+            from .scoring import TransactionScorer
+            return TransactionScorer(self.booster, self.reference_frame(), num_threads=num_threads)
+        raise ValueError(f"Unknown scorer kind '{kind}', expected 'compiled' or 'booster'.")
+
+
+class ArtifactStore:
+    """
+    A directory of versioned model bundles, one immutable subdirectory per version (v000001, v000002...):
+
+        manifest.json   the format, the version, the creation time, the training schema with the categories
+                        of every category column, the files of the bundle and free metadata
+        booster.txt     the LightGBM model in its text format
+        compiled/       the arrays of the `CompiledModel`, one .npy file each
+        feature_state/  the arrays of the fitted `FeatureState` (when given)
+        encoder/        the arrays of the fitted `CategoryEncoder` (when given)
+
+    Every file is written in a temporary directory renamed to its version at the end, and the active
+    version is a CURRENT file replaced atomically, so a reader never sees a partial bundle. The arrays are
+    plain .npy files, loaded memory-mapped: loading a bundle only reads its manifest and maps the arrays.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def versions(self):
+        """Return the saved versions, oldest first."""
+        return sorted(name for name in os.listdir(self.root)
+                      if name.startswith('v') and os.path.isfile(os.path.join(self.root, name, 'manifest.json')))
+
+    def current_version(self):
+        """Return the active version (None when no version was activated yet)."""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def activate(self, version):
+        """Make version the active one (an atomic replace of the CURRENT file)."""
+        if version not in self.versions():
+            raise ValueError(f"Unknown version '{version}' in {self.root}.")
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.current-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_FILE))
+        return version
+
+    def save(self, model, X_reference, feature_state=None, encoder=None, metadata=None, activate=True):
+        """
+        Save a trained model (an LGBMClassifier from `train_optimized_lightgbm`, or its Booster) as a new
+        version and return the version.
+
+        - X_reference : A frame with the training schema (as for `TransactionScorer`).
+        - feature_state : A fitted `FeatureState`, to build the features of the scored transactions.
+        - encoder : A fitted `CategoryEncoder`, to encode their category columns.
+        - metadata : A JSON-serializable dictionary stored in the manifest (metrics, parameters, data range...).
+        - activate : Make the new version the active one.
+        """
+        booster = getattr(model, 'booster_', model)
+        if booster.feature_name() != list(X_reference.columns):
+            raise ValueError("The columns of X_reference do not match the features of the model.")
+        compiled = CompiledModel.from_model(booster, X_reference)
+
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix='.bundle-')
+        try:
+            booster.save_model(os.path.join(tmp_dir, 'booster.txt'))
+            _save_arrays(os.path.join(tmp_dir, 'compiled'), {name: getattr(compiled, name)
+                                                            for name in CompiledModel.ARRAYS})
+            manifest = {
+                'format': BUNDLE_FORMAT,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'schema': _schema(X_reference, booster),
+                'compiled': {
+                    'feature_names': compiled.feature_names,
+                    'category_maps': {col: list(category_map) for col, category_map in compiled.category_maps.items()},
+                    'dtype': compiled.dtype.name,
+                    'sigmoid': compiled.sigmoid
+                },
+                'feature_state': None if feature_state is None else _save_arrays(
+                    os.path.join(tmp_dir, 'feature_state'), feature_state.get_state()),
+                'encoder': None if encoder is None else _save_arrays(
+                    os.path.join(tmp_dir, 'encoder'), encoder.get_state()),
+                'metadata': metadata or {}
+            }
+            version = self._publish(tmp_dir, manifest)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(version)
+        return version
+
+    def _publish(self, tmp_dir, manifest):
+        """Rename the bundle to the next free version (retrying when another writer took it)."""
+        while True:
+            versions = self.versions()
+            version = f'v{int(versions[-1][1:]) + 1 if versions else 1:06d}'
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+                json.dump({**manifest, 'version': version}, f, indent=1)
+            try:
+                os.rename(tmp_dir, os.path.join(self.root, version))
+                return version
+            except OSError:
+                if not os.path.isdir(os.path.join(self.root, version)):
+                    raise
+
+    def load(self, version=None, mmap=True):
+        """Load a version (the active one by default) as a `ModelBundle`, its arrays memory-mapped when mmap."""
+        version = version or self.current_version()
+        if version is None:
+            raise ValueError(f"No active version in {self.root}, save or activate one first.")
+        directory = os.path.join(self.root, version)
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest['format'] != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported bundle format {manifest['format']} in {directory}.")
+        return ModelBundle(directory, manifest, mmap=mmap)
+
+    def prune(self, keep=3):
+        """Delete the oldest versions, keeping the `keep` latest ones and the active one. Returns the deleted ones."""
+        current = self.current_version()
+        versions = self.versions()
+        deleted = [version for version in versions[:max(len(versions) - keep, 0)] if version != current]
+        for version in deleted:
+            shutil.rmtree(os.path.join(self.root, version))
+        return deleted
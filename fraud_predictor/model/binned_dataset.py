@@ -0,0 +1,83 @@
+## import needed packages
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+
+## Bump when the layout of the cached binary datasets changes, so old files are not read back
+CACHE_FORMAT_VERSION = 1
+
+
+def frame_digest(X, y):
+    """Hash the content of the training data, so a cached binned dataset is only reused for the same rows."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps({'version': CACHE_FORMAT_VERSION, 'columns': [str(col) for col in X.columns],
+                              'dtypes': [str(dtype) for dtype in X.dtypes]}).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(np.asarray(y, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class BinnedDatasets:
+    """
+    Build the binned LightGBM Dataset of the training data once per `max_bin` value and share it between
+    every CV fold, candidate and final fit.
+
+    LightGBM spends a large fixed cost turning raw columns into histogram bins. Here the full (X, y) is
+    binned once for each `max_bin`, and the folds are taken with `Dataset.subset`, which reuses the bins of
+    the parent instead of binning the rows again.
+
+    - cache_dir : Optional folder where every binned dataset is saved with `save_binary` (under a hash of
+      the data and `max_bin`) and reloaded by later runs instead of being rebuilt.
+    """
+
+    def __init__(self, X, y, cache_dir=None):
+        self.X = X
+        self.y = y
+        self.cache_dir = cache_dir
+        self._datasets = {}
+        self._digest = None
+
+    def _cache_path(self, max_bin):
+        if self._digest is None:
+            self._digest = frame_digest(self.X, self.y)
+        return os.path.join(self.cache_dir, f"lgb_{self._digest}_max_bin_{max_bin}.bin")
+
+    def _build(self, max_bin):
+        params = {'max_bin': max_bin, 'verbosity': -1}
+        path = self._cache_path(max_bin) if self.cache_dir else None
+        if path and os.path.exists(path):
+            dataset = lgb.Dataset(path, params=params).construct()
+            # The binary file holds the bins but not the categories of the pandas category columns
+            with open(path + '.categories.json') as f:
+                dataset.pandas_categorical = json.load(f)
+            return dataset
+
+        dataset = lgb.Dataset(self.X, self.y, params=params).construct()
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            dataset.save_binary(path)
+            with open(path + '.categories.json', 'w') as f:
+                json.dump(dataset.pandas_categorical, f)
+        return dataset
+
+    def get(self, max_bin=255):
+        """Return the binned dataset of all the rows for `max_bin`, building (or loading) it on first use."""
+        if max_bin not in self._datasets:
+            self._datasets[max_bin] = self._build(max_bin)
+        return self._datasets[max_bin]
+
+    def subset(self, indices, max_bin=255):
+        """Return the rows at the (sorted) positions `indices` as a Dataset sharing the bins of `get(max_bin)`."""
+        return self.get(max_bin).subset(np.asarray(indices))
+
+    def train(self, params, num_boost_round=100, indices=None, **kwargs):
+        """
+        Train a booster on the binned data (all rows, or the positions `indices`). `params` are `lgb.train`
+        parameters, e.g. from `lightgbm_train_params`; extra keyword arguments go to `lgb.train`.
+        """
+        max_bin = params.get('max_bin', 255)
+        train_set = self.get(max_bin) if indices is None else self.subset(indices, max_bin)
+        return lgb.train(params, train_set, num_boost_round=num_boost_round, **kwargs)
@@ -0,0 +1,233 @@
+## import needed packages
+import json
+import numpy as np
+from ..profiling.profiler import profiled
+
+## Missing value handling of a numerical split, as in the LightGBM model dump
+MISSING_TYPES = {'None': 0, 'Zero': 1, 'NaN': 2}
+
+## Values LightGBM treats as zero for missing_type 'Zero'
+ZERO_THRESHOLD = 1e-35
+
+
+class CompiledModel:
+    """
+    A trained LightGBM binary classifier compiled into flat NumPy arrays, scored by a vectorized NumPy
+    evaluator: scoring needs neither LightGBM, scikit-learn nor pandas, and the model is a few arrays.
+
+    All the trees share one node table: `split_feature`, `threshold`, `left_child`, `right_child`,
+    `default_left`, `missing_type` and `is_categorical`, with a child < 0 pointing to the leaf ~child of
+    `leaf_value`. `roots` holds the root of every tree (~leaf for a tree reduced to one leaf). The categories
+    sent to the left by a categorical split are stored as sorted `category_keys` (node << 32 | code).
+    The decisions follow LightGBM (missing values, the zero threshold, negative or NaN categories going
+    right), and the rows are cast to the input dtype LightGBM uses for the training schema, so the
+    probabilities match `predict_proba`.
+
+    `category_maps` gives the code of every category of the categorical features, so raw rows can be
+    encoded the same way as by `TransactionScorer`.
+    """
+
+    ARRAYS = ['roots', 'split_feature', 'threshold', 'left_child', 'right_child', 'default_left', 'missing_type',
+              'is_categorical', 'category_keys', 'leaf_value']
+
+    def __init__(self, feature_names, category_maps, dtype, sigmoid, arrays):
+        self.feature_names = list(feature_names)
+        self.category_maps = category_maps
+        self.dtype = np.dtype(dtype)
+        self.sigmoid = sigmoid
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self._encoders = [(i, col, self.category_maps.get(col)) for i, col in enumerate(self.feature_names)]
+
+    @classmethod
+    def from_model(cls, model, X_reference):
+        """
+        Compile a trained model (an LGBMClassifier from `train_optimized_lightgbm`, or its Booster).
+
+        - X_reference : A frame with the training schema (as for `TransactionScorer`), giving the
+          categorical columns and the input dtype.
+        """
+        from .scoring import lightgbm_input_dtype
+
+        booster = getattr(model, 'booster_', model)
+        dump = booster.dump_model()
+        objective = dump['objective'].split()
+        if objective[0] != 'binary' or dump['num_tree_per_iteration'] != 1 or dump['average_output']:
+            raise ValueError(f"Only binary boosting models can be compiled, not '{dump['objective']}'.")
+        feature_names = dump['feature_names']
+        if feature_names != list(X_reference.columns):
+            raise ValueError("The columns of X_reference do not match the features of the model.")
+        sigmoid = float(objective[1].split(':')[1]) if len(objective) > 1 else 1.0
+
+        category_columns = [col for col in feature_names if X_reference[col].dtype.name == 'category']
+        category_maps = {
+            col: {value: code for code, value in enumerate(categories)}
+            for col, categories in zip(category_columns, dump.get('pandas_categorical') or [])
+        }
+
+        nodes = {name: [] for name in ['split_feature', 'threshold', 'left_child', 'right_child', 'default_left',
+                                       'missing_type', 'is_categorical']}
+        category_keys, leaf_values = [], []
+
+        def add(tree):
+            if 'leaf_value' in tree:
+                leaf_values.append(tree['leaf_value'])
+                return ~(len(leaf_values) - 1)
+            node = len(nodes['split_feature'])
+            is_categorical = tree['decision_type'] == '=='
+            nodes['split_feature'].append(tree['split_feature'])
+            nodes['threshold'].append(0.0 if is_categorical else tree['threshold'])
+            nodes['default_left'].append(tree['default_left'])
+            nodes['missing_type'].append(MISSING_TYPES[tree['missing_type']])
+            nodes['is_categorical'].append(is_categorical)
+            if is_categorical:
+                category_keys.extend((node << 32) | int(code) for code in str(tree['threshold']).split('||'))
+            nodes['left_child'].append(0)
+            nodes['right_child'].append(0)
+            nodes['left_child'][node] = add(tree['left_child'])
+            nodes['right_child'][node] = add(tree['right_child'])
+            return node
+
+        roots = [add(tree['tree_structure']) for tree in dump['tree_info']]
+        arrays = {
+            'roots': np.array(roots, dtype=np.int32),
+            'split_feature': np.array(nodes['split_feature'], dtype=np.int32),
+            'threshold': np.array(nodes['threshold'], dtype=np.float64),
+            'left_child': np.array(nodes['left_child'], dtype=np.int32),
+            'right_child': np.array(nodes['right_child'], dtype=np.int32),
+            'default_left': np.array(nodes['default_left'], dtype=bool),
+            'missing_type': np.array(nodes['missing_type'], dtype=np.int8),
+            'is_categorical': np.array(nodes['is_categorical'], dtype=bool),
+            'category_keys': np.sort(np.array(category_keys, dtype=np.int64)),
+            'leaf_value': np.array(leaf_values, dtype=np.float64)
+        }
+        return cls(feature_names, category_maps, lightgbm_input_dtype(X_reference), sigmoid, arrays)
+
+    def save(self, path):
+        """Save the model as an uncompressed .npz file (the arrays plus a JSON header), loadable with NumPy only."""
+        header = {
+            'feature_names': self.feature_names,
+            'category_maps': {col: list(category_map) for col, category_map in self.category_maps.items()},
+            'dtype': self.dtype.name,
+            'sigmoid': self.sigmoid
+        }
+        with open(path, 'wb') as f:
+            np.savez(f, header=np.array(json.dumps(header)), **{name: getattr(self, name) for name in self.ARRAYS})
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data['header']))
+            arrays = {name: data[name] for name in cls.ARRAYS}
+        category_maps = {
+            col: {value: code for code, value in enumerate(categories)}
+            for col, categories in header['category_maps'].items()
+        }
+        return cls(header['feature_names'], category_maps, header['dtype'], header['sigmoid'], arrays)
+
+    def _encode_value(self, value, category_map):
+        if category_map is not None:
+            return category_map.get(value, np.nan)
+        if value is None:
+            return np.nan
+        return float(value)
+
+    def _encode_column(self, values, category_map):
+        if category_map is None:
+            return np.asarray(values, dtype=self.dtype)
+        if hasattr(values, 'cat'):
+            # A categorical Series: translate its (few) categories, then take through its codes
+            codes = np.array([category_map.get(value, np.nan) for value in values.cat.categories] + [np.nan])
+            return codes[values.cat.codes.to_numpy()]
+        return np.array([self._encode_value(value, category_map) for value in values], dtype=self.dtype)
+
+    def encode(self, rows):
+        """
+        Encode transactions into the float matrix of the model.
+
+        - rows : A DataFrame with the training schema, a dict (one transaction), a list of dicts, or a NumPy
+          row/batch in the feature order. Numeric NumPy arrays are taken as already encoded; object arrays
+          hold raw (string) categories.
+        """
+        if hasattr(rows, 'columns'):
+            X = np.empty((len(rows[self.feature_names[0]]), len(self.feature_names)), dtype=self.dtype)
+            for i, col, category_map in self._encoders:
+                X[:, i] = self._encode_column(rows[col], category_map)
+            return X
+        if isinstance(rows, dict):
+            rows = [rows]
+        if isinstance(rows, (list, tuple)) and rows and isinstance(rows[0], dict):
+            X = np.empty((len(rows), len(self.feature_names)), dtype=self.dtype)
+            for r, row in enumerate(rows):
+                for i, col, category_map in self._encoders:
+                    X[r, i] = self._encode_value(row.get(col), category_map)
+            return X
+
+        rows = np.asarray(rows)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        if rows.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} features, got {rows.shape[1]}.")
+        if rows.dtype != object:
+            return rows.astype(self.dtype, copy=False)
+        X = np.empty(rows.shape, dtype=self.dtype)
+        for i, col, category_map in self._encoders:
+            X[:, i] = [self._encode_value(value, category_map) for value in rows[:, i]]
+        return X
+
+    def _go_left(self, nodes, x):
+        """Decision of every (node, feature value) pair, as in LightGBM's NumericalDecision / CategoricalDecision."""
+        missing_type = self.missing_type[nodes]
+        is_nan = np.isnan(x)
+        x_or_zero = np.where(is_nan & (missing_type != MISSING_TYPES['NaN']), 0.0, x)
+        is_missing = (((missing_type == MISSING_TYPES['Zero']) & (np.abs(x_or_zero) <= ZERO_THRESHOLD))
+                      | ((missing_type == MISSING_TYPES['NaN']) & is_nan))
+        go_left = np.where(is_missing, self.default_left[nodes], x_or_zero <= self.threshold[nodes])
+
+        categorical = np.flatnonzero(self.is_categorical[nodes])
+        if categorical.size:
+            values = x[categorical]
+            valid = ~np.isnan(values) & (values >= 0)
+            keys = (nodes[categorical].astype(np.int64) << 32) | np.where(valid, values, 0).astype(np.int64)
+            found = np.searchsorted(self.category_keys, keys)
+            found = np.minimum(found, len(self.category_keys) - 1)
+            go_left[categorical] = valid & (self.category_keys[found] == keys)
+        return go_left
+
+    def _raw_scores(self, X):
+        n_rows, n_trees = len(X), len(self.roots)
+        nodes = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows), n_trees)
+        # Every (row, tree) pair walks down one level per iteration, until all of them reach a leaf
+        active = np.flatnonzero(nodes >= 0)
+        while active.size:
+            current = nodes[active]
+            go_left = self._go_left(current, X[rows[active], self.split_feature[current]])
+            nodes[active] = np.where(go_left, self.left_child[current], self.right_child[current])
+            active = active[nodes[active] >= 0]
+        return self.leaf_value[~nodes].reshape(n_rows, n_trees).sum(axis=1)
+
+    def predict_raw(self, rows, batch_size=4096):
+        """Return the raw score (log-odds) of every transaction of `rows` (see `encode`)."""
+        X = self.encode(rows).astype(np.float64)
+        scores = np.empty(len(X))
+        for start in range(0, len(X), batch_size):
+            scores[start:start + batch_size] = self._raw_scores(X[start:start + batch_size])
+        return scores
+
+    @profiled
+    def predict_proba(self, rows, batch_size=4096):
+        """Return the fraud probability of every transaction of `rows` (see `encode`)."""
+        return 1 / (1 + np.exp(-self.sigmoid * self.predict_raw(rows, batch_size)))
+
+
+def export_compiled_model(model, X_reference, path=None):
+    """
+    Compile a model from `train_optimized_lightgbm` into a `CompiledModel` (see `CompiledModel.from_model`),
+    saved to path when given. Scoring workers then only need NumPy: `CompiledModel.load(path).predict_proba(rows)`.
+    """
+    compiled = CompiledModel.from_model(model, X_reference)
+    if path is not None:
+        compiled.save(path)
+    return compiled
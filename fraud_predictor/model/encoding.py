@@ -0,0 +1,181 @@
+## import needed packages
+import json
+import numpy as np
+import pandas as pd
+from ..features.feature_state import _to_key_array
+from ..profiling.profiler import profiled
+
+## Encodings of the high-cardinality columns
+HIGH_CARDINALITY_ENCODINGS = ['hash', 'frequency', 'target']
+
+
+def hash_buckets(values, n_buckets):
+    """
+    Return the bucket (0 to n_buckets - 1) of every value, -1 for missing values. The hash only depends on
+    the value, so a key falls in the same bucket in training and at inference, whatever the process.
+    Categorical values are hashed through their categories, so only the distinct values are hashed.
+    """
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        buckets = hash_buckets(values.cat.categories.to_numpy(), n_buckets)
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, buckets[np.maximum(codes, 0)], -1)
+    missing = values.isna().to_numpy()
+    hashed = pd.util.hash_array(values.to_numpy(dtype=object)) % np.uint64(n_buckets)
+    return np.where(missing, -1, hashed.astype(np.int64))
+
+
+class CategoryEncoder:
+    """
+    Encode the object and categorical columns for LightGBM under a cardinality threshold.
+
+    - A column with at most `max_categories` distinct values becomes a pandas Categorical with the
+      categories learned in `fit`, shared by the training data, the test data and inference (unseen values
+      become NaN), so every frame gets the same codes.
+    - A column with more values (customer_id...) is hashed into `n_buckets` buckets, so its memory is fixed
+      whatever the number of keys, and encoded as `high_cardinality`:
+        'hash' : the bucket, as a Categorical with the categories 0 to n_buckets - 1;
+        'frequency' : the share of the training rows in the bucket;
+        'target' : the smoothed fraud rate of the bucket, (sum(y) + smoothing * prior) / (count + smoothing).
+          `fit_transform` encodes the training rows out of fold (each fold with the statistics of the
+          other folds), so a row never sees its own label.
+    Missing values stay missing.
+
+    The fitted tables are NumPy arrays, saved without pickling by `save`.
+    """
+
+    def __init__(self, max_categories=100, high_cardinality='hash', n_buckets=1024, n_folds=5, smoothing=20.0,
+                 random_state=1, columns=None):
+        if high_cardinality not in HIGH_CARDINALITY_ENCODINGS:
+            raise ValueError(f"Unknown high_cardinality '{high_cardinality}', expected one of "
+                             f"{HIGH_CARDINALITY_ENCODINGS}.")
+        self.max_categories = max_categories
+        self.high_cardinality = high_cardinality
+        self.n_buckets = n_buckets
+        self.n_folds = n_folds
+        self.smoothing = smoothing
+        self.random_state = random_state
+        self.columns = columns
+        self.categories_ = None
+        self.tables_ = None
+
+    def _params(self):
+        return {key: getattr(self, key) for key in ['max_categories', 'high_cardinality', 'n_buckets', 'n_folds',
+                                                    'smoothing', 'random_state', 'columns']}
+
+    def _check_is_fitted(self):
+        if self.categories_ is None:
+            raise ValueError("The encoder is not fitted yet, call fit first.")
+
+    def _bucket_table(self, buckets, y):
+        """Encoding of every bucket, from the training rows of these buckets."""
+        valid = buckets >= 0
+        counts = np.bincount(buckets[valid], minlength=self.n_buckets).astype(np.float64)
+        if self.high_cardinality == 'frequency':
+            return counts / len(buckets)
+        positives = np.bincount(buckets[valid], weights=y[valid], minlength=self.n_buckets)
+        prior = y.mean()
+        return (positives + self.smoothing * prior) / (counts + self.smoothing)
+
+    @profiled
+    def fit(self, X, y=None):
+        """Learn the categories of the low-cardinality columns and the tables of the high-cardinality ones."""
+        if self.high_cardinality == 'target' and y is None:
+            raise ValueError("y is needed for the 'target' encoding.")
+        y = None if y is None else np.asarray(y, dtype=np.float64)
+        columns = self.columns or list(X.select_dtypes(include=['object', 'category']).columns)
+        self.categories_, self.tables_ = {}, {}
+        for col in columns:
+            values = X[col]
+            if values.nunique() <= self.max_categories:
+                self.categories_[col] = np.sort(_to_key_array(values.dropna().unique()))
+            elif self.high_cardinality == 'hash':
+                self.tables_[col] = None
+            else:
+                self.tables_[col] = self._bucket_table(hash_buckets(values, self.n_buckets), y)
+        return self
+
+    def _encode_buckets(self, buckets, table):
+        if table is None:
+            return pd.Categorical.from_codes(buckets, categories=np.arange(self.n_buckets))
+        return np.where(buckets >= 0, table[np.maximum(buckets, 0)], np.nan)
+
+    def _set_categories(self, X):
+        for col, categories in self.categories_.items():
+            values = X[col].astype(object) if isinstance(X[col].dtype, pd.CategoricalDtype) else X[col]
+            X[col] = pd.Categorical(values, categories=categories)
+
+    def transform(self, X):
+        """Encode the columns of X (in place, as `convert_object_to_category`) and return it."""
+        self._check_is_fitted()
+        self._set_categories(X)
+        for col, table in self.tables_.items():
+            X[col] = self._encode_buckets(hash_buckets(X[col], self.n_buckets), table)
+        return X
+
+    def fit_transform(self, X, y=None):
+        """Fit on the training data and encode it, the target encoding out of fold."""
+        self.fit(X, y)
+        if self.high_cardinality != 'target' or not self.tables_:
+            return self.transform(X)
+
+        y = np.asarray(y, dtype=np.float64)
+        folds = np.random.default_rng(self.random_state).permutation(len(X)) % self.n_folds
+        encoded = {}
+        for col in self.tables_:
+            buckets = hash_buckets(X[col], self.n_buckets)
+            values = np.full(len(X), np.nan)
+            for fold in range(self.n_folds):
+                in_fold = folds == fold
+                table = self._bucket_table(buckets[~in_fold], y[~in_fold])
+                values[in_fold] = self._encode_buckets(buckets[in_fold], table)
+            encoded[col] = values
+        self._set_categories(X)
+        for col, values in encoded.items():
+            X[col] = values
+        return X
+
+    def get_state(self):
+        """Return the parameters and every fitted table as a flat dictionary of numpy arrays."""
+        self._check_is_fitted()
+        state = {'params': np.array(json.dumps(self._params())),
+                 'hashed': np.array(json.dumps(list(self.tables_)))}
+        for col, categories in self.categories_.items():
+            state['categories.' + col] = categories
+        for col, table in self.tables_.items():
+            if table is not None:
+                state['table.' + col] = table
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a fitted encoder from the dictionary of `get_state`."""
+        encoder = cls(**json.loads(str(state['params'])))
+        encoder.categories_ = {key[len('categories.'):]: np.asarray(values)
+                               for key, values in state.items() if key.startswith('categories.')}
+        encoder.tables_ = {col: np.asarray(state['table.' + col]) if 'table.' + col in state else None
+                           for col in json.loads(str(state['hashed']))}
+        return encoder
+
+    def save(self, path):
+        """Save the fitted encoder as an uncompressed .npz file (no pickled objects)."""
+        with open(path, 'wb') as f:
+            np.savez(f, **self.get_state())
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load an encoder saved with `save`."""
+        with np.load(path, allow_pickle=False) as state:
+            return cls.from_state({key: state[key] for key in state.files})
+
+
+def encode_categories(X_train, X_test, y_train=None, **encoder_kwargs):
+    """
+    Encode X_train and X_test with a `CategoryEncoder` fitted on the training data (see its parameters),
+    the drop-in replacement of `convert_object_to_category` for data with high-cardinality identifiers.
+    Returns X_train, X_test and the encoder, to apply to the transactions scored later.
+    """
+    encoder = CategoryEncoder(**encoder_kwargs)
+    X_train = encoder.fit_transform(X_train, y_train)
+    return X_train, encoder.transform(X_test), encoder
@@ -0,0 +1,159 @@
+## import needed packages
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from ..profiling.profiler import profiled
+
+## Metrics computed at every threshold
+THRESHOLD_METRICS = ['precision', 'recall', 'f1', 'accuracy', 'fpr', 'loss']
+
+
+def _divide(numerator, denominator):
+    """numerator / denominator, 0 where the denominator is 0."""
+    numerator, denominator = np.broadcast_arrays(np.asarray(numerator, dtype=np.float64), denominator)
+    return np.divide(numerator, denominator, out=np.zeros(numerator.shape), where=denominator != 0)
+
+
+class ThresholdSweep:
+    """
+    Evaluate a vector of fraud probabilities at every threshold from one sort: the rows are sorted by
+    decreasing probability once, and the counts at all the thresholds are cumulative sums over that order.
+    A row is flagged as fraud at threshold t when its probability is >= t.
+
+    - y_true : The true labels (1 for fraud).
+    - y_proba : The predicted fraud probabilities (one `predict_proba` call).
+    - amount : Loss of every transaction when it is a fraud and is not flagged (e.g. its amount);
+      by default every missed fraud costs 1.
+    - false_positive_cost : Cost of flagging a legitimate transaction (e.g. the cost of a review).
+    - sample_weight : Weight of every row.
+
+    `roc_auc` and `pr_auc` (average precision) match scikit-learn's roc_auc_score and
+    average_precision_score; `curve()` gives the precision, recall, F1 (of the fraud class), accuracy,
+    false positive rate and fraud loss at every threshold, `at(threshold)` one row of it.
+    """
+
+    def __init__(self, y_true, y_proba, amount=None, false_positive_cost=0.0, sample_weight=None):
+        y_proba = np.asarray(y_proba, dtype=np.float64)
+        if len(y_true) != len(y_proba):
+            raise ValueError(f"y_true has {len(y_true)} rows and y_proba {len(y_proba)}.")
+        self.false_positive_cost = false_positive_cost
+        order = np.argsort(-y_proba)
+        self._proba = y_proba[order]
+        self._y = np.asarray(y_true).astype(bool)[order]
+        self._amount = None if amount is None else np.asarray(amount, dtype=np.float64)[order]
+        self._weight = None if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)[order]
+        # Last row of every distinct probability: the rows flagged at each threshold end there
+        self._ends = np.r_[np.flatnonzero(self._proba[1:] != self._proba[:-1]), len(self._proba) - 1]
+        self.thresholds = np.r_[np.inf, self._proba[self._ends]]
+        self._counts = self._cumulate(self._weight)
+        self._metrics = self._compute_metrics(self._counts)
+
+    def _cumulate(self, weight):
+        """True and false positives, and the loss caught, at every threshold (the first flags nothing)."""
+        positive = self._y if weight is None else np.where(self._y, weight, 0.0)
+        negative = ~self._y if weight is None else np.where(self._y, 0.0, weight)
+        amount = self._amount if self._amount is not None else 1.0
+        caught = np.cumsum(positive * amount)[self._ends]
+        counts = {
+            'tp': np.r_[0.0, np.cumsum(positive)[self._ends]],
+            'fp': np.r_[0.0, np.cumsum(negative)[self._ends]],
+            'caught_loss': np.r_[0.0, caught]
+        }
+        return counts
+
+    def _compute_metrics(self, counts):
+        tp, fp = counts['tp'], counts['fp']
+        positives, negatives = tp[-1], fp[-1]
+        fn, tn = positives - tp, negatives - fp
+        metrics = {
+            'precision': _divide(tp, tp + fp),
+            'recall': _divide(tp, positives),
+            'f1': _divide(2 * tp, 2 * tp + fp + fn),
+            'accuracy': _divide(tp + tn, positives + negatives),
+            'fpr': _divide(fp, negatives),
+            'loss': counts['caught_loss'][-1] - counts['caught_loss'] + self.false_positive_cost * fp
+        }
+        if positives > 0 and negatives > 0:
+            metrics['roc_auc'] = float(np.trapz(metrics['recall'], metrics['fpr']))
+            metrics['pr_auc'] = float(np.sum(np.diff(metrics['recall']) * metrics['precision'][1:]))
+        else:
+            metrics['roc_auc'] = metrics['pr_auc'] = np.nan
+        return metrics
+
+    @property
+    def roc_auc(self):
+        return self._metrics['roc_auc']
+
+    @property
+    def pr_auc(self):
+        return self._metrics['pr_auc']
+
+    def _index(self, threshold):
+        """Position in `thresholds` of the rows flagged at threshold."""
+        return int(np.searchsorted(-self.thresholds, -threshold, side='right')) - 1
+
+    def curve(self):
+        """Return the counts and metrics at every threshold as a DataFrame (from the highest threshold)."""
+        curve = pd.DataFrame({'threshold': self.thresholds, 'tp': self._counts['tp'], 'fp': self._counts['fp']})
+        for metric in THRESHOLD_METRICS:
+            curve[metric] = self._metrics[metric]
+        return curve
+
+    def at(self, threshold=0.5):
+        """Return the metrics when the rows with a probability >= threshold are flagged."""
+        index = self._index(threshold)
+        return {'threshold': threshold, **{metric: float(self._metrics[metric][index]) for metric in THRESHOLD_METRICS}}
+
+    def best_threshold(self, metric='f1'):
+        """Return the threshold with the highest metric (the lowest for 'loss')."""
+        values = self._metrics[metric]
+        index = np.argmin(values) if metric == 'loss' else np.argmax(values)
+        return float(self.thresholds[index])
+
+    def summary(self, threshold=0.5):
+        """Return ROC AUC, PR AUC and the metrics at threshold."""
+        return {'roc_auc': self.roc_auc, 'pr_auc': self.pr_auc, **self.at(threshold)}
+
+    def _replicate(self, seed, threshold):
+        """Metrics of one bootstrap sample, drawn as a count of every row so the sorted order is reused."""
+        rng = np.random.default_rng(seed)
+        n_rows = len(self._y)
+        weight = np.bincount(rng.integers(0, n_rows, n_rows), minlength=n_rows).astype(np.float64)
+        if self._weight is not None:
+            weight *= self._weight
+        metrics = self._compute_metrics(self._cumulate(weight))
+        index = self._index(threshold)
+        return [metrics['roc_auc'], metrics['pr_auc']] + [metrics[metric][index] for metric in THRESHOLD_METRICS]
+
+    @profiled
+    def bootstrap(self, n_bootstrap=200, threshold=0.5, confidence=0.95, n_jobs=None, random_state=1):
+        """
+        Return the bootstrap confidence intervals of ROC AUC, PR AUC and the metrics at threshold, as a
+        DataFrame with the estimate and the lower and upper bounds of every metric.
+
+        Every replicate resamples the rows as weights over the sorted order, so none of them sorts again;
+        the replicates run in n_jobs threads (all the CPUs by default), NumPy releasing the GIL.
+        """
+        seeds = np.random.SeedSequence(random_state).spawn(n_bootstrap)
+        n_jobs = n_jobs or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            replicates = np.array(list(executor.map(lambda seed: self._replicate(seed, threshold), seeds)))
+
+        alpha = (1 - confidence) / 2
+        estimate = self.summary(threshold)
+        names = ['roc_auc', 'pr_auc'] + THRESHOLD_METRICS
+        return pd.DataFrame({
+            'estimate': [estimate[name] for name in names],
+            'lower': np.nanquantile(replicates, alpha, axis=0),
+            'upper': np.nanquantile(replicates, 1 - alpha, axis=0)
+        }, index=names)
+
+
+@profiled
+def evaluate_model(model, X, y, amount=None, false_positive_cost=0.0):
+    """
+    Evaluate a trained model with one inference: return the `ThresholdSweep` of its fraud probabilities
+    on X, from which ROC AUC, PR AUC and the metrics at any threshold are read without predicting again.
+    """
+    return ThresholdSweep(y, model.predict_proba(X)[:, 1], amount=amount, false_positive_cost=false_positive_cost)
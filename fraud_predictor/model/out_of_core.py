@@ -0,0 +1,251 @@
+## import needed packages
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from ..preprocessors.preprocessing import COLUMNS_TO_DROP, load_df_in_chunks
+from ..merging.table_cache import DEFAULT_TABLE_CONFIG, build_country_index, _rename_through_categories
+from ..features.features_creation import DEFAULT_FEATURE_CONFIG
+from ..features.feature_engine import build_features
+from ..features.feature_state import FeatureState, CategoryInteractionTransformer
+from ..features.online_aggregates import ChannelUsageStore
+from ..features.parallel import _check_interactions
+from .tuning import lightgbm_train_params
+from ..profiling.profiler import profiled
+
+
+def hash_split(keys, test_size=0.2, random_state=50):
+    """
+    Return a boolean mask of the rows that go to the test set, from a hash of their keys.
+
+    The decision depends only on the key, so it can be taken chunk by chunk and gives the same split on
+    every run. It does not depend on the target either, so each class is split with the same test_size
+    in expectation, as the stratified `split_data` does.
+    """
+    hash_key = f"{random_state:016d}"[-16:]
+    hashes = pd.util.hash_pandas_object(pd.Series(keys), index=False, hash_key=hash_key).to_numpy()
+    return (hashes % np.uint64(1_000_000)) < test_size * 1_000_000
+
+
+class MemmapSequence(lgb.Sequence):
+    """
+    Give LightGBM batched, random access to the rows of an on-disk matrix. The rows are stored as float32
+    and converted to the float64 LightGBM expects one batch at a time.
+    """
+
+    def __init__(self, array, batch_size=65_536):
+        self.array = array
+        self.batch_size = batch_size
+
+    def __getitem__(self, idx):
+        return np.asarray(self.array[idx], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.array)
+
+
+class StreamedFeatures:
+    """
+    The features of a transaction file, built chunk by chunk and written to float32 matrices on disk
+    (one for the train rows, one for the test rows), so that the raw frame is never in memory.
+
+    `build` makes two passes over the file:
+      1. count the channels of every customer (a `ChannelUsageStore`), the categories of every string
+         column and the size of the train/test split;
+      2. create the features of every chunk with those global statistics (the channel usage of the full
+         file, as `create_features` on the whole frame), encode the categoricals with the global categories
+         and write the rows to the matrices, accumulating the sums needed by the interactions, which are
+         filled in column by column at the end.
+    The train/test split is done on the fly by `hash_split` on `key_col`.
+    """
+
+    def __init__(self, path, feature_names, categories, n_train, n_test):
+        self.path = path
+        self.feature_names = feature_names
+        self.categories = categories
+        self.n_train = n_train
+        self.n_test = n_test
+
+    def _open(self, name, mode='r', shape=None):
+        file_path = os.path.join(self.path, name)
+        if name.startswith('X_'):
+            shape = shape or (self.n_train if name == 'X_train' else self.n_test, len(self.feature_names))
+            return np.memmap(file_path, dtype=np.float32, mode=mode, shape=shape)
+        return np.memmap(file_path, dtype=np.float32, mode=mode, shape=shape or (self.n_train if name == 'y_train' else self.n_test,))
+
+    @property
+    def X_train(self):
+        return self._open('X_train')
+
+    @property
+    def y_train(self):
+        return self._open('y_train')
+
+    @property
+    def X_test(self):
+        return self._open('X_test')
+
+    @property
+    def y_test(self):
+        return self._open('y_test')
+
+    @classmethod
+    def build(cls, file_name='synthetic_fraud_data.csv', config=None, chunksize=500_000, test_size=0.2,
+              random_state=50, key_col='transaction_id', target_column='is_fraud', enrich=True, table_config=None,
+              work_dir=None):
+        """
+        Stream file_name (see `load_df_in_chunks`) into on-disk train and test matrices.
+
+        - config : A dictionary overriding the keys of `DEFAULT_FEATURE_CONFIG`.
+        - random_state : Seed of the `hash_split` of the rows into train and test.
+        - enrich : Add the GDP indicators of every country and rename the countries with the country_mapping of
+          table_config (a dictionary overriding the keys of `DEFAULT_TABLE_CONFIG`), as `enrich_transactions` does.
+        - work_dir : Folder of the matrices, a new temporary folder by default (removed by `cleanup`).
+        """
+        config = {**DEFAULT_FEATURE_CONFIG, **(config or {})}
+        _check_interactions(config)
+        table_config = {**DEFAULT_TABLE_CONFIG, **(table_config or {})}
+        country_index = build_country_index(table_config) if enrich else None
+        country_mapping = table_config['country_mapping'].get('country', {})
+        columns_to_drop = [col for col in COLUMNS_TO_DROP if col != key_col]
+
+        def chunks():
+            for chunk in load_df_in_chunks(file_name, chunksize=chunksize, columns_to_drop=columns_to_drop):
+                if country_index is not None:
+                    country_index.enrich(chunk)
+                    chunk['country'] = _rename_through_categories(chunk['country'], country_mapping)
+                yield chunk
+
+        # Pass 1: global statistics and sizes
+        store = ChannelUsageStore(customer_col=config['customer_col'], channel_col=config['channel_col'])
+        string_values, n_train, n_test = {}, 0, 0
+        for chunk in chunks():
+            store.update(chunk[[config['customer_col'], config['channel_col']]])
+            for col in chunk.columns:
+                if col not in (key_col, target_column, *config['columns_to_drop']) and (
+                        chunk[col].dtype == object or isinstance(chunk[col].dtype, pd.CategoricalDtype)):
+                    string_values.setdefault(col, set()).update(chunk[col].dropna().unique())
+            is_test = hash_split(chunk[key_col], test_size, random_state)
+            n_test += int(is_test.sum())
+            n_train += int(len(chunk) - is_test.sum())
+
+        state = FeatureState({**config, 'interactions': []})
+        state.channel_usage = store.to_transformer()
+        categories = {col: sorted(values) for col, values in string_values.items()}
+
+        # Pass 2: features of every chunk, written to the matrices
+        path = work_dir or tempfile.mkdtemp(prefix='streamed_features_')
+        os.makedirs(path, exist_ok=True)
+        streamed, matrices, positions = None, {}, {'train': 0, 'test': 0}
+        sums = [{} for _ in config['interactions']]
+        for chunk in chunks():
+            is_test = hash_split(chunk[key_col], test_size, random_state)
+            y = chunk[target_column].to_numpy(dtype=np.float32)
+            features = build_features(chunk.drop(columns=[key_col, target_column]), {**config, 'interactions': []},
+                                      state=state)
+            for i, interaction in enumerate(config['interactions']):
+                partial = features[interaction['col1']].groupby(features[interaction['col2']], observed=True).agg(['sum', 'count'])
+                for key, (total, count) in zip(partial.index, partial.to_numpy()):
+                    previous = sums[i].get(key, (0.0, 0))
+                    sums[i][key] = (previous[0] + total, previous[1] + count)
+
+            if streamed is None:
+                schema = list(build_features(chunk.iloc[:0].drop(columns=[key_col, target_column]), config).columns)
+                for col in schema:
+                    if col not in categories and col in features and isinstance(features[col].dtype, pd.CategoricalDtype):
+                        categories[col] = list(features[col].cat.categories)
+                categories = {col: categories[col] for col in schema if col in categories}
+                streamed = cls(path, schema, categories, n_train, n_test)
+                for name, rows in (('train', n_train), ('test', n_test)):
+                    matrices['X_' + name] = streamed._open('X_' + name, 'w+', (max(rows, 1), len(schema)))
+                    matrices['y_' + name] = streamed._open('y_' + name, 'w+', (max(rows, 1),))
+
+            X = streamed.encode(features)
+            for name, mask in (('train', ~is_test), ('test', is_test)):
+                start, end = positions[name], positions[name] + int(mask.sum())
+                matrices['X_' + name][start:end] = X[mask]
+                matrices['y_' + name][start:end] = y[mask]
+                positions[name] = end
+
+        # The interactions, from the global means of col1 per category of col2
+        for i, interaction in enumerate(config['interactions']):
+            keys = list(sums[i])
+            means = np.array([sums[i][key][0] / sums[i][key][1] for key in keys])
+            transformer = CategoryInteractionTransformer(**interaction).set_state({'categories': np.asarray(keys), 'means': means})
+            col1, col2, new_col = (streamed.feature_names.index(interaction[key]) for key in ('col1', 'col2', 'new_col_name'))
+            for name in ('X_train', 'X_test'):
+                X = matrices[name]
+                for start in range(0, len(X), chunksize):
+                    block = X[start:start + chunksize]
+                    X[start:start + chunksize, new_col] = transformer.apply(
+                        block[:, col1].astype(np.float64), streamed.decode(interaction['col2'], block[:, col2])
+                    ).to_numpy()
+        for matrix in matrices.values():
+            matrix.flush()
+        return streamed
+
+    def encode(self, features):
+        """Encode a feature frame into the float32 matrix layout (categoricals as codes of the global categories)."""
+        X = np.empty((len(features), len(self.feature_names)), dtype=np.float32)
+        for j, col in enumerate(self.feature_names):
+            if col not in features.columns:
+                X[:, j] = np.nan
+            elif col in self.categories:
+                codes = pd.Categorical(features[col], categories=self.categories[col]).codes
+                X[:, j] = np.where(codes >= 0, codes, np.nan)
+            else:
+                X[:, j] = features[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        return X
+
+    def decode(self, col, codes):
+        """Turn the codes of a categorical column back into its values."""
+        codes = np.where(np.isnan(codes), -1, codes).astype(np.int64)
+        return pd.Categorical.from_codes(codes, categories=self.categories[col])
+
+    def lgb_dataset(self, max_bin=255, batch_size=65_536):
+        """
+        A LightGBM Dataset of the train rows. LightGBM reads a sample of the rows to build the bins, then
+        pushes the rows batch by batch, so only the binned dataset is held in memory.
+        """
+        return lgb.Dataset(
+            MemmapSequence(self.X_train, batch_size=batch_size), label=np.asarray(self.y_train),
+            feature_name=self.feature_names, categorical_feature=list(self.categories),
+            params={'max_bin': max_bin, 'verbosity': -1}
+        )
+
+    def test_frame(self):
+        """The test rows as a DataFrame with the training schema (categoricals restored), e.g. for `TransactionScorer`."""
+        X = self.X_test
+        return pd.DataFrame({
+            col: self.decode(col, X[:, j]) if col in self.categories else X[:, j]
+            for j, col in enumerate(self.feature_names)
+        })
+
+    def cleanup(self):
+        """Remove the matrices from disk."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+@profiled
+def train_lightgbm_out_of_core(file_name, best_params, config=None, chunksize=500_000, test_size=0.2,
+                               random_state=1, split_random_state=50, work_dir=None, **build_kwargs):
+    """
+    Train a LightGBM booster on a transaction file without loading it as a frame: the features are
+    streamed to disk with `StreamedFeatures.build` and LightGBM bins them from a sample and then reads
+    them in batches. Returns the booster and the `StreamedFeatures` (with the test rows, to evaluate it).
+
+    The booster knows the categories of the categorical columns, so it can also score DataFrames and be
+    wrapped in a `TransactionScorer`.
+
+    - random_state : Seed of LightGBM.
+    - split_random_state : Seed of the train/test split (the random_state of `StreamedFeatures.build`).
+    """
+    streamed = StreamedFeatures.build(file_name, config=config, chunksize=chunksize, test_size=test_size,
+                                      random_state=split_random_state, work_dir=work_dir, **build_kwargs)
+    params = lightgbm_train_params(best_params, random_state)
+    booster = lgb.train(params, streamed.lgb_dataset(max_bin=best_params.get('max_bin', 255)),
+                        num_boost_round=best_params.get('n_estimators', 100))
+    booster.pandas_categorical = list(streamed.categories.values())
+    return booster, streamed
@@ -0,0 +1,186 @@
+## import needed packages
+import copy
+import time
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from sklearn.metrics import roc_auc_score
+from sklearn.preprocessing import LabelEncoder
+from .model_and_metrics import tune_lightgbm, train_optimized_lightgbm
+from ..profiling.profiler import profiled
+
+
+def align_categories(X, model):
+    """
+    Give the category columns of X the categories the model was trained with (new values become NaN).
+    LightGBM encodes a category by its position in the categories of the frame, so a new slice with other
+    categories would send its rows down the wrong branches of the existing trees.
+    """
+    booster = getattr(model, 'booster_', model)
+    category_columns = [col for col in X.columns if isinstance(X[col].dtype, pd.CategoricalDtype)]
+    for col, categories in zip(category_columns, booster.pandas_categorical or []):
+        if list(X[col].cat.categories) != list(categories):
+            X[col] = pd.Categorical(X[col].astype(object), categories=categories)
+    return X
+
+
+@profiled
+def continue_training(model, X_new, y_new, best_params, n_estimators=50):
+    """
+    Continue boosting a trained model on new data only: `n_estimators` trees fitted on the residuals of the
+    model (LightGBM init_model), added to its trees.
+
+    - model : An LGBMClassifier, a Booster or the path of a model saved with `Booster.save_model`.
+    - best_params : The parameters of the model (learning rate, tree shape...); n_estimators is replaced.
+
+    The returned LGBMClassifier keeps the classes of the model (0 and 1 for a Booster) even when the new data
+    holds a single class (a slice without frauds): a zero-weight row of every missing class is added, so
+    LightGBM sees both labels without any row of the missing class weighing on the new trees.
+    Raises ValueError when y_new holds a label that is not a class of the model.
+    """
+    if isinstance(model, str):
+        model = lgb.Booster(model_file=model)
+    X_new = align_categories(X_new.copy(), model)
+    y_new = np.asarray(y_new)
+    classes = getattr(model, 'classes_', np.array([0, 1]))
+    unknown = np.setdiff1d(y_new, classes)
+    if len(unknown):
+        raise ValueError(f"The labels {unknown.tolist()} are not classes of the model {classes.tolist()}.")
+    sample_weight = None
+    missing = np.setdiff1d(classes, y_new)
+    if len(missing):
+        # LGBMClassifier.fit takes the classes from the labels: with one class, they would all become 0
+        X_new = pd.concat([X_new, X_new.iloc[np.zeros(len(missing), dtype=int)]], ignore_index=True)
+        sample_weight = np.concatenate([np.ones(len(y_new)), np.zeros(len(missing))])
+        y_new = np.concatenate([y_new, missing])
+    return lgb.LGBMClassifier(**{**best_params, 'n_estimators': n_estimators}).fit(
+        X_new, y_new, sample_weight=sample_weight, init_model=getattr(model, 'booster_', model))
+
+
+@profiled
+def refit_leaves(model, X_recent, y_recent, decay_rate=0.9):
+    """
+    Refit the leaf values of every tree on recent data, keeping the tree structures: each leaf becomes
+    decay_rate * old value + (1 - decay_rate) * value fitted on the recent rows. Returns a new LGBMClassifier.
+    """
+    X_recent = align_categories(X_recent.copy(), model)
+    y_encoded = LabelEncoder().fit(model.classes_).transform(np.asarray(y_recent))
+    refitted = copy.copy(model)
+    # The sklearn wrapper only holds the fitted Booster; the refitted one replaces it
+    refitted._Booster = model.booster_.refit(X_recent, y_encoded, decay_rate=decay_rate)
+    return refitted
+
+
+class IncrementalTrainer:
+    """
+    Keep a model up to date as slices of new transactions arrive: every `update` continues boosting on the
+    new slice (`continue_training`), optionally refitting the leaves on the latest slices, and every
+    `full_retrain_every` updates the model is retrained from scratch on the whole history, which also
+    resets the number of trees.
+
+    - best_params : The parameters of `train_optimized_lightgbm`.
+    - load_history : A function returning (X, y) of the whole history, including the slice being added,
+      called only for full retrains.
+    - full_retrain_every : Number of incremental updates between two full retrains (None: never).
+    - n_estimators : Trees added by every incremental update.
+    - refit_window : Number of latest slices the leaves are refitted on after every update (None: no refit).
+    - retune : Run `tune_lightgbm` before every full retrain (with `tune_kwargs`) and keep its parameters.
+
+    `report_` holds one entry per update: its mode ('full' or 'incremental'), rows, seconds and trees.
+    """
+
+    def __init__(self, best_params, load_history=None, full_retrain_every=7, n_estimators=50, refit_window=None,
+                 decay_rate=0.9, retune=False, tune_kwargs=None):
+        if full_retrain_every is not None and load_history is None:
+            raise ValueError("load_history is needed to retrain on the whole history.")
+        self.best_params = dict(best_params)
+        self.load_history = load_history
+        self.full_retrain_every = full_retrain_every
+        self.n_estimators = n_estimators
+        self.refit_window = refit_window
+        self.decay_rate = decay_rate
+        self.retune = retune
+        self.tune_kwargs = tune_kwargs or {}
+        self.model = None
+        self.increments = 0
+        self._recent = []
+        self.report_ = []
+
+    def _full_retrain(self):
+        X, y = self.load_history()
+        if self.retune:
+            self.best_params, _ = tune_lightgbm(X, y, **self.tune_kwargs)
+        self.increments = 0
+        self._recent = []
+        return train_optimized_lightgbm(X, y, self.best_params), len(X)
+
+    def fit(self, X, y):
+        """Train the first model on the history (X, y)."""
+        start = time.perf_counter()
+        self.model = train_optimized_lightgbm(X, y, self.best_params)
+        self.increments = 0
+        self._recent = []
+        self._add_report('full', len(X), start)
+        return self
+
+    def update(self, X_new, y_new):
+        """Add a slice of new transactions to the model: a full retrain when due, an incremental update else."""
+        if self.model is None:
+            raise ValueError("The trainer has no model yet, call fit first.")
+        start = time.perf_counter()
+        if self.full_retrain_every is not None and self.increments + 1 >= self.full_retrain_every:
+            self.model, rows = self._full_retrain()
+            self._add_report('full', rows, start)
+            return self
+
+        self.model = continue_training(self.model, X_new, y_new, self.best_params, self.n_estimators)
+        self.increments += 1
+        if self.refit_window:
+            self._recent = (self._recent + [(X_new, y_new)])[-self.refit_window:]
+            X_recent = pd.concat([X for X, _ in self._recent])
+            y_recent = pd.concat([pd.Series(np.asarray(y)) for _, y in self._recent])
+            self.model = refit_leaves(self.model, X_recent, y_recent, self.decay_rate)
+        self._add_report('incremental', len(X_new), start)
+        return self
+
+    def _add_report(self, mode, rows, start):
+        self.report_.append({'update': len(self.report_), 'mode': mode, 'rows': rows,
+                             'seconds': time.perf_counter() - start, 'trees': self.model.booster_.num_trees()})
+
+
+def compare_retraining(X_base, y_base, slices, best_params, n_estimators=50, refit_window=None, decay_rate=0.9):
+    """
+    Replay a stream of slices with incremental updates and with a full retrain after every slice, scoring
+    both models on the next slice (the transactions they would score in production).
+
+    - slices : A list of (X, y) slices in time order; the last one is only used for evaluation.
+    Returns a DataFrame with the wall time and the ROC AUC on the next slice of both strategies.
+    """
+    trainer = IncrementalTrainer(best_params, full_retrain_every=None, n_estimators=n_estimators,
+                                 refit_window=refit_window, decay_rate=decay_rate).fit(X_base, y_base)
+    X_history, y_history = [X_base], [pd.Series(np.asarray(y_base))]
+    rows = []
+    for i, ((X_new, y_new), (X_next, y_next)) in enumerate(zip(slices[:-1], slices[1:])):
+        # Every slice gets the categories of the base data, so the history concatenates into categoricals
+        X_new = align_categories(X_new.copy(), trainer.model)
+        trainer.update(X_new, y_new)
+        incremental = trainer.report_[-1]
+
+        X_history.append(X_new)
+        y_history.append(pd.Series(np.asarray(y_new)))
+        start = time.perf_counter()
+        full_model = train_optimized_lightgbm(pd.concat(X_history, ignore_index=True),
+                                              pd.concat(y_history, ignore_index=True), best_params)
+        full_seconds = time.perf_counter() - start
+
+        X_eval = align_categories(X_next.copy(), trainer.model)
+        rows.append({
+            'slice': i,
+            'incremental_seconds': incremental['seconds'],
+            'incremental_roc_auc': roc_auc_score(y_next, trainer.model.predict_proba(X_eval)[:, 1]),
+            'incremental_trees': incremental['trees'],
+            'full_seconds': full_seconds,
+            'full_roc_auc': roc_auc_score(y_next, full_model.predict_proba(X_eval)[:, 1]),
+            'full_trees': full_model.booster_.num_trees()
+        })
+    return pd.DataFrame(rows)
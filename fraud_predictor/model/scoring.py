@@ -0,0 +1,92 @@
+## import needed packages
+import numpy as np
+import pandas as pd
+from ..profiling.profiler import profiled
+
+
+def lightgbm_input_dtype(X):
+    """
+    Return the float dtype LightGBM converts a DataFrame with the dtypes of X to before predicting:
+    float32/float64 when all the columns share it, float32 otherwise (e.g. as soon as there is a bool column).
+    """
+    dtypes = []
+    for dtype in X.dtypes:
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Categoricals are replaced by their integer codes
+            dtype = np.dtype(np.int8)
+        if dtype == bool:
+            return np.dtype(np.float32)
+        dtypes.append(dtype)
+    common_dtype = np.result_type(*dtypes)
+    return common_dtype if common_dtype in (np.float32, np.float64) else np.dtype(np.float32)
+
+
+class TransactionScorer:
+    """
+    Score single transactions (or small batches) with the booster of a trained LightGBM model, without
+    building a pandas DataFrame nor going through the scikit-learn wrapper.
+
+    The feature order, the category code maps and the input dtype are bound once from `X_reference`, a
+    frame with the training schema (X_train, or a few rows of it, after `convert_object_to_category`).
+    Rows are encoded into a float array the same way LightGBM encodes a DataFrame (category -> code, unseen
+    category -> NaN) and scored through `Booster.predict`, so the probabilities match `predict_proba`.
+    """
+
+    def __init__(self, model, X_reference, num_threads=1):
+        self.booster = getattr(model, 'booster_', model)
+        self.feature_names = list(X_reference.columns)
+        if self.feature_names != self.booster.feature_name():
+            raise ValueError("The columns of X_reference do not match the features of the model.")
+        self.dtype = lightgbm_input_dtype(X_reference)
+        self.num_threads = num_threads
+
+        # LightGBM stores the categories of every category column, in the order of the columns
+        category_columns = [col for col in self.feature_names if isinstance(X_reference[col].dtype, pd.CategoricalDtype)]
+        self.category_maps = {
+            col: {value: code for code, value in enumerate(categories)}
+            for col, categories in zip(category_columns, self.booster.pandas_categorical or [])
+        }
+        self._encoders = [
+            (i, col, self.category_maps.get(col)) for i, col in enumerate(self.feature_names)
+        ]
+
+    def _encode_value(self, value, category_map):
+        if category_map is not None:
+            return category_map.get(value, np.nan)
+        if value is None:
+            return np.nan
+        return float(value)
+
+    def encode(self, rows):
+        """
+        Encode transactions into the float matrix the booster expects.
+
+        - rows : A dict (feature -> raw value), a list of dicts, or a NumPy row/batch in the feature order.
+          Numeric NumPy arrays are taken as already encoded; object arrays hold raw (string) categories.
+        """
+        if isinstance(rows, dict):
+            rows = [rows]
+        if isinstance(rows, (list, tuple)) and rows and isinstance(rows[0], dict):
+            X = np.empty((len(rows), len(self.feature_names)), dtype=self.dtype)
+            for r, row in enumerate(rows):
+                for i, col, category_map in self._encoders:
+                    X[r, i] = self._encode_value(row.get(col), category_map)
+            return X
+
+        rows = np.asarray(rows)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        if rows.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} features, got {rows.shape[1]}.")
+        if rows.dtype != object:
+            return rows.astype(self.dtype, copy=False)
+
+        X = np.empty(rows.shape, dtype=self.dtype)
+        for i, col, category_map in self._encoders:
+            X[:, i] = [self._encode_value(value, category_map) for value in rows[:, i]]
+        return X
+
+    @profiled
+    def predict_proba(self, rows):
+        """Return the fraud probability of every transaction of `rows` (see `encode`)."""
+        return self.booster.predict(self.encode(rows), num_threads=self.num_threads)
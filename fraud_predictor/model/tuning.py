@@ -0,0 +1,176 @@
+## import needed packages
+import math
+import time
+import numpy as np
+import lightgbm as lgb
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, train_test_split
+from .binned_dataset import BinnedDatasets
+
+
+def lightgbm_train_params(params, random_state=1, n_jobs=-1):
+    """
+    Translate LGBMClassifier hyperparameters into `lgb.train` parameters (without n_estimators, which is
+    the number of boosting rounds).
+    """
+    train_params = {key: value for key, value in params.items() if key != 'n_estimators'}
+    train_params.update({
+        'objective': 'binary',
+        'metric': 'auc',
+        'seed': random_state,
+        'num_threads': n_jobs,
+        'verbosity': -1
+    })
+    return train_params
+
+
+def train_binned_lightgbm(datasets, best_params, random_state=1, n_jobs=-1):
+    """
+    Train the final model on the pre-binned training data of a `BinnedDatasets` (the one used by the
+    search, so the bins are not built again) and return the LightGBM Booster.
+    """
+    return datasets.train(
+        lightgbm_train_params(best_params, random_state, n_jobs), num_boost_round=best_params.get('n_estimators', 100)
+    )
+
+
+def stratified_subsample(y, n_samples=None, negative_rate=1.0, random_state=1):
+    """
+    Return the sorted positions of a stratified subsample of y (every class keeps its share of the rows),
+    with n_samples rows at most (all the rows by default). With `negative_rate` < 1, only that fraction
+    of the negative rows is then kept, drawn at random, and every positive row is kept, so the subsample
+    is richer in the minority class. The probabilities of a model trained on it must be corrected with
+    `recalibrate_probabilities`.
+    """
+    if not 0 < negative_rate <= 1:
+        raise ValueError("negative_rate must be in (0, 1].")
+    y = np.asarray(y)
+    positions = np.arange(len(y))
+    if n_samples is not None and n_samples < len(y):
+        positions, _ = train_test_split(positions, train_size=n_samples, stratify=y, random_state=random_state)
+    if negative_rate < 1:
+        rng = np.random.default_rng(random_state)
+        positions = positions[(y[positions] == 1) | (rng.random(len(positions)) < negative_rate)]
+    return np.sort(positions)
+
+
+def recalibrate_probabilities(probabilities, negative_rate):
+    """
+    Correct the fraud probabilities of a model trained with only `negative_rate` of the negative rows:
+    the odds it predicts are 1 / negative_rate times too high, p = r * q / (r * q + 1 - q).
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return negative_rate * probabilities / (negative_rate * probabilities + 1 - probabilities)
+
+
+class SuccessiveHalvingSearch:
+    """
+    Successive-halving random search over LightGBM hyperparameters, with the fraction of the training
+    data as the budget and early stopping on the validation fold bounding the number of trees.
+
+    `n_iter` candidates are sampled from `param_dist` and cross-validated on a small stratified fraction of
+    every training fold (at least `min_samples` rows). Only the best 1/`eta` of them move on to the next
+    rung, where the fraction is multiplied by `eta`, until the last rung trains on the full folds.
+    `n_estimators` is the maximum number of rounds: every fit stops after `early_stopping_rounds` rounds
+    without improvement of the ROC AUC of one stratified half of the validation fold, and is scored on the
+    other half, so the score is not biased by the choice of the stopping round.
+
+    The training data is binned once per `max_bin` value by a `BinnedDatasets` (saved to `cache_dir` when
+    given) and every fold of every candidate is a subset of it, so no fit bins the raw columns again.
+
+    After `fit`, `best_params_` holds the best candidate of the last rung with `n_estimators` set to the mean
+    best iteration of its folds (the number of trees that was validated), `best_score_` its mean ROC AUC and
+    `cv_results_` one entry per candidate and rung (with the sampled parameters and the mean best
+    iteration), in the spirit of RandomizedSearchCV.
+    """
+
+    def __init__(self, param_dist, n_iter=50, cv=5, eta=3, min_samples=500, early_stopping_rounds=50,
+                 random_state=1, verbose=0, n_jobs=-1, cache_dir=None):
+        if eta < 2:
+            raise ValueError("eta must be at least 2")
+        self.param_dist = param_dist
+        self.n_iter = n_iter
+        self.cv = cv
+        self.eta = eta
+        self.min_samples = min_samples
+        self.early_stopping_rounds = early_stopping_rounds
+        self.random_state = random_state
+        self.verbose = verbose
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+
+    def _fractions(self, n_samples):
+        """Training fraction of every rung, ending with the full folds."""
+        n_train = n_samples * (self.cv - 1) / self.cv
+        n_rungs = 1 + min(
+            int(math.log(self.n_iter, self.eta) + 1e-9),
+            int(math.log(max(n_train / self.min_samples, 1), self.eta) + 1e-9)
+        )
+        return [self.eta ** -(n_rungs - 1 - rung) for rung in range(n_rungs)]
+
+    def _folds(self, y, fraction):
+        """
+        Stratified CV folds as (train, stopping, scoring) positions: the training side subsampled to
+        `fraction` of its rows, and the validation fold split in halves for early stopping and scoring.
+        """
+        folds = []
+        splitter = StratifiedKFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+        for train_idx, valid_idx in splitter.split(np.zeros(len(y)), y):
+            if fraction < 1:
+                train_idx, _ = train_test_split(
+                    train_idx, train_size=fraction, stratify=y.iloc[train_idx], random_state=self.random_state
+                )
+            stop_idx, score_idx = train_test_split(
+                valid_idx, test_size=0.5, stratify=y.iloc[valid_idx], random_state=self.random_state
+            )
+            folds.append((np.sort(train_idx), np.sort(stop_idx), np.sort(score_idx)))
+        return folds
+
+    def _evaluate(self, datasets, params, folds):
+        """Mean ROC AUC on the scoring halves and mean best iteration of params over the folds."""
+        scores, iterations = [], []
+        train_params = lightgbm_train_params(params, self.random_state, self.n_jobs)
+        max_bin = train_params.get('max_bin', 255)
+        for train_idx, stop_idx, score_idx in folds:
+            booster = datasets.train(
+                train_params, num_boost_round=params.get('n_estimators', 100), indices=train_idx,
+                valid_sets=[datasets.subset(stop_idx, max_bin)],
+                callbacks=[lgb.early_stopping(self.early_stopping_rounds, verbose=False)]
+            )
+            iteration = booster.best_iteration or booster.current_iteration()
+            probabilities = booster.predict(datasets.X.iloc[score_idx], num_iteration=iteration)
+            scores.append(roc_auc_score(datasets.y.iloc[score_idx], probabilities))
+            iterations.append(iteration)
+        return float(np.mean(scores)), float(np.std(scores)), int(round(np.mean(iterations)))
+
+    def fit(self, X, y, datasets=None):
+        """
+        Run the search on (X, y). `datasets` can be a `BinnedDatasets` of (X, y) already built, e.g. shared
+        with another search or with `train_binned_lightgbm`; it is kept as `datasets_`.
+        """
+        self.datasets_ = datasets if datasets is not None else BinnedDatasets(X, y, cache_dir=self.cache_dir)
+        candidates = list(ParameterSampler(self.param_dist, self.n_iter, random_state=self.random_state))
+        self.cv_results_ = {'params': [], 'rung': [], 'train_fraction': [], 'mean_test_score': [],
+                            'std_test_score': [], 'best_iteration': [], 'fit_time': []}
+
+        for rung, fraction in enumerate(self._fractions(len(y))):
+            folds = self._folds(y, fraction)
+            results = []
+            for params in candidates:
+                start = time.perf_counter()
+                mean_score, std_score, best_iteration = self._evaluate(self.datasets_, params, folds)
+                results.append((mean_score, best_iteration))
+                for key, value in (('params', params), ('rung', rung), ('train_fraction', fraction),
+                                   ('mean_test_score', mean_score), ('std_test_score', std_score),
+                                   ('best_iteration', best_iteration), ('fit_time', time.perf_counter() - start)):
+                    self.cv_results_[key].append(value)
+            if self.verbose:
+                print(f"Rung {rung}: {len(candidates)} candidates on {fraction:.1%} of the folds, "
+                      f"best ROC AUC {max(score for score, _ in results):.4f}")
+
+            order = sorted(range(len(candidates)), key=lambda i: results[i][0], reverse=True)
+            best = order[0]
+            self.best_score_ = results[best][0]
+            self.best_params_ = {**candidates[best], 'n_estimators': results[best][1]}
+            candidates = [candidates[i] for i in order[:max(1, len(candidates) // self.eta)]]
+        return self
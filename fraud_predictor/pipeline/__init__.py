@@ -0,0 +1,24 @@
+# fraud_predictor/pipeline/__init__.py
+
+# notebook_pipeline is imported from its module on first access (PEP 562), as in fraud_predictor.model:
+# the notebook steps use the model helpers, which load lightgbm and scikit-learn.
+import importlib
+from .dag import Step, Pipeline
+
+_EXPORTS = {
+    'notebook_pipeline': 'notebook'
+}
+
+__all__ = ['Step', 'Pipeline', *_EXPORTS]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,235 @@
+## import needed packages
+import copy
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+import time
+from ..merging.table_cache import _file_digest
+from ..preprocessors.preprocessing import _data_path
+from ..profiling.profiler import profiled_stage
+
+## Bump when the layout of the cached outputs changes, so old caches are not read back
+PIPELINE_CACHE_VERSION = 1
+
+DEFAULT_PIPELINE_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/cache/pipeline'))
+
+
+def _source(func):
+    """Source code of a function (of the function itself for a `profiled` one), its qualified name when unavailable."""
+    func = inspect.unwrap(func)
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+## Types of the module-level values hashed as data (constants such as COLUMNS_TO_DROP)
+_CONSTANT_TYPES = (str, int, float, bool, type(None), list, tuple, dict, set, frozenset)
+
+
+def _constant_digest(value):
+    """A stable text of a constant (sets sorted, as their order changes with the hash seed)."""
+    def default(item):
+        return sorted(map(repr, item)) if isinstance(item, (set, frozenset)) else repr(item)
+    return json.dumps(value, sort_keys=True, default=default)
+
+
+def _global_names(code):
+    """Names a code object (and the functions, lambdas and comprehensions nested in it) may read as globals."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+def _code_closure(funcs):
+    """
+    Sources of funcs and of everything of the package they read through their module globals, transitively:
+    the functions and classes they call (with the globals of their methods), and the constants (as data).
+    """
+    package = __name__.split('.')[0]
+    parts, seen = {}, set()
+    pending = [inspect.unwrap(func) for func in funcs]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if inspect.isclass(obj):
+            parts[f'{obj.__module__}.{obj.__qualname__}'] = _source(obj)
+            pending += [inspect.unwrap(member) for member in vars(obj).values() if inspect.isfunction(member)]
+            continue
+        if not inspect.isfunction(obj):
+            continue
+        parts.setdefault(f'{obj.__module__}.{obj.__qualname__}', _source(obj))
+        for name in _global_names(obj.__code__):
+            # Module dunders (__file__...) depend on where the code is, not on what it does
+            if name not in obj.__globals__ or name.startswith('__'):
+                continue
+            value = obj.__globals__[name]
+            if isinstance(value, _CONSTANT_TYPES):
+                parts[f'{obj.__module__}.{name}'] = _constant_digest(value)
+            elif ((inspect.isfunction(value) or inspect.isclass(value))
+                  and getattr(inspect.unwrap(value), '__module__', '').split('.')[0] == package):
+                pending.append(inspect.unwrap(value))
+    return parts
+
+
+class Step:
+    """
+    A named step of a `Pipeline`: `func(*outputs of inputs, **config values)`.
+
+    - inputs : Names of the steps whose outputs are passed to func, in order.
+    - config : Keys of the pipeline config passed to func as keyword arguments, either a list (the argument
+      has the name of the key) or a dictionary argument -> config key.
+    - uses : Other functions whose code is part of the key of the step together with func.
+    - files : Config keys holding data file names; the content of the files is part of the key.
+    - mutates : func modifies its inputs in place (as the notebook feature functions do), so it gets copies
+      and the outputs of the upstream steps stay as they were cached.
+
+    The code of the step is the source of func and uses, plus what they read through the globals of their
+    modules, followed transitively: the functions and classes of the package they call, and the plain
+    module constants (strings, numbers, lists, tuples, dicts, sets) such as `COLUMNS_TO_DROP`. Not tracked:
+    values reached as attributes of a module (`module.CONSTANT`), other objects stored in globals, module
+    state changed at run time, the installed library versions and files read without being in `files`.
+    Pass such values through the step config (or the functions reading them through uses).
+    """
+
+    def __init__(self, name, func, inputs=(), config=(), uses=(), files=(), mutates=False):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.config = dict(config) if isinstance(config, dict) else {key: key for key in config}
+        self.uses = list(uses)
+        self.files = list(files)
+        self.mutates = mutates
+
+    def code_digest(self):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps(_code_closure([self.func, *self.uses]), sort_keys=True).encode())
+        return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    Run a DAG of `Step`s, caching the output of every step on disk under a content hash of everything it
+    depends on: its code (func and uses, with the helpers and constants they read), its config values, the content of its files and the keys of its
+    inputs, which depend on their own code, config, files and inputs in turn. A change therefore gives a new
+    key to the step it touches and to the steps after it only: the others are read back from the cache.
+
+    `run` computes only what the targets need: a target with a cached output is read back without looking at
+    its inputs. The outputs are pickled, so they are read back exactly (dtypes, categories, models).
+
+    After `run`, `report_` holds one entry per step that was needed (its key, 'cached' or 'ran', and seconds).
+    """
+
+    def __init__(self, steps, config=None, cache_dir=DEFAULT_PIPELINE_CACHE_DIR):
+        self.steps = {}
+        for step in steps:
+            missing = [name for name in step.inputs if name not in self.steps]
+            if missing:
+                raise ValueError(f"The inputs {missing} of step '{step.name}' must be declared before it.")
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate step '{step.name}'.")
+            self.steps[step.name] = step
+        self.config = dict(config or {})
+        self.cache_dir = cache_dir
+        self.report_ = []
+
+    def _config_values(self, step):
+        missing = [key for key in step.config.values() if key not in self.config]
+        if missing:
+            raise ValueError(f"The config keys {missing} of step '{step.name}' are not set.")
+        return {arg: self.config[key] for arg, key in step.config.items()}
+
+    def keys(self):
+        """Return the cache key of every step."""
+        keys = {}
+        for name, step in self.steps.items():
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(json.dumps({
+                'version': PIPELINE_CACHE_VERSION,
+                'step': name,
+                'code': step.code_digest(),
+                'config': self._config_values(step),
+                'inputs': [keys[input_name] for input_name in step.inputs]
+            }, sort_keys=True, default=str).encode())
+            for key in step.files:
+                digest.update(_file_digest(_data_path(self.config[key])).encode())
+            keys[name] = digest.hexdigest()
+        return keys
+
+    def _path(self, name, key):
+        return os.path.join(self.cache_dir, name, f'{key}.pkl')
+
+    def _write(self, path, output):
+        """Pickle output to a temporary file next to path and move it in place, so a reader never sees half of it."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def run(self, targets=None, refresh=()):
+        """
+        Return the outputs of the target steps (all the steps by default) as a dictionary name -> output,
+        running the steps they need that have no cached output, that are in `refresh`, or that come after a
+        step of `refresh` (which would otherwise keep reading outputs built from the old one).
+        """
+        targets = list(self.steps) if targets is None else [targets] if isinstance(targets, str) else list(targets)
+        unknown = [name for name in list(targets) + list(refresh) if name not in self.steps]
+        if unknown:
+            raise ValueError(f"Unknown steps {unknown}.")
+        keys = self.keys()
+        # The refreshed steps and every step after them (the steps are in dependency order)
+        stale = set(refresh)
+        for name, step in self.steps.items():
+            if stale.intersection(step.inputs):
+                stale.add(name)
+
+        # The steps to read or run: walk up from the targets, stopping at cached outputs
+        needed, pending = [], list(targets)
+        while pending:
+            name = pending.pop()
+            if name in needed:
+                continue
+            needed.append(name)
+            if name in stale or not os.path.exists(self._path(name, keys[name])):
+                pending.extend(self.steps[name].inputs)
+        order = [name for name in self.steps if name in needed]
+        # Number of steps still to run that read every output, so outputs are freed once consumed
+        consumers = {name: sum(name in self.steps[other].inputs for other in order
+                               if other in stale or not os.path.exists(self._path(other, keys[other])))
+                     for name in order}
+
+        outputs, self.report_ = {}, []
+        for name in order:
+            step, path = self.steps[name], self._path(name, keys[name])
+            start = time.perf_counter()
+            if name not in stale and os.path.exists(path):
+                with open(path, 'rb') as f:
+                    outputs[name] = pickle.load(f)
+                status = 'cached'
+            else:
+                inputs = [outputs[input_name] for input_name in step.inputs]
+                if step.mutates:
+                    inputs = copy.deepcopy(inputs)
+                with profiled_stage(f'pipeline.{name}') as stage:
+                    stage.output = outputs[name] = step.func(*inputs, **self._config_values(step))
+                self._write(path, outputs[name])
+                status = 'ran'
+                for input_name in step.inputs:
+                    consumers[input_name] -= 1
+                    if consumers[input_name] == 0 and input_name not in targets:
+                        del outputs[input_name]
+            self.report_.append({'step': name, 'key': keys[name], 'status': status,
+                                 'seconds': time.perf_counter() - start})
+        return {name: outputs[name] for name in targets}
@@ -0,0 +1,143 @@
+"""
+The notebook workflow as a cached DAG: load -> drop -> enrich -> features (one step per feature function)
+-> split -> categorize -> tune -> train -> evaluate. Only the steps whose code, config or inputs changed run
+again, e.g. a new `device_mapping` reruns `payment_safety` and the steps after it.
+
+Run from the repository root:
+    python -m fraud_predictor.pipeline.notebook
+    python -m fraud_predictor.pipeline.notebook --target train --config overrides.json --refresh tune
+"""
+## import needed packages
+import argparse
+import json
+import pandas as pd
+from ..preprocessors.preprocessing import _data_path, drop_unnecessary_columns
+from ..merging.table_cache import DEFAULT_TABLE_CONFIG, enrich_transactions
+from ..features.features_creation import (
+    DEFAULT_FEATURE_CONFIG, transform_to_datetime_type, create_time_columns, categorize_hour_column,
+    drop_redundant_columns, create_channel_usage, create_interaction_by_category, create_payment_safety
+)
+from ..model.model_and_metrics import (
+    split_data, convert_object_to_category, tune_lightgbm, train_optimized_lightgbm
+)
+from ..model.evaluation import ThresholdSweep, evaluate_model
+from .dag import Step, Pipeline, DEFAULT_PIPELINE_CACHE_DIR
+
+## Configuration of every step, on top of the table and feature configs
+DEFAULT_PIPELINE_CONFIG = {
+    **{key: value for key, value in DEFAULT_TABLE_CONFIG.items() if key not in ('chunksize', 'partition_col')},
+    **DEFAULT_FEATURE_CONFIG,
+    'target_column': 'is_fraud',
+    'test_size': 0.2,
+    'split_random_state': 50,
+    'tuning': {'n_iter': 50, 'cv': 5, 'verbose': 0},
+    # Parameters of the final model; None runs the search of `tune_lightgbm`
+    'best_params': None
+}
+
+## Config keys of `enrich_transactions`
+ENRICH_CONFIG = ['gdp_file', 'gdp_per_capita_file', 'gdp_per_capita_read_kwargs', 'country_mapping',
+                 'country_enrichment']
+
+
+def load_transactions(transactions_file):
+    """Read the transactions file (relative to the package data folder) as the notebook does."""
+    return pd.read_csv(_data_path(transactions_file))
+
+
+def enrich(df, **config):
+    return enrich_transactions(df, config)
+
+
+def create_interactions(df, interactions):
+    for interaction in interactions:
+        df = create_interaction_by_category(df, **interaction)
+    return df
+
+
+def split(df, target_column, test_size, random_state):
+    return tuple(split_data(df, target_column=target_column, test_size=test_size, random_state=random_state))
+
+
+def categorize(data):
+    X_train, X_test, y_train, y_test = data
+    X_train, X_test = convert_object_to_category(X_train, X_test)
+    return X_train, X_test, y_train, y_test
+
+
+def tune(data, tuning, best_params):
+    """Return the parameters of the final model: best_params when given, else the result of the search."""
+    if best_params is not None:
+        return dict(best_params)
+    X_train, _, y_train, _ = data
+    return tune_lightgbm(X_train, y_train, **tuning)[0]
+
+
+def train(data, best_params):
+    X_train, _, y_train, _ = data
+    return train_optimized_lightgbm(X_train, y_train, best_params)
+
+
+def evaluate(data, model):
+    """Return ROC AUC, PR AUC and the metrics at the 0.5 threshold of the model on the test set (one inference)."""
+    _, X_test, _, y_test = data
+    return evaluate_model(model, X_test, y_test).summary(0.5)
+
+
+NOTEBOOK_STEPS = [
+    Step('load', load_transactions, config=['transactions_file'], files=['transactions_file']),
+    Step('drop', drop_unnecessary_columns, inputs=['load']),
+    Step('enrich', enrich, inputs=['drop'], config=ENRICH_CONFIG, uses=[enrich_transactions],
+         files=['gdp_file', 'gdp_per_capita_file'], mutates=True),
+    Step('to_datetime', transform_to_datetime_type, inputs=['enrich'], mutates=True),
+    Step('time_columns', create_time_columns, inputs=['to_datetime'], mutates=True),
+    Step('hour_category', categorize_hour_column, inputs=['time_columns'], mutates=True),
+    Step('drop_redundant', drop_redundant_columns, inputs=['hour_category'], config=['columns_to_drop']),
+    Step('channel_usage', create_channel_usage, inputs=['drop_redundant'], config=['customer_col', 'channel_col'],
+         mutates=True),
+    Step('interactions', create_interactions, inputs=['channel_usage'], config=['interactions'],
+         uses=[create_interaction_by_category], mutates=True),
+    Step('payment_safety', create_payment_safety, inputs=['interactions'],
+         config=['device_col', 'safety_col', 'device_mapping'], mutates=True),
+    Step('split', split, inputs=['payment_safety'],
+         config={'target_column': 'target_column', 'test_size': 'test_size', 'random_state': 'split_random_state'},
+         uses=[split_data]),
+    Step('categorize', categorize, inputs=['split'], uses=[convert_object_to_category], mutates=True),
+    Step('tune', tune, inputs=['categorize'], config=['tuning', 'best_params'], uses=[tune_lightgbm]),
+    Step('train', train, inputs=['categorize', 'tune'], uses=[train_optimized_lightgbm]),
+    Step('evaluate', evaluate, inputs=['categorize', 'train'],
+         uses=[evaluate_model, ThresholdSweep])
+]
+
+
+def notebook_pipeline(config=None, cache_dir=DEFAULT_PIPELINE_CACHE_DIR):
+    """
+    Return the notebook workflow as a `Pipeline` caching every step under cache_dir.
+
+    - config : A dictionary overriding the keys of `DEFAULT_PIPELINE_CONFIG`.
+    """
+    return Pipeline(NOTEBOOK_STEPS, config={**DEFAULT_PIPELINE_CONFIG, **(config or {})}, cache_dir=cache_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', nargs='+', default=['evaluate'])
+    parser.add_argument('--config', default=None, help="JSON file overriding keys of DEFAULT_PIPELINE_CONFIG")
+    parser.add_argument('--refresh', nargs='+', default=[], help="Steps to run even if cached")
+    parser.add_argument('--cache-dir', default=DEFAULT_PIPELINE_CACHE_DIR)
+    args = parser.parse_args()
+
+    config = None
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    pipeline = notebook_pipeline(config, cache_dir=args.cache_dir)
+    outputs = pipeline.run(args.target, refresh=args.refresh)
+    for entry in pipeline.report_:
+        print(f"{entry['step']:<16} {entry['status']:<7} {entry['seconds']:8.3f}s  {entry['key']}")
+    if 'evaluate' in outputs:
+        print({name: round(value, 4) for name, value in outputs['evaluate'].items()})
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,10 @@
 # fraud_predictor/preprocessors/__init__.py
 
-from .preprocessing import drop_unnecessary_columns
+from .preprocessing import drop_unnecessary_columns, load_df_in_chunks, load_df_chunked
+from .dtype_planning import DtypePlan, compact_frame, memory_report
+from .velocity import parse_velocity, expand_velocity
 
-__all__ = ['drop_unnecessary_columns']
+__all__ = [
+    'drop_unnecessary_columns', 'load_df_in_chunks', 'load_df_chunked', 'DtypePlan', 'compact_frame', 'memory_report',
+    'parse_velocity', 'expand_velocity'
+]
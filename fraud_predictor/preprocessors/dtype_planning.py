@@ -0,0 +1,180 @@
+## import needed packages
+import json
+import numpy as np
+import pandas as pd
+
+## Signed integer types tried in order when downcasting an integer column
+INTEGER_DTYPES = ['int8', 'int16', 'int32', 'int64']
+
+
+def _integer_dtype(min_value, max_value):
+    """Return the smallest signed integer type holding every value of [min_value, max_value]."""
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            return dtype
+    return 'int64'
+
+
+def _float32_within(values, rtol):
+    """Whether every finite value of a float column survives a float32 round trip within the relative tolerance rtol."""
+    values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    with np.errstate(over='ignore'):
+        round_trip = values.astype(np.float32).astype(np.float64)
+    return bool(np.all(np.abs(round_trip - values) <= rtol * np.abs(values)))
+
+
+def memory_report(before, after):
+    """
+    Compare the deep memory usage of a frame before and after a conversion, per column and in total.
+    Returns a df with the bytes before and after, the dtypes and the reduction ratio, plus a 'total' row.
+    """
+    before_bytes = before.memory_usage(index=False, deep=True)
+    after_bytes = after.memory_usage(index=False, deep=True).reindex(before_bytes.index)
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.reindex(before_bytes.index).astype(str),
+        'bytes_before': before_bytes,
+        'bytes_after': after_bytes
+    })
+    report.loc['total'] = ['', '', before_bytes.sum(), after_bytes.sum()]
+    report['ratio'] = report['bytes_before'] / report['bytes_after']
+    return report
+
+
+class DtypePlan:
+    """
+    Plan the most compact dtype of every column of a frame, then apply the same plan to any frame with
+    that schema (the training data, the test data, a scoring batch).
+
+    - Integer columns get the smallest signed type holding their range (e.g. transaction_hour -> int8).
+    - Float columns become float32 when `downcast_floats` and every value seen by `fit` survives the float32
+      round trip within the relative tolerance `float_rtol` (exactly by default), so large values such as
+      the merged GDP (~1e13) keep their digits in float64. A float32 column stays float32.
+    - String (and categorical) columns with at most `max_category_ratio` distinct values per row and
+      at most `max_categories` distinct values become categoricals. The categories are the sorted values
+      seen by `fit` (a categorical column keeps its own categories, their dtype and order, and `ordered`),
+      so every frame transformed with the plan shares the same categories and codes, and
+      `convert_object_to_category` has nothing left to convert. Values unseen by `fit` become NaN.
+    - Booleans, datetimes and high-cardinality strings (ids, raw timestamps) are kept as they are.
+
+    The plan is a small JSON document (`save` / `load`), so it can be shipped with a model.
+    """
+
+    def __init__(self, max_category_ratio=0.5, max_categories=100_000, downcast_floats=True, exclude=(),
+                 float_rtol=0.0):
+        self.max_category_ratio = max_category_ratio
+        self.max_categories = max_categories
+        self.downcast_floats = downcast_floats
+        self.exclude = list(exclude)
+        self.float_rtol = float_rtol
+        self.dtypes_ = None
+
+    def _plan_column(self, values):
+        if pd.api.types.is_bool_dtype(values.dtype) or pd.api.types.is_datetime64_any_dtype(values.dtype):
+            return None
+        if pd.api.types.is_integer_dtype(values.dtype):
+            if values.empty:
+                return None
+            return {'kind': 'integer', 'dtype': _integer_dtype(values.min(), values.max())}
+        if pd.api.types.is_float_dtype(values.dtype):
+            if self.downcast_floats and _float32_within(values, self.float_rtol):
+                return {'kind': 'float', 'dtype': 'float32'}
+            return None
+
+        is_categorical = isinstance(values.dtype, pd.CategoricalDtype)
+        if is_categorical or values.dtype == object:
+            uniques = values.dropna().unique()
+            if not is_categorical and not all(isinstance(value, str) for value in uniques):
+                return None
+            if len(uniques) > self.max_categories or len(uniques) > self.max_category_ratio * max(len(values), 1):
+                return None
+            if not is_categorical:
+                return {'kind': 'category', 'categories': sorted(uniques), 'categories_dtype': 'object',
+                        'ordered': False}
+            # A categorical keeps its own categories, in their order, with their dtype (int, float or string)
+            categories = values.cat.categories
+            if not (categories.dtype == object or pd.api.types.is_numeric_dtype(categories.dtype)):
+                return None
+            return {'kind': 'category', 'categories': categories.tolist(), 'categories_dtype': str(categories.dtype),
+                    'ordered': bool(values.cat.ordered)}
+        return None
+
+    def fit(self, df):
+        """Plan the dtype of every column of df (columns without a more compact dtype are not in the plan)."""
+        self.dtypes_ = {}
+        for col in df.columns:
+            if col in self.exclude:
+                continue
+            plan = self._plan_column(df[col])
+            if plan is not None:
+                self.dtypes_[str(col)] = plan
+        return self
+
+    def _check_is_fitted(self):
+        if self.dtypes_ is None:
+            raise ValueError("The dtype plan is not fitted yet, call fit first.")
+
+    def _convert(self, values, plan):
+        if plan['kind'] == 'category':
+            categories = pd.Index(plan['categories'], dtype=plan.get('categories_dtype', 'object'))
+            return values.astype(pd.CategoricalDtype(categories, ordered=plan.get('ordered', False)))
+        if plan['kind'] == 'integer':
+            if not pd.api.types.is_integer_dtype(values.dtype):
+                return values
+            info = np.iinfo(plan['dtype'])
+            # A batch outside the range seen by fit keeps its type rather than overflowing
+            if len(values) and (values.min() < info.min or values.max() > info.max):
+                return values
+            return values.astype(plan['dtype'])
+        return values.astype(plan['dtype'])
+
+    def transform(self, df):
+        """Return df with the planned dtypes (df itself is not modified; columns not in the plan are kept)."""
+        self._check_is_fitted()
+        return df.assign(**{
+            col: self._convert(df[col], plan) for col, plan in self.dtypes_.items() if col in df.columns
+        })
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def get_state(self):
+        self._check_is_fitted()
+        return {
+            'max_category_ratio': self.max_category_ratio,
+            'max_categories': self.max_categories,
+            'downcast_floats': self.downcast_floats,
+            'exclude': self.exclude,
+            'float_rtol': self.float_rtol,
+            'dtypes': self.dtypes_
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        plan = cls(state['max_category_ratio'], state['max_categories'], state['downcast_floats'], state['exclude'],
+                   state.get('float_rtol', 0.0))
+        plan.dtypes_ = state['dtypes']
+        return plan
+
+    def save(self, path):
+        """Save the plan as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.get_state(), f)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_state(json.load(f))
+
+
+def compact_frame(df, **plan_kwargs):
+    """
+    Fit a `DtypePlan` on df and return the compacted df, the plan (to apply to later frames) and the
+    `memory_report` of the conversion.
+    """
+    plan = DtypePlan(**plan_kwargs)
+    compacted = plan.fit_transform(df)
+    return compacted, plan, memory_report(df, compacted)
@@ -1,6 +1,37 @@
 ## import needed packages
 import os
 import pandas as pd
+from pandas.api.types import union_categoricals
+from .velocity import VELOCITY_COLUMN, expand_velocity
+from ..profiling.profiler import profiled
+
+## Columns that are not used for the prediction and are dropped right after loading.
+COLUMNS_TO_DROP = [
+    'merchant', 
+    'city', 
+    'device_fingerprint', 
+    'ip_address', 
+    'velocity_last_hour', 
+    'transaction_id', 
+    'card_number',
+    'merchant_type'
+]
+
+## Compact dtypes used when streaming the full dataset, so that no column is parsed into int64/float64/object
+## when a smaller type holds the same information.
+COMPACT_DTYPES = {
+    'currency': 'category',
+    'country': 'category',
+    'channel': 'category',
+    'device': 'category',
+    'amount': 'float32',
+    'distance_from_home': 'int32',
+    'transaction_hour': 'int32',
+    'card_present': 'bool',
+    'high_risk_merchant': 'bool',
+    'weekend_transaction': 'bool',
+    'is_fraud': 'bool'
+}
 
 ## The following two functions were used to read the original dataset csv file and create a sample df selecting at random 10000.
 ## Since the original dataset is too large to upload to github, we only uploaded the sample df and our analysis will start there.
@@ -20,29 +51,99 @@ def sample_data(df, n=10000, random_state=50):
     return df.sample(n=n, random_state=random_state).reset_index(drop=True)
 '''
 
+@profiled
 def load_df():
     """Load the dataset from the given file path."""
     file_path = os.path.join(os.path.dirname(__file__), '../data/dropped_df.csv')
     absolute_path = os.path.abspath(file_path)
     return pd.read_csv(absolute_path) 
 
+@profiled
 def drop_unnecessary_columns(df):
     """
     Drop unnecessary columns from a DataFrame and Returns a new pandas df with the specified columns removed.
     """
-    columns_to_drop = [
-        'merchant', 
-        'city', 
-        'device_fingerprint', 
-        'ip_address', 
-        'velocity_last_hour', 
-        'transaction_id', 
-        'card_number',
-        'merchant_type'
-    ]
-    existing_columns_to_drop = [col for col in columns_to_drop if col in df.columns]
+    existing_columns_to_drop = [col for col in COLUMNS_TO_DROP if col in df.columns]
     
     if not existing_columns_to_drop:
         raise ValueError("The indicated columns don't exits in df")
     
-    return df.drop(columns=existing_columns_to_drop)
\ No newline at end of file
+    return df.drop(columns=existing_columns_to_drop)
+
+
+def _data_path(file_name):
+    """Resolve a file name relative to the package data folder (absolute paths are kept as they are)."""
+    file_path = os.path.join(os.path.dirname(__file__), '../data', file_name)
+    return os.path.abspath(file_path)
+
+
+def load_df_in_chunks(file_name='synthetic_fraud_data.csv', chunksize=500_000, dtype=None, columns_to_drop=None,
+                      parse_velocity=False):
+    """
+    Stream the dataset in chunks of at most `chunksize` rows, so the full 3GB file never has to fit in memory.
+
+    The columns of `drop_unnecessary_columns` are skipped while parsing (through `usecols`), so they are never
+    materialized, and every kept column is parsed straight into the compact dtypes of `COMPACT_DTYPES`.
+
+    - dtype : A dictionary of column dtypes overriding/extending `COMPACT_DTYPES`.
+    - columns_to_drop : The columns to skip while parsing, `COLUMNS_TO_DROP` by default.
+    - parse_velocity : Keep velocity_last_hour, expanded into its numeric fields by `expand_velocity`.
+    """
+    if chunksize <= 0:
+        raise ValueError("chunksize must be a positive number of rows")
+    if columns_to_drop is None:
+        columns_to_drop = COLUMNS_TO_DROP
+    if parse_velocity:
+        columns_to_drop = [col for col in columns_to_drop if col != VELOCITY_COLUMN]
+    absolute_path = _data_path(file_name)
+
+    # Only the header is read here, to know which columns have to be kept
+    header = pd.read_csv(absolute_path, nrows=0).columns
+    if not any(col in header for col in columns_to_drop):
+        raise ValueError("The indicated columns don't exits in df")
+    usecols = [col for col in header if col not in columns_to_drop]
+
+    dtypes = {**COMPACT_DTYPES, **(dtype or {})}
+    dtypes = {col: col_dtype for col, col_dtype in dtypes.items() if col in usecols}
+
+    with pd.read_csv(absolute_path, usecols=usecols, dtype=dtypes, chunksize=chunksize) as reader:
+        for chunk in reader:
+            if parse_velocity and VELOCITY_COLUMN in chunk.columns:
+                chunk = expand_velocity(chunk)
+            yield chunk
+
+
+def concat_chunks(chunks):
+    """
+    Concatenate DataFrame chunks into a single df, keeping categorical columns as categoricals.
+
+    Each chunk only knows the categories it has seen, so the categories of every categorical column
+    are unioned (and sorted) instead of letting pandas fall back to object columns.
+    """
+    chunks = list(chunks)
+    if not chunks:
+        raise ValueError("There are no chunks to concatenate")
+
+    categorical_columns = [col for col in chunks[0].columns if isinstance(chunks[0][col].dtype, pd.CategoricalDtype)]
+    unified = {
+        col: union_categoricals([chunk[col] for chunk in chunks], sort_categories=True).categories
+        for col in categorical_columns
+    }
+    for chunk in chunks:
+        for col, categories in unified.items():
+            chunk[col] = chunk[col].cat.set_categories(categories)
+
+    return pd.concat(chunks, ignore_index=True)
+
+
+@profiled
+def load_df_chunked(file_name='synthetic_fraud_data.csv', chunksize=500_000, dtype=None, parse_velocity=False):
+    """
+    Load the dataset through `load_df_in_chunks` and return it as a single df.
+
+    The result holds the same values as `drop_unnecessary_columns(pd.read_csv(...))`, but with the compact
+    dtypes, so the peak memory is a fraction of the one of the eager read.
+
+    - parse_velocity : Keep velocity_last_hour as its numeric fields (see `load_df_in_chunks`).
+    """
+    return concat_chunks(load_df_in_chunks(file_name, chunksize=chunksize, dtype=dtype, parse_velocity=parse_velocity))
\ No newline at end of file
@@ -0,0 +1,81 @@
+## import needed packages
+import ast
+import io
+import pandas as pd
+from ..profiling.profiler import profiled
+
+VELOCITY_COLUMN = 'velocity_last_hour'
+
+## Fields of velocity_last_hour, in the order they are written in the file, and their dtypes. The dtypes do
+## not depend on the rows: the counts are float32 (exact up to 2**24, and NaN when missing) in every chunk,
+## so chunks concatenate without upcasting, and the amounts keep the float64 precision of the file
+VELOCITY_DTYPES = {
+    'num_transactions': 'float32',
+    'total_amount': 'float64',
+    'unique_merchants': 'float32',
+    'unique_countries': 'float32',
+    'max_single_amount': 'float64'
+}
+
+
+def _typed(parsed):
+    """Cast the parsed fields to `VELOCITY_DTYPES`."""
+    return parsed.astype(VELOCITY_DTYPES)
+
+
+def parse_velocity_literal_eval(values):
+    """Parse velocity_last_hour strings one by one with `ast.literal_eval` (the slow reference parser)."""
+    records = [ast.literal_eval(value) if isinstance(value, str) else {} for value in values]
+    parsed = pd.DataFrame.from_records(records, columns=list(VELOCITY_DTYPES))
+    parsed.index = getattr(values, 'index', parsed.index)
+    return _typed(parsed)
+
+
+## A velocity_last_hour string without its numbers: every row of the file has exactly this layout
+VELOCITY_TEMPLATE = ('{' + ', '.join(f"'{field}': " for field in VELOCITY_DTYPES) + '}').encode()
+
+## Characters of the numbers (Python float reprs without exponent)
+_NUMBER_CHARACTERS = b'0123456789.-+'
+
+
+@profiled
+def parse_velocity(values):
+    """
+    Parse the velocity_last_hour strings (`{'num_transactions': 504, 'total_amount': 14433970.6, ...}`)
+    into one typed column per field of `VELOCITY_DTYPES`, keeping the index of values.
+
+    No Python code runs per row: the strings are joined into one byte string, the digits are deleted and
+    the rest is compared with `VELOCITY_TEMPLATE` for every row at once (which checks the keys, their order
+    and that the numbers are plain decimals), then everything but the numbers and the commas is deleted and
+    the numbers are read by the C parser of `pd.read_csv`. When a row does not follow the template (other
+    keys, another order, an exponent...), the column is parsed with `parse_velocity_literal_eval` instead.
+    Missing values give missing fields.
+    """
+    values = pd.Series(values)
+    missing = values.isna().to_numpy()
+    text = ('\n'.join(values.where(~missing, '').tolist()) + '\n').encode()
+
+    if missing.any():
+        expected = b'\n'.join([b'' if is_missing else VELOCITY_TEMPLATE for is_missing in missing]) + b'\n'
+    else:
+        expected = (VELOCITY_TEMPLATE + b'\n') * len(values)
+    if text.translate(None, _NUMBER_CHARACTERS) != expected:
+        return parse_velocity_literal_eval(values)
+
+    numbers = text.translate(None, bytes(set(VELOCITY_TEMPLATE) - set(b',')))
+    parsed = pd.read_csv(io.BytesIO(numbers), header=None, names=list(VELOCITY_DTYPES), skip_blank_lines=False,
+                         dtype='float64')
+    parsed.index = values.index
+    return _typed(parsed)
+
+
+def expand_velocity(df, col=VELOCITY_COLUMN):
+    """Replace the velocity_last_hour column of df by its parsed fields (see `parse_velocity`)."""
+    if col not in df.columns:
+        raise ValueError(f"The column '{col}' does not exist in the DataFrame.")
+    position = df.columns.get_loc(col)
+    parsed = parse_velocity(df[col])
+    df = df.drop(columns=col)
+    for offset, field in enumerate(parsed.columns):
+        df.insert(position + offset, field, parsed[field])
+    return df
@@ -0,0 +1,5 @@
+# fraud_predictor/profiling/__init__.py
+
+from .profiler import Profiler, profiled, profiled_stage, active_profiler
+
+__all__ = ['Profiler', 'profiled', 'profiled_stage', 'active_profiler']
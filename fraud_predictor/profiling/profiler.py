@@ -0,0 +1,281 @@
+## import needed packages
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+## The profiler the stages report to, None when profiling is disabled
+_active = None
+
+## Stages currently running in every thread (innermost last)
+_local = threading.local()
+
+
+def read_peak_rss():
+    """Peak resident set size of the process in MB (VmHWM on Linux, ru_maxrss elsewhere)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+
+def reset_peak_rss():
+    """Reset the peak RSS to the current RSS, so the next reading is the peak of one stage (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def count_rows(value):
+    """Rows of a frame, array or batch of transactions (of the first element of a tuple), None if unknown."""
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return int(shape[0])
+    if isinstance(value, tuple) and value:
+        return count_rows(value[0])
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        return 1
+    return None
+
+
+class _Frame:
+    """Measurements of a running stage."""
+
+    def __init__(self, name, rows_in):
+        self.name = name
+        self.rows_in = rows_in
+        self.peak_rss_mb = 0.0
+        self.peak_traced = 0
+
+
+class Profiler:
+    """
+    Record the wall time, CPU time, rows in and out, allocated bytes and peak RSS of every pipeline stage
+    (the functions decorated with `profiled`, and the blocks of `profiled_stage`) run while it is enabled.
+
+    Stages can be nested (build_features inside create_features...): the peak of a stage includes the peaks of
+    the stages it runs. The CPU time is the CPU time of the process, so it includes the threads of LightGBM.
+
+    - trace_memory : Measure the bytes allocated by Python and NumPy with tracemalloc (slows the stages down).
+    - peak_rss : Measure the peak RSS of every stage. The peak is reset at the start of every stage, which is
+      process-wide, so stages running in parallel threads share their peaks.
+    - max_records : Number of stage runs kept for `to_chrome_trace` (a scoring service runs stages forever);
+      the totals of `summary` and `to_prometheus` cover every run.
+
+    Use it as a context manager, or with `enable` / `disable` for a long-running process.
+    """
+
+    def __init__(self, trace_memory=False, peak_rss=True, max_records=100_000):
+        self.trace_memory = trace_memory
+        self.peak_rss = peak_rss
+        self.max_records = max_records
+        self.records = []
+        self.dropped_records = 0
+        self.totals = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._previous = None
+        self._started_tracemalloc = False
+
+    def enable(self):
+        global _active
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._previous, _active = _active, self
+        return self
+
+    def disable(self):
+        global _active
+        _active = self._previous
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        return self
+
+    def __enter__(self):
+        return self.enable()
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def _start(self, name, rows_in):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        frame = _Frame(name, rows_in)
+        # The resets below would hide the peak of the enclosing stage so far, which is saved first
+        if stack:
+            parent = stack[-1]
+            if self.peak_rss:
+                parent.peak_rss_mb = max(parent.peak_rss_mb, read_peak_rss())
+            if self.trace_memory:
+                parent.peak_traced = max(parent.peak_traced, tracemalloc.get_traced_memory()[1])
+        if self.peak_rss:
+            reset_peak_rss()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            frame.traced_start = tracemalloc.get_traced_memory()[0]
+        stack.append(frame)
+        frame.start, frame.cpu_start = time.perf_counter(), time.process_time()
+        return frame
+
+    def _stop(self, frame, output):
+        seconds = time.perf_counter() - frame.start
+        cpu_seconds = time.process_time() - frame.cpu_start
+        stack = _local.stack
+        stack.pop()
+        record = {
+            'stage': frame.name,
+            'start': frame.start - self._origin,
+            'seconds': seconds,
+            'cpu_seconds': cpu_seconds,
+            'rows_in': frame.rows_in,
+            'rows_out': count_rows(output),
+            'bytes_allocated': None,
+            'peak_rss_mb': None,
+            'thread': threading.get_ident()
+        }
+        if self.peak_rss:
+            frame.peak_rss_mb = max(frame.peak_rss_mb, read_peak_rss())
+            record['peak_rss_mb'] = frame.peak_rss_mb
+        if self.trace_memory:
+            frame.peak_traced = max(frame.peak_traced, tracemalloc.get_traced_memory()[1])
+            record['bytes_allocated'] = max(frame.peak_traced - frame.traced_start, 0)
+        if stack:
+            stack[-1].peak_rss_mb = max(stack[-1].peak_rss_mb, frame.peak_rss_mb)
+            stack[-1].peak_traced = max(stack[-1].peak_traced, frame.peak_traced)
+        self._add(record)
+
+    def _add(self, record):
+        with self._lock:
+            if len(self.records) < self.max_records:
+                self.records.append(record)
+            else:
+                self.dropped_records += 1
+            totals = self.totals.setdefault(record['stage'], {
+                'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'rows_in': 0, 'rows_out': 0,
+                'max_bytes_allocated': None, 'max_peak_rss_mb': None
+            })
+            totals['calls'] += 1
+            totals['seconds'] += record['seconds']
+            totals['cpu_seconds'] += record['cpu_seconds']
+            totals['rows_in'] += record['rows_in'] or 0
+            totals['rows_out'] += record['rows_out'] or 0
+            for key, total_key in (('bytes_allocated', 'max_bytes_allocated'), ('peak_rss_mb', 'max_peak_rss_mb')):
+                if record[key] is not None:
+                    totals[total_key] = max(totals[total_key] or 0, record[key])
+
+    def summary(self):
+        """Return the totals of every stage (calls, seconds, CPU seconds, rows, max bytes and peak RSS)."""
+        with self._lock:
+            return {stage: dict(totals) for stage, totals in self.totals.items()}
+
+    def to_chrome_trace(self, path=None):
+        """
+        Return the recorded stages in the Chrome trace event format (one complete event per stage run, with
+        the measurements as arguments), written to path when given. Open it in chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        with self._lock:
+            records = list(self.records)
+        events = [{
+            'name': record['stage'], 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': record['thread'],
+            'ts': record['start'] * 1e6, 'dur': record['seconds'] * 1e6,
+            'args': {key: record[key] for key in ('cpu_seconds', 'rows_in', 'rows_out', 'bytes_allocated', 'peak_rss_mb')}
+        } for record in records]
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(trace, f)
+        return trace
+
+    def to_prometheus(self, prefix='fraud_predictor_stage'):
+        """Return the totals of every stage in the Prometheus text exposition format."""
+        metrics = [
+            ('calls_total', 'counter', 'Number of runs of the stage.', 'calls', 1),
+            ('seconds_total', 'counter', 'Wall time spent in the stage.', 'seconds', 1),
+            ('cpu_seconds_total', 'counter', 'CPU time of the process during the stage.', 'cpu_seconds', 1),
+            ('rows_in_total', 'counter', 'Rows given to the stage.', 'rows_in', 1),
+            ('rows_out_total', 'counter', 'Rows returned by the stage.', 'rows_out', 1),
+            ('allocated_bytes_max', 'gauge', 'Largest allocation peak of one run of the stage.', 'max_bytes_allocated', 1),
+            ('peak_rss_bytes_max', 'gauge', 'Largest peak RSS during one run of the stage.', 'max_peak_rss_mb', 1024**2)
+        ]
+        summary = self.summary()
+        lines = []
+        for suffix, kind, help_text, key, scale in metrics:
+            values = [(stage, totals[key]) for stage, totals in summary.items() if totals[key] is not None]
+            if not values:
+                continue
+            lines += [f"# HELP {prefix}_{suffix} {help_text}", f"# TYPE {prefix}_{suffix} {kind}"]
+            lines += [f'{prefix}_{suffix}{{stage="{stage}"}} {value * scale:g}' for stage, value in values]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+def active_profiler():
+    """The enabled `Profiler`, None when profiling is disabled."""
+    return _active
+
+
+class profiled_stage:
+    """
+    Record a block as a stage of the enabled profiler (nothing when profiling is disabled):
+
+        with profiled_stage('load', rows_in=len(df)) as stage:
+            ...
+            stage.output = result   # optional, for the rows out
+    """
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.output = None
+
+    def __enter__(self):
+        self._profiler = _active
+        if self._profiler is not None:
+            self._frame = self._profiler._start(self.name, self.rows_in)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._profiler is not None:
+            self._profiler._stop(self._frame, self.output)
+
+
+def profiled(func):
+    """
+    Record every call of func as a stage named after it, with the rows of its first argument (after self
+    for a method) and of its output. When profiling is disabled the cost is one global lookup per call.
+    """
+    name = func.__qualname__
+    # A function defined in a class body gets self first (a bound method does not)
+    rows_arg = 1 if '.' in name and '<locals>' not in name and not hasattr(func, '__self__') else 0
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return func(*args, **kwargs)
+        frame = profiler._start(name, count_rows(args[rows_arg]) if len(args) > rows_arg else None)
+        output = None
+        try:
+            output = func(*args, **kwargs)
+            return output
+        finally:
+            profiler._stop(frame, output)
+    return wrapper
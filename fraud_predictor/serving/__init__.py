@@ -0,0 +1,6 @@
+# fraud_predictor/serving/__init__.py
+
+from .batching import MicroBatcher, ServingMetrics
+from .hot_swap import HotSwapScorer
+
+__all__ = ['MicroBatcher', 'ServingMetrics', 'HotSwapScorer']
@@ -0,0 +1,216 @@
+## import needed packages
+import asyncio
+import bisect
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+## Upper bounds of the histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+## Queued by `MicroBatcher.stop`: the batching loop scores everything queued before it, then exits
+_STOP = object()
+
+
+class Histogram:
+    """A fixed-bucket histogram (count per upper bound, plus the total count and sum)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket holding the q-quantile (inf when it is past the last bucket)."""
+        if not self.count:
+            return float('nan')
+        rank, cumulative = q * self.count, 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        labels = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {'buckets': dict(zip(labels, self.counts)), 'count': self.count, 'sum': self.sum}
+
+    def to_prometheus(self, name, help_text):
+        """Return the histogram in the Prometheus text format (cumulative buckets, sum and count)."""
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, count in zip([str(bound) for bound in self.buckets] + ['+Inf'], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        return lines + [f"{name}_sum {self.sum:g}", f"{name}_count {self.count}"]
+
+
+class ServingMetrics:
+    """Queue depth, batch sizes and latencies of a `MicroBatcher`."""
+
+    def __init__(self):
+        self.queue_depth = 0
+        self.requests = 0
+        self.errors = 0
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.request_latency = Histogram(LATENCY_BUCKETS)
+        self.inference_latency = Histogram(LATENCY_BUCKETS)
+
+    def snapshot(self):
+        return {
+            'queue_depth': self.queue_depth,
+            'requests': self.requests,
+            'errors': self.errors,
+            'batch_size': self.batch_size.snapshot(),
+            'request_latency_seconds': self.request_latency.snapshot(),
+            'inference_latency_seconds': self.inference_latency.snapshot()
+        }
+
+    def to_prometheus(self, prefix='fraud_predictor_serving'):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_queue_depth Transactions waiting to be scored.", f"# TYPE {prefix}_queue_depth gauge",
+            f"{prefix}_queue_depth {self.queue_depth}",
+            f"# HELP {prefix}_requests_total Transactions received.", f"# TYPE {prefix}_requests_total counter",
+            f"{prefix}_requests_total {self.requests}",
+            f"# HELP {prefix}_errors_total Transactions that failed to score.", f"# TYPE {prefix}_errors_total counter",
+            f"{prefix}_errors_total {self.errors}"
+        ]
+        lines += self.batch_size.to_prometheus(f"{prefix}_batch_size", "Transactions per scored batch.")
+        lines += self.request_latency.to_prometheus(f"{prefix}_request_latency_seconds",
+                                                    "Time from the arrival of a transaction to its score.")
+        lines += self.inference_latency.to_prometheus(f"{prefix}_inference_latency_seconds",
+                                                      "Time to score one batch.")
+        return '\n'.join(lines) + '\n'
+
+
+class MicroBatcher:
+    """
+    Queue incoming transactions and score them in batches, so concurrent requests share one vectorized
+    LightGBM call instead of paying one call each.
+
+    A batch is flushed as soon as it holds `max_batch_size` transactions or `max_delay` seconds after its
+    first transaction arrived, whichever comes first. Inference runs in a thread pool, so the event loop
+    keeps accepting requests while a batch is being scored.
+
+    - predict_batch : A function taking a list of transactions and returning one probability per
+      transaction, e.g. `TransactionScorer(...).predict_proba`.
+    - max_workers : Number of batches that can be scored at the same time.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=64, max_delay=0.002, max_workers=1):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_workers = max_workers
+        self.metrics = ServingMetrics()
+        self._queue = None
+        self._task = None
+        self._executor = None
+        self._slots = None
+        self._inflight = set()
+
+    async def start(self):
+        """Start the batching loop (on the running event loop)."""
+        if self._task is not None:
+            return self
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scoring')
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        """
+        Stop the batching loop once the queued and in-flight transactions are scored, including the batch
+        being collected. New transactions are refused from the call on.
+        """
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(_STOP)
+        await task
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    async def score(self, transaction):
+        """Queue one transaction and wait for its probability."""
+        if self._task is None:
+            raise RuntimeError("The batcher is not started, call start first.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((transaction, future, time.perf_counter()))
+        self.metrics.queue_depth = self._queue.qsize()
+        return await future
+
+    async def _next_batch(self):
+        """
+        Wait for a first transaction, then collect more until the batch is full or the deadline passes.
+        Returns the batch and whether the stop marker was reached (the batch then ends before it).
+        """
+        loop = asyncio.get_running_loop()
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch, stopping = [item], False
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        self.metrics.queue_depth = self._queue.qsize()
+        return batch, stopping
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if not batch:
+                continue
+            await self._slots.acquire()
+            task = asyncio.get_running_loop().create_task(self._score_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _score_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        transactions = [transaction for transaction, _, _ in batch]
+        self.metrics.batch_size.observe(len(batch))
+        start = time.perf_counter()
+        try:
+            probabilities = await loop.run_in_executor(self._executor, self.predict_batch, transactions)
+            if len(probabilities) != len(batch):
+                # zip would leave the futures past the shorter side unresolved, and their requests hanging
+                raise ValueError(f"predict_batch returned {len(probabilities)} scores for {len(batch)} transactions.")
+        except Exception as e:
+            self.metrics.errors += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        end = time.perf_counter()
+        self.metrics.inference_latency.observe(end - start)
+
+        for (_, future, queued_at), probability in zip(batch, probabilities):
+            self.metrics.requests += 1
+            self.metrics.request_latency.observe(end - queued_at)
+            if not future.done():
+                future.set_result(float(probability))
@@ -0,0 +1,82 @@
+## import needed packages
+import asyncio
+import threading
+import time
+
+
+class HotSwapScorer:
+    """
+    Score with the active version of an `ArtifactStore`, and switch to a new version while serving.
+
+    `predict_proba` reads the current scorer once per batch, so a swap is a single reference assignment:
+    a batch being scored finishes with the version it started with, the next batches use the new one, and
+    no request waits for a reload. A new version is loaded (memory-mapped) before the swap, outside of the
+    scoring path; a version that fails to load leaves the current one in place.
+
+    - store : The `ArtifactStore` to serve from.
+    - kind : The scorer of every bundle, 'compiled' or 'booster' (see `ModelBundle.scorer`).
+
+    Usable as the `predict_batch` of a `MicroBatcher`: `MicroBatcher(HotSwapScorer(store).predict_proba)`.
+    """
+
+    def __init__(self, store, kind='booster', num_threads=1):
+        self.store = store
+        self.kind = kind
+        self.num_threads = num_threads
+        self.swaps = 0
+        self.last_swap_seconds = None
+        self.last_error = None
+        # Only serializes the reloads; scoring never takes it
+        self._reload_lock = threading.Lock()
+        self._current = self._load(store.current_version())
+
+    def _load(self, version):
+        bundle = self.store.load(version)
+        return bundle, bundle.scorer(self.kind, num_threads=self.num_threads)
+
+    @property
+    def version(self):
+        return self._current[0].version
+
+    @property
+    def bundle(self):
+        return self._current[0]
+
+    def predict_proba(self, rows):
+        """Return the fraud probability of every transaction of `rows` with the current version."""
+        _, scorer = self._current
+        return scorer.predict_proba(rows)
+
+    def swap(self, version=None):
+        """
+        Load a version (the active one of the store by default) and make it the current one.
+        Returns True when the version changed.
+        """
+        with self._reload_lock:
+            version = version or self.store.current_version()
+            if version == self.version:
+                return False
+            start = time.perf_counter()
+            loaded = self._load(version)
+            self._current = loaded
+            self.swaps += 1
+            self.last_swap_seconds = time.perf_counter() - start
+            return True
+
+    def refresh(self):
+        """Swap to the active version of the store if it changed; errors are kept in `last_error`."""
+        try:
+            swapped = self.swap()
+        except Exception as e:
+            self.last_error = e
+            return False
+        self.last_error = None
+        return swapped
+
+    async def watch(self, interval=5.0):
+        """Check the store every `interval` seconds and swap to a newly activated version (until cancelled)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            # The load reads files: it runs in a thread so the event loop keeps serving meanwhile
+            await loop.run_in_executor(None, self.refresh)
@@ -0,0 +1,198 @@
+"""
+A minimal localhost HTTP/1.1 front-end for the `MicroBatcher`, meant to test the scoring service without
+any outside infrastructure.
+
+    POST /score    {"transaction": {...}} -> {"probability": p}
+                   {"transactions": [{...}, ...]} -> {"probabilities": [p, ...]}
+    GET  /metrics  the batcher metrics as JSON
+    GET  /metrics/prometheus  the batcher metrics, and the stage totals of the profiler, as Prometheus text
+    GET  /health   {"status": "ok"} (plus "model_version" when serving from an artifact store)
+    POST /reload   swap to the active version of the artifact store -> {"swapped": bool, "model_version": v}
+
+Run a demo server (a model trained on the sample data with the notebook steps) with:
+    python -m fraud_predictor.serving.http_server --port 8080
+or serve the active version of an `ArtifactStore`, swapping to a newly activated version every 5 seconds:
+    python -m fraud_predictor.serving.http_server --store models/ --poll-seconds 5
+"""
+## import needed packages
+import argparse
+import asyncio
+import json
+from .batching import MicroBatcher
+from .hot_swap import HotSwapScorer
+from ..profiling.profiler import Profiler
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class ScoringServer:
+    """
+    Serve the scores of a `MicroBatcher` over HTTP, with keep-alive connections.
+
+    - profiler : A `Profiler` whose stage totals are added to /metrics/prometheus.
+    - model : The `HotSwapScorer` of the batcher, to report its version and reload it over HTTP.
+    - poll_seconds : Check the store of model for a newly activated version every poll_seconds while serving
+      (see `HotSwapScorer.watch`).
+    """
+
+    def __init__(self, batcher, host='127.0.0.1', port=8080, profiler=None, model=None, poll_seconds=None):
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self.profiler = profiler
+        self.model = model
+        self.poll_seconds = poll_seconds
+        self._server = None
+        # The event loop only keeps a weak reference to its tasks
+        self._watch_task = None
+
+    async def start(self):
+        await self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # With port=0 the OS picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.model is not None and self.poll_seconds:
+            self._watch_task = asyncio.get_running_loop().create_task(self.model.watch(self.poll_seconds))
+        return self
+
+    async def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+        self._server.close()
+        await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self._route(method, path, body)
+                if isinstance(payload, str):
+                    data, content_type = payload.encode(), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(payload).encode(), 'application/json'
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok', **({'model_version': self.model.version} if self.model is not None else {})}
+        if path == '/reload':
+            if self.model is None:
+                return 404, {'error': "The server does not serve from an artifact store"}
+            if method != 'POST':
+                return 405, {'error': "Use POST to reload the model"}
+            # The new version is loaded in a thread: the batches keep being scored with the current one. The
+            # error is caught here rather than read from last_error, which a concurrent watch can overwrite
+            try:
+                swapped = await asyncio.get_running_loop().run_in_executor(None, self.model.swap)
+            except Exception as e:
+                return 500, {'error': str(e), 'model_version': self.model.version}
+            return 200, {'swapped': swapped, 'model_version': self.model.version}
+        if path == '/metrics':
+            return 200, self.batcher.metrics.snapshot()
+        if path == '/metrics/prometheus':
+            text = self.batcher.metrics.to_prometheus()
+            return 200, text + (self.profiler.to_prometheus() if self.profiler is not None else '')
+        if path != '/score':
+            return 404, {'error': f"Unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error': "Use POST to score transactions"}
+
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError as e:
+            return 400, {'error': f"Invalid JSON: {e}"}
+        if not isinstance(request, dict):
+            return 400, {'error': "Expected a JSON object with a 'transaction' or 'transactions' field"}
+        try:
+            if 'transaction' in request:
+                return 200, {'probability': await self.batcher.score(request['transaction'])}
+            if 'transactions' in request:
+                probabilities = await asyncio.gather(*(self.batcher.score(t) for t in request['transactions']))
+                return 200, {'probabilities': list(probabilities)}
+        except Exception as e:
+            return 500, {'error': str(e)}
+        return 400, {'error': "Expected a 'transaction' or 'transactions' field"}
+
+
+def build_demo_scorer():
+    """Train a model on the sample data with the notebook steps and wrap it in a `TransactionScorer`."""
+    from ..preprocessors.preprocessing import load_df, drop_unnecessary_columns
+    from ..features.feature_engine import build_features
+    from ..model.model_and_metrics import split_data, convert_object_to_category, train_optimized_lightgbm
+    from ..model.scoring import TransactionScorer
+
+    df = build_features(drop_unnecessary_columns(load_df()))
+    X_train, X_test, y_train, _ = split_data(df)
+    X_train, X_test = convert_object_to_category(X_train, X_test)
+    best_params = {'n_estimators': 200, 'max_depth': 7, 'learning_rate': 0.1, 'max_bin': 1500, 'num_leaves': 50}
+    model = train_optimized_lightgbm(X_train, y_train, best_params)
+    return TransactionScorer(model, X_train)
+
+
+async def _serve(args):
+    model = None
+    if args.store:
+        from ..model.artifacts import ArtifactStore
+        model = HotSwapScorer(ArtifactStore(args.store), kind=args.scorer)
+        scorer = model
+    else:
+        scorer = build_demo_scorer()
+    batcher = MicroBatcher(scorer.predict_proba, max_batch_size=args.max_batch_size,
+                           max_delay=args.max_delay_ms / 1e3, max_workers=args.workers)
+    # Resetting the process peak RSS on every batch would cost more than the scoring itself
+    profiler = Profiler(peak_rss=False, max_records=0).enable() if args.profile else None
+    server = await ScoringServer(batcher, host=args.host, port=args.port, profiler=profiler, model=model,
+                                 poll_seconds=args.poll_seconds).start()
+    print(f"Serving on http://{server.host}:{server.port}" + (f" (model {model.version})" if model else ""))
+    await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--profile', action='store_true', help="Add the scoring stage totals to /metrics/prometheus")
+    parser.add_argument('--store', help="Serve the active version of this artifact store instead of the demo model")
+    parser.add_argument('--scorer', choices=['compiled', 'booster'], default='booster')
+    parser.add_argument('--poll-seconds', type=float, default=0,
+                        help="Swap to a newly activated version of the store every N seconds (0: only on POST /reload)")
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
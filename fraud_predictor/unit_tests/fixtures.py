@@ -0,0 +1,37 @@
+"""Small synthetic fraud data and models shared by the model tests."""
+## import needed packages
+import numpy as np
+import pandas as pd
+from fraud_predictor.model.model_and_metrics import split_data, convert_object_to_category, train_optimized_lightgbm
+
+## Parameters of the small models of the tests
+SMALL_MODEL_PARAMS = {'n_estimators': 20, 'max_depth': 3, 'learning_rate': 0.1, 'max_bin': 63, 'num_leaves': 7}
+
+
+def make_fraud_frame(n, categories=('A', 'B', 'C'), with_bool=False, with_missing=False, seed=0):
+    """
+    A frame with a numerical feature shifted by the target, a string category, optionally a boolean and a
+    numerical feature with 20% of missing values, and an is_fraud target (about 30% of frauds).
+    """
+    rng = np.random.default_rng(seed)
+    columns = {'feature_num': rng.normal(size=n), 'feature_cat': rng.choice(list(categories), n)}
+    if with_bool:
+        columns['feature_bool'] = rng.random(n) > 0.5
+    if with_missing:
+        columns['feature_missing'] = np.where(rng.random(n) > 0.8, np.nan, rng.normal(size=n))
+    columns['is_fraud'] = rng.random(n) > 0.7
+    df = pd.DataFrame(columns)
+    df['feature_num'] += df['is_fraud'] * 1.5
+    return df
+
+
+def split_categorized(df, test_size=0.25, random_state=1):
+    """Split df as the notebook does and convert the string columns to shared categories."""
+    X_train, X_test, y_train, y_test = split_data(df, test_size=test_size, random_state=random_state)
+    X_train, X_test = convert_object_to_category(X_train.copy(), X_test.copy())
+    return X_train, X_test, y_train, y_test
+
+
+def train_small_model(X_train, y_train, **params):
+    """Train a model with `SMALL_MODEL_PARAMS`, overridden by params."""
+    return train_optimized_lightgbm(X_train, y_train, {**SMALL_MODEL_PARAMS, **params})
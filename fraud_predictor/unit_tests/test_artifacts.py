@@ -0,0 +1,149 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.model.model_and_metrics import predict_proba
+from fraud_predictor.model.artifacts import ArtifactStore
+from fraud_predictor.model.encoding import CategoryEncoder
+from fraud_predictor.features.feature_state import FeatureState
+from fraud_predictor.serving.hot_swap import HotSwapScorer
+from fraud_predictor.unit_tests.fixtures import make_fraud_frame, split_categorized, train_small_model
+
+def make_model(seed=0, n_estimators=30):
+    df = make_fraud_frame(600, categories=('A', 'B', 'C', 'D'), with_missing=True, seed=seed)
+    X_train, X_test, y_train, _ = split_categorized(df)
+    model = train_small_model(X_train, y_train, n_estimators=n_estimators, max_depth=4, num_leaves=15)
+    return model, X_train, X_test
+
+class TestArtifactStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ArtifactStore(os.path.join(self.tmp.name, 'models'))
+        self.model, self.X_train, self.X_test = make_model()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        version = self.store.save(self.model, self.X_train, metadata={'roc_auc': 0.9})
+        self.assertEqual(version, 'v000001')
+        self.assertEqual(self.store.current_version(), version)
+        bundle = self.store.load()
+        self.assertEqual(bundle.version, version)
+        self.assertEqual(bundle.manifest['metadata'], {'roc_auc': 0.9})
+        self.assertEqual(bundle.feature_names, list(self.X_train.columns))
+        self.assertEqual(bundle.category_maps['feature_cat'], ['A', 'B', 'C', 'D'])
+        expected = predict_proba(self.model, self.X_test)
+        np.testing.assert_allclose(bundle.compiled.predict_proba(self.X_test), expected, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(bundle.scorer('booster').predict_proba(self.X_test.to_dict('records')),
+                                   expected, rtol=0, atol=1e-12)
+        reference = bundle.reference_frame()
+        self.assertEqual(len(reference), 0)
+        self.assertEqual(dict(reference.dtypes), dict(self.X_train.dtypes))
+
+    def test_arrays_are_memory_mapped(self):
+        self.store.save(self.model, self.X_train)
+        mapped = self.store.load().compiled.leaf_value
+        self.assertIsInstance(mapped.base, np.memmap)
+        self.assertFalse(mapped.flags.writeable)
+        self.assertNotIsInstance(self.store.load(mmap=False).compiled.leaf_value.base, np.memmap)
+
+    def test_feature_state_and_encoder(self):
+        train = pd.DataFrame({
+            'timestamp': ['2023-01-01 00:30:00', '2023-01-01 12:00:00', '2023-01-02 18:45:00'],
+            'customer_id': ['C1', 'C1', 'C2'],
+            'channel': ['web', 'mobile', 'web'],
+            'device': ['Edge', 'iOS App', 'Chrome'],
+            'merchant_category': ['Retail', 'Gas', 'Retail'],
+            'amount': [10.0, 20.0, 30.0]
+        })
+        feature_state = FeatureState().fit(train.copy())
+        encoder = CategoryEncoder(max_categories=2, high_cardinality='frequency').fit(train)
+        self.store.save(self.model, self.X_train, feature_state=feature_state, encoder=encoder)
+        bundle = self.store.load()
+        self.assertEqual(bundle.feature_state.config, feature_state.config)
+        for key, values in feature_state.get_state().items():
+            np.testing.assert_array_equal(bundle.feature_state.get_state()[key], values)
+        pd.testing.assert_frame_equal(bundle.encoder.transform(train.copy()), encoder.transform(train.copy()))
+
+    def test_versions_and_activation(self):
+        first = self.store.save(self.model, self.X_train)
+        second = self.store.save(self.model, self.X_train, activate=False)
+        self.assertEqual(self.store.versions(), ['v000001', 'v000002'])
+        self.assertEqual(self.store.current_version(), first)
+        self.store.activate(second)
+        self.assertEqual(self.store.load().version, second)
+        self.assertEqual(self.store.load(first).version, first)
+        with self.assertRaises(ValueError):
+            self.store.activate('v000009')
+        # No temporary file or directory is left behind
+        self.assertEqual(sorted(os.listdir(self.store.root)), ['CURRENT', 'v000001', 'v000002'])
+
+    def test_prune_keeps_the_active_version(self):
+        versions = [self.store.save(self.model, self.X_train, activate=False) for _ in range(4)]
+        self.store.activate(versions[0])
+        self.assertEqual(self.store.prune(keep=2), [versions[1]])
+        self.assertEqual(self.store.versions(), [versions[0], versions[2], versions[3]])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.store.load()
+        with self.assertRaises(ValueError):
+            self.store.save(self.model, self.X_train.iloc[:, ::-1])
+        self.store.save(self.model, self.X_train)
+        manifest_path = os.path.join(self.store.root, 'v000001', 'manifest.json')
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        with open(manifest_path, 'w') as f:
+            json.dump({**manifest, 'format': 99}, f)
+        with self.assertRaises(ValueError):
+            self.store.load()
+
+class TestHotSwapScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ArtifactStore(self.tmp.name)
+        self.model, self.X_train, self.X_test = make_model()
+        self.other_model, _, _ = make_model(seed=1, n_estimators=10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_swap_to_the_active_version(self):
+        self.store.save(self.model, self.X_train)
+        scorer = HotSwapScorer(self.store)
+        rows = self.X_test.to_dict('records')
+        np.testing.assert_allclose(scorer.predict_proba(rows), predict_proba(self.model, self.X_test), atol=1e-6)
+        self.assertFalse(scorer.refresh())
+
+        self.store.save(self.other_model, self.X_train)
+        self.assertTrue(scorer.refresh())
+        self.assertEqual((scorer.version, scorer.swaps), ('v000002', 1))
+        np.testing.assert_allclose(scorer.predict_proba(rows), predict_proba(self.other_model, self.X_test),
+                                   atol=1e-6)
+
+    def test_in_flight_batch_keeps_its_version(self):
+        self.store.save(self.model, self.X_train)
+        scorer = HotSwapScorer(self.store, kind='booster')
+        _, old_scorer = scorer._current
+        self.store.save(self.other_model, self.X_train)
+        scorer.swap()
+        # A batch that read the scorer before the swap still scores with the old model
+        np.testing.assert_allclose(old_scorer.predict_proba(self.X_test.to_dict('records')),
+                                   predict_proba(self.model, self.X_test))
+
+    def test_failed_reload_keeps_the_current_version(self):
+        self.store.save(self.model, self.X_train)
+        scorer = HotSwapScorer(self.store)
+        version = self.store.save(self.other_model, self.X_train)
+        os.remove(os.path.join(self.store.root, version, 'compiled', 'leaf_value.npy'))
+        self.assertFalse(scorer.refresh())
+        self.assertIsInstance(scorer.last_error, FileNotFoundError)
+        self.assertEqual(scorer.version, 'v000001')
+
+if __name__ == '__main__':
+    unittest.main()
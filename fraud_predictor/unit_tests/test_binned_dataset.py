@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from fraud_predictor.model.binned_dataset import BinnedDatasets, frame_digest
+from fraud_predictor.model.tuning import lightgbm_train_params, train_binned_lightgbm
+from fraud_predictor.model.scoring import TransactionScorer
+from fraud_predictor.unit_tests.fixtures import make_fraud_frame, split_categorized
+
+class TestBinnedDatasets(unittest.TestCase):
+
+    def setUp(self):
+        self.X_train, self.X_test, self.y_train, _ = split_categorized(make_fraud_frame(500))
+        self.params = lightgbm_train_params({'num_leaves': 7, 'learning_rate': 0.1, 'max_bin': 63})
+
+    def test_dataset_built_once_per_max_bin(self):
+        datasets = BinnedDatasets(self.X_train, self.y_train)
+        self.assertIs(datasets.get(63), datasets.get(63))
+        self.assertIsNot(datasets.get(63), datasets.get(127))
+        self.assertEqual(datasets.subset(np.arange(100), 63).construct().num_data(), 100)
+
+    def test_binary_cache_is_reloaded(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first = BinnedDatasets(self.X_train, self.y_train, cache_dir=cache_dir)
+            booster = first.train(self.params, num_boost_round=20)
+            self.assertEqual(len([f for f in os.listdir(cache_dir) if f.endswith('.bin')]), 1)
+
+            second = BinnedDatasets(self.X_train, self.y_train, cache_dir=cache_dir)
+            reloaded = second.train(self.params, num_boost_round=20)
+            self.assertEqual(reloaded.pandas_categorical, booster.pandas_categorical)
+            np.testing.assert_allclose(reloaded.predict(self.X_test), booster.predict(self.X_test))
+
+    def test_digest_depends_on_data(self):
+        y_changed = self.y_train.copy()
+        y_changed.iloc[0] = not y_changed.iloc[0]
+        self.assertEqual(frame_digest(self.X_train, self.y_train), frame_digest(self.X_train.copy(), self.y_train))
+        self.assertNotEqual(frame_digest(self.X_train, self.y_train), frame_digest(self.X_train, y_changed))
+
+    def test_train_binned_lightgbm_scores_with_transaction_scorer(self):
+        best_params = {'n_estimators': 20, 'max_depth': 3, 'learning_rate': 0.1, 'max_bin': 63, 'num_leaves': 7}
+        booster = train_binned_lightgbm(BinnedDatasets(self.X_train, self.y_train), best_params)
+        self.assertEqual(booster.current_iteration(), 20)
+        scorer = TransactionScorer(booster, self.X_train)
+        np.testing.assert_allclose(scorer.predict_proba(self.X_test.astype(object).to_numpy()), booster.predict(self.X_test))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from benchmarks.check_regression import find_regressions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_report(commit, seconds, peak_rss_mb=100.0):
+    return {'commit': commit, 'results': [
+        {'rows': 1000, 'stage': stage, 'seconds': value, 'peak_rss_mb': peak_rss_mb}
+        for stage, value in seconds.items()
+    ]}
+
+class TestCheckRegression(unittest.TestCase):
+
+    def setUp(self):
+        self.baseline = make_report('a', {'load_df': 1.0, 'build_features': 2.0, 'predict_proba': 0.01})
+
+    def run_check(self, current, *args):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for name, report in [('baseline', self.baseline), ('current', current)]:
+                paths.append(os.path.join(tmp_dir, f'{name}.json'))
+                with open(paths[-1], 'w') as f:
+                    json.dump(report, f)
+            return subprocess.run([sys.executable, '-m', 'benchmarks.check_regression', *paths, *args], cwd=ROOT,
+                                  capture_output=True, text=True)
+
+    def test_regression_fails(self):
+        current = make_report('b', {'load_df': 1.1, 'build_features': 3.0, 'predict_proba': 0.01})
+        result = self.run_check(current, '--threshold', '1.25')
+        self.assertEqual(result.returncode, 1)
+        self.assertIn('REGRESSION build_features (rows=1,000): 2.000s -> 3.000s (1.50x)', result.stdout)
+        self.assertNotIn('load_df', result.stdout)
+
+    def test_pass(self):
+        current = make_report('b', {'load_df': 1.2, 'build_features': 1.5, 'new_stage': 9.0})
+        result = self.run_check(current, '--threshold', '1.25')
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertIn('No stage regressed past 1.25x (a -> b)', result.stdout)
+
+    def test_short_stages_and_memory(self):
+        # predict_proba is 3x slower but by less than min_seconds: timer noise, not a regression
+        current = make_report('b', {'load_df': 1.0, 'build_features': 2.0, 'predict_proba': 0.03}, peak_rss_mb=200)
+        self.assertListEqual(find_regressions(self.baseline, current), [])
+        regressions = find_regressions(self.baseline, current, memory_threshold=1.5)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all('peak RSS 100MB -> 200MB' in message for message in regressions))
+
+
+if __name__ == '__main__':
+    unittest.main()
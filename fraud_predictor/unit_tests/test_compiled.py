@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from fraud_predictor.model.model_and_metrics import predict_proba
+from fraud_predictor.model.compiled import CompiledModel, export_compiled_model
+from fraud_predictor.unit_tests.fixtures import make_fraud_frame, split_categorized, train_small_model
+
+class TestCompiledModel(unittest.TestCase):
+
+    def setUp(self):
+        self.df = make_fraud_frame(600, categories=('A', 'B', 'C', 'D'), with_bool=True, with_missing=True)
+        # A category that decides the target, so the trees get categorical splits
+        self.df.loc[self.df['feature_cat'] == 'A', 'is_fraud'] = True
+        self.X_train, self.X_test, y_train, _ = split_categorized(self.df)
+        self.model = train_small_model(self.X_train, y_train, n_estimators=30, max_depth=4, num_leaves=15)
+        self.compiled = export_compiled_model(self.model, self.X_train)
+
+    def test_frame_matches_predict_proba(self):
+        self.assertTrue(self.compiled.is_categorical.any())
+        np.testing.assert_allclose(self.compiled.predict_proba(self.X_test), predict_proba(self.model, self.X_test),
+                                   rtol=0, atol=1e-6)
+
+    def test_missing_and_unseen_values(self):
+        X = self.X_test.copy()
+        X['feature_cat'] = X['feature_cat'].cat.add_categories('E')
+        X.iloc[::3, X.columns.get_loc('feature_cat')] = 'E'
+        X.iloc[1::3, X.columns.get_loc('feature_cat')] = np.nan
+        X.iloc[::4, X.columns.get_loc('feature_num')] = np.nan
+        np.testing.assert_allclose(self.compiled.predict_proba(X), predict_proba(self.model, X), rtol=0, atol=1e-6)
+
+    def test_dict_and_numpy_rows(self):
+        expected = predict_proba(self.model, self.X_test)
+        rows = self.X_test.astype(object).to_dict('records')
+        np.testing.assert_allclose(self.compiled.predict_proba(rows), expected, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(self.compiled.predict_proba(rows[0]), expected[:1], rtol=0, atol=1e-6)
+        encoded = self.compiled.encode(self.X_test)
+        np.testing.assert_allclose(self.compiled.predict_proba(encoded, batch_size=7), expected, rtol=0, atol=1e-6)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = self.compiled.save(os.path.join(tmp_dir, 'model.npz'))
+            loaded = CompiledModel.load(path)
+        self.assertEqual(loaded.feature_names, self.compiled.feature_names)
+        self.assertEqual(loaded.category_maps, self.compiled.category_maps)
+        np.testing.assert_array_equal(loaded.predict_proba(self.X_test), self.compiled.predict_proba(self.X_test))
+
+    def test_mismatched_reference(self):
+        with self.assertRaises(ValueError):
+            export_compiled_model(self.model, self.X_train[['feature_num']])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.merging.merging_df import add_column_by_merge
+from fraud_predictor.merging.country_enrichment import CountryIndex, enrich_countries, normalize_country
+
+class TestCountryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = CountryIndex(
+            ['United States', 'France', 'Japan'],
+            {'GDP': [27.0, 3.0, 4.0], 'GDP_per_capita': [81.0, 44.0, np.nan]},
+            aliases={'USA': 'United States', 'Atlantis': 'Nowhere'}
+        )
+        self.df = pd.DataFrame({
+            'country': ['France', 'USA', 'japan ', 'Spain', None, 'France'],
+            'amount': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+        })
+
+    def test_enrich_matches_values_and_keeps_rows(self):
+        df = self.index.enrich(self.df)
+        self.assertIs(df, self.df)
+        np.testing.assert_array_equal(df['GDP'], [3.0, 27.0, 4.0, np.nan, np.nan, 3.0])
+        np.testing.assert_array_equal(df['GDP_per_capita'], [44.0, 81.0, np.nan, np.nan, np.nan, 44.0])
+        self.assertListEqual(df['amount'].tolist(), [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+        self.assertListEqual(self.index.unmatched_countries_, ['Spain'])
+
+    def test_categorical_country(self):
+        df = self.df.copy()
+        df['country'] = pd.Categorical(df['country'], categories=['France', 'Germany', 'Japan ', 'Spain', 'USA', 'japan '])
+        self.index.enrich(df, columns=['GDP'])
+        np.testing.assert_array_equal(df['GDP'], [3.0, 27.0, 4.0, np.nan, np.nan, 3.0])
+        self.assertNotIn('GDP_per_capita', df.columns)
+        # Germany is an unused category, so it is not reported
+        self.assertListEqual(self.index.unmatched_countries_, ['Spain'])
+
+    def test_same_as_merge_on_exact_names(self):
+        reference = pd.DataFrame({'country': ['France', 'Japan', 'United States'], 'GDP': [3.0, 4.0, 27.0]})
+        df = pd.DataFrame({'country': ['Japan', 'France', 'United States', 'Japan']})
+        merged = add_column_by_merge(df.copy(), reference, merge_on=['country'], columns_to_merge=['GDP'])
+        pd.testing.assert_frame_equal(self.index.enrich(df, columns=['GDP']), merged)
+
+    def test_unknown_indicator(self):
+        with self.assertRaises(ValueError):
+            self.index.enrich(self.df, columns=['population'])
+
+    def test_duplicate_keys(self):
+        with self.assertRaises(ValueError):
+            CountryIndex(['France', 'france'], {'GDP': [1.0, 2.0]})
+
+    def test_normalize_country(self):
+        self.assertListEqual(list(normalize_country(['  United   Kingdom ', 'USA'])), ['united kingdom', 'usa'])
+
+    def test_data_files_cover_the_sample_countries(self):
+        df = pd.DataFrame({'country': ['USA', 'UK', 'Russia', 'Germany', 'Nigeria']})
+        country_index = CountryIndex.from_files()
+        enrich_countries(df, country_index=country_index)
+        self.assertListEqual(country_index.unmatched_countries_, [])
+        self.assertFalse(df[['GDP', 'GDP_per_capita']].isna().any().any())
+
+if __name__ == '__main__':
+    unittest.main()
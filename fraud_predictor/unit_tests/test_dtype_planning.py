@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.preprocessors.dtype_planning import DtypePlan, compact_frame, memory_report
+from fraud_predictor.model.model_and_metrics import split_data, convert_object_to_category
+
+class TestDtypePlan(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 200
+        self.df = pd.DataFrame({
+            'customer_id': rng.choice([f'CUST_{i}' for i in range(20)], n),
+            'transaction_id': [f'TX_{i}' for i in range(n)],
+            'channel': rng.choice(['web', 'mobile', 'pos'], n),
+            'transaction_hour': rng.integers(0, 24, n),
+            'distance_from_home': rng.integers(0, 1000, n),
+            'amount': rng.lognormal(4, 1, n),
+            'card_present': rng.random(n) > 0.5,
+            'is_fraud': rng.random(n) > 0.8
+        })
+
+    def test_planned_dtypes(self):
+        compacted = DtypePlan(float_rtol=1e-6).fit_transform(self.df)
+        self.assertEqual(compacted['transaction_hour'].dtype, np.int8)
+        self.assertEqual(compacted['distance_from_home'].dtype, np.int16)
+        self.assertEqual(compacted['amount'].dtype, np.float32)
+        self.assertEqual(compacted['card_present'].dtype, bool)
+        self.assertEqual(compacted['channel'].dtype.name, 'category')
+        self.assertListEqual(list(compacted['channel'].cat.categories), ['mobile', 'pos', 'web'])
+        self.assertEqual(compacted['customer_id'].dtype.name, 'category')
+        # Unique ids are not worth a categorical
+        self.assertEqual(compacted['transaction_id'].dtype, object)
+        self.assertListEqual(compacted['channel'].astype(str).tolist(), self.df['channel'].tolist())
+        np.testing.assert_allclose(compacted['amount'], self.df['amount'], rtol=1e-6)
+        # The input is not modified
+        self.assertEqual(self.df['channel'].dtype, object)
+
+    def test_floats_are_downcast_only_without_loss(self):
+        df = pd.DataFrame({
+            'amount': self.df['amount'],
+            'GDP': [27_360_935_000_000.0 + i for i in range(len(self.df))],
+            'half_amount': np.round(self.df['amount']) / 2,
+            'missing': np.where(self.df['is_fraud'], np.nan, 1.25)
+        })
+        compacted = DtypePlan().fit_transform(df)
+        self.assertEqual(compacted['amount'].dtype, np.float64)
+        self.assertEqual(compacted['GDP'].dtype, np.float64)
+        pd.testing.assert_series_equal(compacted['GDP'], df['GDP'])
+        self.assertEqual(compacted['half_amount'].dtype, np.float32)
+        self.assertEqual(compacted['missing'].dtype, np.float32)
+        # A tolerance lets the amounts go to float32, a tight one still keeps the digits of GDP
+        compacted = DtypePlan(float_rtol=1e-6).fit_transform(df)
+        self.assertEqual(compacted['amount'].dtype, np.float32)
+        self.assertEqual(DtypePlan(float_rtol=1e-9).fit(df).dtypes_.get('GDP'), None)
+
+    def test_shared_categories_make_convert_object_to_category_a_no_op(self):
+        plan = DtypePlan(exclude=['transaction_id']).fit(self.df)
+        X_train, X_test, _, _ = split_data(plan.transform(self.df).drop(columns='transaction_id'), test_size=0.25)
+        X_train_converted, X_test_converted = convert_object_to_category(X_train.copy(), X_test.copy())
+        pd.testing.assert_frame_equal(X_train_converted, X_train)
+        self.assertEqual(X_train['customer_id'].dtype, X_test['customer_id'].dtype)
+
+    def test_new_batch_uses_the_fitted_plan(self):
+        plan = DtypePlan().fit(self.df)
+        batch = pd.DataFrame({'channel': ['pos', 'atm'], 'transaction_hour': [3, 500], 'amount': [1.5, 2.5]})
+        transformed = plan.transform(batch)
+        self.assertTrue(pd.isna(transformed['channel'].iloc[1]))
+        self.assertListEqual(list(transformed['channel'].cat.categories), ['mobile', 'pos', 'web'])
+        # 500 does not fit the planned int8, so the column keeps its type instead of overflowing
+        self.assertListEqual(transformed['transaction_hour'].tolist(), [3, 500])
+
+    def test_int_categories_are_kept(self):
+        df = pd.DataFrame({'code': pd.Categorical([1, 2, 1, 2, 1, 2])})
+        plan = DtypePlan().fit(df)
+        transformed = plan.transform(df)
+        self.assertListEqual(transformed['code'].tolist(), [1, 2, 1, 2, 1, 2])
+        self.assertEqual(transformed['code'].cat.categories.dtype, np.int64)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            loaded = DtypePlan.load(plan.save(os.path.join(tmp_dir, 'plan.json')))
+        pd.testing.assert_frame_equal(loaded.transform(df), transformed)
+
+    def test_ordered_categorical_keeps_its_order(self):
+        hours = pd.CategoricalDtype(['Night', 'Morning', 'Afternoon', 'Evening'], ordered=True)
+        df = pd.DataFrame({'hour_category': pd.Series(['Evening', 'Night', 'Morning', 'Night', 'Evening',
+                                                       'Night'], dtype=hours)})
+        transformed = DtypePlan().fit_transform(df)
+        self.assertEqual(transformed['hour_category'].dtype, hours)
+        pd.testing.assert_series_equal(transformed['hour_category'], df['hour_category'])
+
+    def test_save_and_load(self):
+        plan = DtypePlan().fit(self.df)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            loaded = DtypePlan.load(plan.save(os.path.join(tmp_dir, 'plan.json')))
+        pd.testing.assert_frame_equal(loaded.transform(self.df), plan.transform(self.df))
+
+    def test_transform_requires_fit(self):
+        with self.assertRaises(ValueError):
+            DtypePlan().transform(self.df)
+
+    def test_memory_report(self):
+        compacted, _, report = compact_frame(self.df)
+        self.assertEqual(report.loc['total', 'bytes_before'], self.df.memory_usage(index=False, deep=True).sum())
+        self.assertEqual(report.loc['total', 'bytes_after'], compacted.memory_usage(index=False, deep=True).sum())
+        self.assertGreater(report.loc['total', 'ratio'], 2)
+        self.assertEqual(memory_report(self.df, self.df).loc['total', 'ratio'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
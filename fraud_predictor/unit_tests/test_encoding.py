@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.model.model_and_metrics import train_optimized_lightgbm
+from fraud_predictor.model.encoding import CategoryEncoder, encode_categories, hash_buckets
+
+class TestCategoryEncoder(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+        self.X_train = pd.DataFrame({
+            'customer_id': 'CUST_' + pd.Series(rng.integers(0, 500, n)).astype(str),
+            'channel': rng.choice(['web', 'mobile', 'pos'], n),
+            'amount': rng.random(n)
+        })
+        self.y_train = pd.Series(rng.random(n) > 0.8)
+        self.X_test = pd.DataFrame({
+            'customer_id': ['CUST_1', 'CUST_1', 'CUST_999999', None],
+            'channel': ['web', 'atm', 'pos', 'mobile'],
+            'amount': [0.1, 0.2, 0.3, 0.4]
+        })
+
+    def test_low_cardinality_shares_categories(self):
+        encoder = CategoryEncoder(max_categories=10)
+        X_train = encoder.fit_transform(self.X_train.copy())
+        X_test = encoder.transform(self.X_test.copy())
+        self.assertListEqual(list(X_test['channel'].cat.categories), list(X_train['channel'].cat.categories))
+        self.assertTrue(pd.isna(X_test['channel'].iloc[1]))
+        self.assertEqual(X_test['amount'].dtype, np.float64)
+
+    def test_hash_buckets(self):
+        encoder = CategoryEncoder(max_categories=10, n_buckets=64)
+        X_train = encoder.fit_transform(self.X_train.copy())
+        X_test = encoder.transform(self.X_test.copy())
+        self.assertEqual(len(X_train['customer_id'].cat.categories), 64)
+        first = self.X_train.index[self.X_train['customer_id'] == 'CUST_1'][0]
+        self.assertEqual(X_test['customer_id'].iloc[0], X_train['customer_id'].loc[first])
+        self.assertTrue(pd.isna(X_test['customer_id'].iloc[3]))
+        # Categoricals are hashed through their categories, with the same buckets
+        np.testing.assert_array_equal(hash_buckets(self.X_train['customer_id'].astype('category'), 64),
+                                      hash_buckets(self.X_train['customer_id'], 64))
+
+    def test_frequency(self):
+        encoder = CategoryEncoder(max_categories=10, high_cardinality='frequency', n_buckets=1 << 16)
+        X_test = encoder.fit(self.X_train).transform(self.X_test.copy())
+        expected = (self.X_train['customer_id'] == 'CUST_1').mean()
+        self.assertAlmostEqual(X_test['customer_id'].iloc[0], expected)
+        self.assertEqual(X_test['customer_id'].iloc[2], 0.0)
+
+    def test_target_is_out_of_fold(self):
+        encoder = CategoryEncoder(max_categories=10, high_cardinality='target')
+        encoded = encoder.fit_transform(self.X_train.copy(), self.y_train)['customer_id']
+        y_flipped = self.y_train.copy()
+        y_flipped.iloc[0] = not y_flipped.iloc[0]
+        flipped = CategoryEncoder(max_categories=10, high_cardinality='target').fit_transform(
+            self.X_train.copy(), y_flipped)['customer_id']
+        # The label of a row only changes the encoding of the rows of the other folds
+        self.assertEqual(encoded.iloc[0], flipped.iloc[0])
+        self.assertGreater((encoded != flipped).sum(), 0)
+        with self.assertRaises(ValueError):
+            CategoryEncoder(high_cardinality='target').fit(self.X_train)
+
+    def test_save_and_load(self):
+        encoder = CategoryEncoder(max_categories=10, high_cardinality='target').fit(self.X_train, self.y_train)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            loaded = CategoryEncoder.load(encoder.save(os.path.join(tmp_dir, 'encoder.npz')))
+        pd.testing.assert_frame_equal(loaded.transform(self.X_test.copy()), encoder.transform(self.X_test.copy()))
+
+    def test_encode_categories_trains(self):
+        X_train, X_test, encoder = encode_categories(self.X_train.copy(), self.X_test.copy(), self.y_train,
+                                                     max_categories=10, high_cardinality='target')
+        params = {'n_estimators': 10, 'max_depth': 3, 'learning_rate': 0.1, 'max_bin': 63, 'num_leaves': 7}
+        model = train_optimized_lightgbm(X_train, self.y_train, params)
+        self.assertEqual(model.predict_proba(X_test).shape, (4, 2))
+        self.assertListEqual(list(encoder.tables_), ['customer_id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
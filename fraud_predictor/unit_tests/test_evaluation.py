@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.metrics import (
+    roc_auc_score, average_precision_score, precision_score, recall_score, f1_score, accuracy_score
+)
+from fraud_predictor.model.model_and_metrics import split_data, train_optimized_lightgbm
+from fraud_predictor.model.evaluation import ThresholdSweep, evaluate_model
+
+class TestThresholdSweep(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 5000
+        self.y = rng.random(n) < 0.1
+        # Rounded so many rows share a probability
+        self.proba = np.round(np.clip(self.y * 0.3 + rng.random(n) * 0.8, 0, 1), 2)
+        self.amount = rng.random(n) * 100
+
+    def test_matches_sklearn(self):
+        sweep = ThresholdSweep(self.y, self.proba)
+        self.assertAlmostEqual(sweep.roc_auc, roc_auc_score(self.y, self.proba), places=12)
+        self.assertAlmostEqual(sweep.pr_auc, average_precision_score(self.y, self.proba), places=12)
+        for threshold in [0.2, 0.5, 0.75]:
+            y_pred = self.proba >= threshold
+            metrics = sweep.at(threshold)
+            self.assertAlmostEqual(metrics['precision'], precision_score(self.y, y_pred), places=12)
+            self.assertAlmostEqual(metrics['recall'], recall_score(self.y, y_pred), places=12)
+            self.assertAlmostEqual(metrics['f1'], f1_score(self.y, y_pred), places=12)
+            self.assertAlmostEqual(metrics['accuracy'], accuracy_score(self.y, y_pred), places=12)
+
+    def test_sample_weight_matches_sklearn(self):
+        weight = np.random.default_rng(1).random(len(self.y))
+        sweep = ThresholdSweep(self.y, self.proba, sample_weight=weight)
+        self.assertAlmostEqual(sweep.roc_auc, roc_auc_score(self.y, self.proba, sample_weight=weight), places=12)
+        self.assertAlmostEqual(sweep.pr_auc, average_precision_score(self.y, self.proba, sample_weight=weight),
+                               places=12)
+
+    def test_fraud_loss(self):
+        sweep = ThresholdSweep(self.y, self.proba, amount=self.amount, false_positive_cost=5.0)
+        y_pred = self.proba >= 0.5
+        expected = self.amount[self.y & ~y_pred].sum() + 5.0 * (~self.y & y_pred).sum()
+        self.assertAlmostEqual(sweep.at(0.5)['loss'], expected, places=6)
+
+        curve = sweep.curve()
+        self.assertEqual(len(curve), len(np.unique(self.proba)) + 1)
+        self.assertTrue(curve['threshold'].is_monotonic_decreasing)
+        best = sweep.best_threshold('loss')
+        self.assertAlmostEqual(sweep.at(best)['loss'], curve['loss'].min())
+        # Nothing flagged: every fraud is lost; everything flagged: only the false positives cost
+        self.assertAlmostEqual(curve['loss'].iloc[0], self.amount[self.y].sum())
+        self.assertAlmostEqual(curve['loss'].iloc[-1], 5.0 * (~self.y).sum())
+
+    def test_bootstrap(self):
+        sweep = ThresholdSweep(self.y, self.proba)
+        intervals = sweep.bootstrap(n_bootstrap=40, n_jobs=2)
+        self.assertListEqual(list(intervals.columns), ['estimate', 'lower', 'upper'])
+        self.assertTrue((intervals['lower'] <= intervals['estimate']).all())
+        self.assertTrue((intervals['estimate'] <= intervals['upper']).all())
+        self.assertLess(intervals.loc['roc_auc', 'upper'] - intervals.loc['roc_auc', 'lower'], 0.1)
+        pd.testing.assert_frame_equal(sweep.bootstrap(n_bootstrap=40, n_jobs=1), intervals)
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            ThresholdSweep(self.y, self.proba[:-1])
+
+class TestEvaluateModel(unittest.TestCase):
+
+    def test_one_inference(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'feature': rng.normal(size=400), 'is_fraud': rng.random(400) > 0.7})
+        df['feature'] += df['is_fraud'] * 1.5
+        X_train, X_test, y_train, y_test = split_data(df, test_size=0.25, random_state=1)
+        params = {'n_estimators': 10, 'max_depth': 3, 'learning_rate': 0.1, 'max_bin': 63, 'num_leaves': 7}
+        model = train_optimized_lightgbm(X_train, y_train, params)
+        calls = []
+        predict_proba = model.predict_proba
+        model.predict_proba = lambda X: calls.append(len(X)) or predict_proba(X)
+        sweep = evaluate_model(model, X_test, y_test)
+        self.assertEqual(calls, [len(X_test)])
+        self.assertAlmostEqual(sweep.roc_auc, roc_auc_score(y_test, predict_proba(X_test)[:, 1]), places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.features.features_creation import create_features
+from fraud_predictor.features.feature_engine import build_features, time_parts, hour_category
+
+class TestFeatureEngine(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 500
+        self.df = pd.DataFrame({
+            'timestamp': pd.to_datetime(
+                pd.Timestamp('2023-12-30', tz='UTC').value + rng.integers(0, 400 * 86_400 * 10**9, n), utc=True
+            ).astype(str),
+            'customer_id': rng.integers(0, 40, n),
+            'merchant_category': rng.choice(['Retail', 'Gas', 'Travel'], n),
+            'amount': rng.lognormal(5, 1, n),
+            'channel': rng.choice(['web', 'mobile', 'pos'], n),
+            'device': rng.choice(['Edge', 'iOS App', 'Chip Reader', 'NFC Payment'], n),
+            'transaction_hour': rng.integers(0, 24, n)
+        })
+        self.config = {
+            'interactions': [
+                {'col1': 'amount', 'col2': 'merchant_category', 'new_col_name': 'value_by_category'},
+                {'col1': 'channel_usage', 'col2': 'hour_category', 'new_col_name': 'channel_hour_interaction'}
+            ]
+        }
+
+    def test_build_features_matches_create_features(self):
+        expected = create_features(self.df.copy(), self.config)
+        pd.testing.assert_frame_equal(build_features(self.df, self.config), expected, check_exact=True)
+
+    def test_build_features_default_config(self):
+        pd.testing.assert_frame_equal(build_features(self.df), create_features(self.df.copy()), check_exact=True)
+
+    def test_build_features_with_missing_values(self):
+        df = self.df.copy()
+        df.loc[3, 'timestamp'] = None
+        df.loc[5, 'channel'] = None
+        df.loc[7, 'merchant_category'] = None
+        df['customer_id'] = df['customer_id'].astype(float)
+        df.loc[9, 'customer_id'] = np.nan
+        expected = create_features(df.copy(), self.config)
+        pd.testing.assert_frame_equal(build_features(df, self.config), expected, check_exact=True)
+
+    def test_build_features_does_not_mutate_input(self):
+        original = self.df.copy()
+        build_features(self.df, self.config)
+        pd.testing.assert_frame_equal(self.df, original)
+
+    def test_build_features_no_timestamp_column(self):
+        with self.assertRaises(ValueError):
+            build_features(self.df.drop(columns=['timestamp']))
+
+    def test_build_features_no_mapping(self):
+        with self.assertRaises(ValueError):
+            build_features(self.df, {'device_mapping': None})
+
+    def test_time_parts_match_dt_accessors(self):
+        timestamp = pd.to_datetime(self.df['timestamp'])
+        month, day, hour = time_parts(timestamp)
+        np.testing.assert_array_equal(month, timestamp.dt.month.to_numpy())
+        np.testing.assert_array_equal(day, timestamp.dt.day.to_numpy())
+        np.testing.assert_array_equal(hour, timestamp.dt.hour.to_numpy())
+
+    def test_hour_category_bins(self):
+        categories = hour_category(np.array([0, 5, 6, 12, 15, 19, 21, 23]))
+        self.assertListEqual(
+            list(categories),
+            ['morning', 'morning', 'lunch', 'afternoon', 'dinner', 'evening', 'night', 'night']
+        )
+
+if __name__ == '__main__':
+    unittest.main()
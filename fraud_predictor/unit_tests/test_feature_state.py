@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.features.features_creation import create_channel_usage, create_interaction_by_category
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.features.feature_state import (
+    ChannelUsageTransformer, CategoryInteractionTransformer, FeatureState
+)
+
+class TestFeatureState(unittest.TestCase):
+
+    def setUp(self):
+        self.train = pd.DataFrame({
+            'timestamp': ['2023-01-01 00:30:00', '2023-01-01 12:00:00', '2023-01-02 18:45:00',
+                          '2023-01-03 09:10:00', '2023-01-03 22:00:00'],
+            'customer_id': ['C1', 'C1', 'C2', 'C1', 'C2'],
+            'channel': ['web', 'mobile', 'web', 'web', 'pos'],
+            'device': ['Edge', 'iOS App', 'Chrome', 'Edge', 'Chip Reader'],
+            'merchant_category': ['Retail', 'Gas', 'Retail', 'Gas', 'Travel'],
+            'amount': [10.0, 20.0, 30.0, 40.0, 50.0]
+        })
+        self.config = {
+            'interactions': [
+                {'col1': 'amount', 'col2': 'merchant_category', 'new_col_name': 'value_by_category'},
+                {'col1': 'channel_usage', 'col2': 'hour_category', 'new_col_name': 'channel_hour_interaction'}
+            ]
+        }
+
+    def test_channel_usage_transform_matches_groupby_on_training_data(self):
+        transformer = ChannelUsageTransformer().fit(self.train)
+        expected = create_channel_usage(self.train.copy())['channel_usage']
+        np.testing.assert_array_equal(transformer.transform(self.train.copy())['channel_usage'], expected)
+
+    def test_channel_usage_lookup_for_a_single_transaction(self):
+        transformer = ChannelUsageTransformer().fit(self.train)
+        usage = transformer.lookup(pd.Series(['C1', 'C2', 'C3', 'C2']), pd.Series(['web', 'mobile', 'web', 'atm']))
+        np.testing.assert_array_equal(usage, [2 / 3, 0.0, np.nan, np.nan])
+
+    def test_interaction_transform_matches_groupby_on_training_data(self):
+        transformer = CategoryInteractionTransformer('amount', 'merchant_category', 'value_by_category')
+        transformer.fit(self.train)
+        expected = create_interaction_by_category(self.train.copy(), 'amount', 'merchant_category',
+                                                  'value_by_category')['value_by_category']
+        pd.testing.assert_series_equal(transformer.transform(self.train.copy())['value_by_category'], expected)
+
+    def test_interaction_unseen_category(self):
+        transformer = CategoryInteractionTransformer('amount', 'merchant_category', 'value_by_category')
+        transformer.fit(self.train)
+        values = transformer.apply(pd.Series([20.0, 5.0]), pd.Series(['Retail', 'Education']))
+        self.assertEqual(values.iloc[0], 1.0)
+        self.assertTrue(np.isnan(values.iloc[1]))
+
+    def test_transformer_not_fitted(self):
+        with self.assertRaises(ValueError):
+            ChannelUsageTransformer().lookup(pd.Series(['C1']), pd.Series(['web']))
+
+    def test_build_features_with_state_matches_on_training_data(self):
+        state = FeatureState(self.config).fit(self.train)
+        expected = build_features(self.train, self.config)
+        pd.testing.assert_frame_equal(build_features(self.train, state=state), expected, check_exact=True)
+
+    def test_build_features_with_state_uses_training_statistics(self):
+        state = FeatureState(self.config).fit(self.train)
+        features = build_features(self.train.iloc[[0]], state=state)
+        self.assertAlmostEqual(features['channel_usage'].iloc[0], 2 / 3)
+        self.assertAlmostEqual(features['value_by_category'].iloc[0], 0.5)
+
+    def test_save_and_load(self):
+        state = FeatureState(self.config).fit(self.train)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = state.save(os.path.join(tmp_dir, 'feature_state.npz'))
+            loaded = FeatureState.load(path)
+        self.assertEqual(loaded.config, state.config)
+        pd.testing.assert_frame_equal(
+            build_features(self.train, state=loaded), build_features(self.train, state=state), check_exact=True
+        )
+
+    def test_save_mixed_keys(self):
+        train = self.train.copy()
+        train['customer_id'] = ['C1', 1, 'C2', 'C1', 2]
+        with self.assertRaises(TypeError):
+            FeatureState(self.config).fit(train).get_state()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ['lightgbm', 'sklearn', 'scipy', 'matplotlib']
+
+class TestLazyImports(unittest.TestCase):
+
+    def _loaded_after_import(self, statement):
+        code = f"import sys\n{statement}\nprint(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+        return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+
+    def test_packages_do_not_load_heavy_dependencies(self):
+        for package in ['preprocessors', 'merging', 'features', 'model', 'model.compiled', 'pipeline']:
+            with self.subTest(package=package):
+                self.assertEqual(self._loaded_after_import(f"import fraud_predictor.{package}"), [])
+
+    def test_model_names_load_on_first_use(self):
+        self.assertEqual(self._loaded_after_import("from fraud_predictor.model import CompiledModel"), [])
+        self.assertEqual(self._loaded_after_import("from fraud_predictor.model import ArtifactStore"), [])
+        self.assertIn('sklearn', self._loaded_after_import("from fraud_predictor.model import split_data"))
+
+    def test_unknown_model_name(self):
+        import fraud_predictor.model
+        with self.assertRaises(AttributeError):
+            fraud_predictor.model.not_a_function
+        self.assertIn('CompiledModel', dir(fraud_predictor.model))
+
+if __name__ == '__main__':
+    unittest.main()
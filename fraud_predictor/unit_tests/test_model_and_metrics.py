@@ -39,6 +39,13 @@ class TestModelFunctions(unittest.TestCase):
         self.assertEqual(self.X_train['feature_cat'].dtype.name, 'category')
         self.assertEqual(self.X_test['feature_cat'].dtype.name, 'category')
 
+    def test_convert_object_to_category_shares_train_categories(self):
+        X_train = pd.DataFrame({'feature_cat': ['A', 'B', 'A']})
+        X_test = pd.DataFrame({'feature_cat': ['B', 'C']})
+        X_train, X_test = convert_object_to_category(X_train, X_test)
+        self.assertListEqual(list(X_test['feature_cat'].cat.categories), ['A', 'B'])
+        self.assertListEqual(X_test['feature_cat'].cat.codes.tolist(), [1, -1])
+
     @patch("fraud_predictor.model.model_and_metrics.RandomizedSearchCV")
     def test_tune_lightgbm(self, mock_search):
         mock_estimator = MagicMock()
@@ -92,7 +99,7 @@ class TestModelFunctions(unittest.TestCase):
         f1_val = calculate_f1(self.y_test, preds, model_name="test_model")
         self.assertGreaterEqual(f1_val, 0)
         self.assertLessEqual(f1_val, 1)
-    @patch("fraud_predictor.model.model_and_metrics.plt.show")
+    @patch("matplotlib.pyplot.show")
     def test_plot_feature_importance(self, mock_show):
         best_params = {'n_estimators': 10, 'max_depth': 3, 'learning_rate':0.1, 'max_bin':1500, 'num_leaves':31}
         model = train_optimized_lightgbm(self.X_train, self.y_train, best_params)
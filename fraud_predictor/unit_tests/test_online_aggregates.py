@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.features.features_creation import create_channel_usage
+from fraud_predictor.features.online_aggregates import ChannelUsageStore
+
+class TestChannelUsageStore(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        n = 300
+        self.df = pd.DataFrame({
+            'customer_id': rng.choice(['C1', 'C2', 'C3', 'C4', 'C5'], n),
+            'channel': rng.choice(['web', 'mobile', 'pos'], n),
+            'timestamp': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 10 * 86_400, n)), unit='s')
+        })
+        self.expected = create_channel_usage(self.df.copy())['channel_usage'].to_numpy()
+
+    def test_update_replay_matches_groupby(self):
+        store = ChannelUsageStore()
+        for start in range(0, len(self.df), 70):
+            store.update(self.df.iloc[start:start + 70])
+        np.testing.assert_array_equal(store.usage_for(self.df), self.expected)
+
+    def test_add_replay_matches_groupby(self):
+        store = ChannelUsageStore()
+        for customer, channel, timestamp in zip(self.df['customer_id'], self.df['channel'], self.df['timestamp']):
+            store.add(customer, channel, timestamp)
+        np.testing.assert_array_equal(store.usage_for(self.df), self.expected)
+
+    def test_add_returns_usage_including_the_transaction(self):
+        store = ChannelUsageStore()
+        self.assertEqual(store.add('C1', 'web'), 1.0)
+        self.assertEqual(store.add('C1', 'pos'), 0.5)
+        self.assertAlmostEqual(store.add('C1', 'web'), 2 / 3)
+        self.assertTrue(np.isnan(store.channel_usage('C2', 'web')))
+
+    def test_to_transformer_matches_store(self):
+        store = ChannelUsageStore().update(self.df)
+        usage = store.to_transformer().lookup(self.df['customer_id'], self.df['channel'])
+        np.testing.assert_array_equal(usage, self.expected)
+
+    def test_decay_favours_recent_channel(self):
+        store = ChannelUsageStore(half_life=3600)
+        store.add('C1', 'web', '2024-01-01 00:00:00')
+        store.add('C1', 'pos', '2024-01-01 10:00:00')
+        self.assertGreater(store.channel_usage('C1', 'pos'), 0.99)
+
+    def test_decay_batch_matches_single_adds(self):
+        batch_store = ChannelUsageStore(half_life=86_400).update(self.df)
+        single_store = ChannelUsageStore(half_life=86_400)
+        for customer, channel, timestamp in zip(self.df['customer_id'], self.df['channel'], self.df['timestamp']):
+            single_store.add(customer, channel, timestamp)
+        np.testing.assert_allclose(batch_store.usage_for(self.df), single_store.usage_for(self.df))
+
+    def test_decay_rescale_keeps_ratios(self):
+        store = ChannelUsageStore(half_life=1)
+        store.add('C1', 'web', 0)
+        store.add('C1', 'pos', 0)
+        store.add('C2', 'pos', 10_000)
+        self.assertAlmostEqual(store.channel_usage('C1', 'web'), 0.5)
+        self.assertEqual(store.channel_usage('C2', 'pos'), 1.0)
+
+    def test_decay_requires_timestamps(self):
+        with self.assertRaises(ValueError):
+            ChannelUsageStore(half_life=60).add('C1', 'web')
+        with self.assertRaises(ValueError):
+            ChannelUsageStore(half_life=60).update(self.df.drop(columns=['timestamp']))
+
+    def test_expire(self):
+        store = ChannelUsageStore()
+        store.add('C1', 'web', '2024-01-01')
+        store.add('C2', 'web', '2024-01-05')
+        self.assertEqual(store.expire('2024-01-03'), 1)
+        self.assertEqual(len(store), 1)
+        self.assertTrue(np.isnan(store.channel_usage('C1', 'web')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.preprocessors.preprocessing import load_df, COLUMNS_TO_DROP, COMPACT_DTYPES
+from fraud_predictor.merging.table_cache import enrich_transactions
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.model.out_of_core import StreamedFeatures, hash_split, train_lightgbm_out_of_core
+
+class TestOutOfCore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        self.df = load_df().head(1000)
+        self.df.to_csv(self.file_path, index=False)
+        self.config = {'interactions': [{'col1': 'amount', 'col2': 'merchant_category', 'new_col_name': 'value_by_category'}]}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hash_split_is_stable_and_sized(self):
+        keys = pd.Series([f'TX_{i}' for i in range(20_000)])
+        is_test = hash_split(keys, test_size=0.2)
+        self.assertAlmostEqual(is_test.mean(), 0.2, delta=0.02)
+        np.testing.assert_array_equal(hash_split(keys.iloc[::-1], test_size=0.2), is_test[::-1])
+        self.assertFalse(np.array_equal(hash_split(keys, test_size=0.2, random_state=1), is_test))
+
+    def test_matches_in_memory_features(self):
+        streamed = StreamedFeatures.build(self.file_path, config=self.config, chunksize=300,
+                                          work_dir=os.path.join(self.tmp_dir.name, 'features'))
+        self.assertEqual(streamed.n_train + streamed.n_test, len(self.df))
+
+        df = pd.read_csv(self.file_path)
+        is_test = hash_split(df['transaction_id'])
+        df = df.drop(columns=COLUMNS_TO_DROP).astype(COMPACT_DTYPES)
+        df = enrich_transactions(df, {'country_enrichment': 'lookup'})
+        expected = build_features(df.drop(columns='is_fraud'), self.config)
+        self.assertEqual(streamed.feature_names, list(expected.columns))
+
+        np.testing.assert_allclose(streamed.X_train, streamed.encode(expected[~is_test]), rtol=1e-5)
+        np.testing.assert_allclose(streamed.X_test, streamed.encode(expected[is_test]), rtol=1e-5)
+        np.testing.assert_array_equal(streamed.y_test, df['is_fraud'][is_test].to_numpy(dtype=np.float32))
+        self.assertEqual(list(streamed.test_frame()['merchant_category']), list(expected['merchant_category'][is_test]))
+
+    def test_train_lightgbm_out_of_core(self):
+        params = {'n_estimators': 20, 'max_depth': 5, 'learning_rate': 0.1, 'max_bin': 63, 'num_leaves': 15}
+        booster, streamed = train_lightgbm_out_of_core(self.file_path, params, config=self.config, chunksize=300)
+        try:
+            probabilities = booster.predict(streamed.X_test)
+            self.assertEqual(probabilities.shape, (streamed.n_test,))
+            # The booster knows the categories, so it scores the decoded frame the same way
+            np.testing.assert_allclose(booster.predict(streamed.test_frame()), probabilities)
+        finally:
+            streamed.cleanup()
+        self.assertFalse(os.path.exists(streamed.path))
+
+    def test_split_random_state(self):
+        params = {'n_estimators': 5, 'max_depth': 3, 'learning_rate': 0.1, 'max_bin': 63, 'num_leaves': 7}
+        df = pd.read_csv(self.file_path)
+        for split_random_state in (50, 7):
+            _, streamed = train_lightgbm_out_of_core(self.file_path, params, config=self.config, chunksize=300,
+                                                     split_random_state=split_random_state)
+            is_test = hash_split(df['transaction_id'], random_state=split_random_state)
+            np.testing.assert_array_equal(streamed.y_test, df['is_fraud'][is_test].to_numpy(dtype=np.float32))
+            streamed.cleanup()
+        self.assertFalse(np.array_equal(hash_split(df['transaction_id'], random_state=7),
+                                        hash_split(df['transaction_id'], random_state=50)))
+
+if __name__ == '__main__':
+    unittest.main()
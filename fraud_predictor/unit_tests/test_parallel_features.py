@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.features.feature_engine import build_features
+from fraud_predictor.features.parallel import build_features_parallel, partition_ids
+
+class TestParallelFeatures(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 600
+        self.df = pd.DataFrame({
+            'timestamp': pd.to_datetime(
+                pd.Timestamp('2024-01-01', tz='UTC').value + rng.integers(0, 60 * 86_400 * 10**9, n), utc=True
+            ).astype(str),
+            'customer_id': rng.choice([f'CUST_{i}' for i in range(50)], n),
+            'merchant_category': rng.choice(['Retail', 'Gas', 'Travel'], n),
+            'amount': rng.lognormal(5, 1, n),
+            'channel': rng.choice(['web', 'mobile', 'pos'], n),
+            'device': rng.choice(['Edge', 'iOS App', 'Chip Reader', 'NFC Payment'], n),
+            'transaction_hour': rng.integers(0, 24, n),
+            'is_fraud': rng.random(n) > 0.8
+        }, index=rng.permutation(np.arange(1000, 1000 + n)))
+        self.config = {
+            'interactions': [
+                {'col1': 'amount', 'col2': 'merchant_category', 'new_col_name': 'value_by_category'},
+                {'col1': 'channel_usage', 'col2': 'hour_category', 'new_col_name': 'channel_hour_interaction'}
+            ]
+        }
+
+    def test_matches_build_features(self):
+        expected = build_features(self.df, self.config)
+        result = build_features_parallel(self.df, self.config, n_workers=2, n_partitions=3)
+        pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+
+    def test_categorical_columns_and_missing_values(self):
+        df = self.df.copy()
+        df.iloc[3, df.columns.get_loc('channel')] = None
+        df.iloc[7, df.columns.get_loc('device')] = 'Unknown device'
+        for col in ['customer_id', 'merchant_category', 'channel', 'device']:
+            df[col] = df[col].astype('category')
+        expected = build_features(df, self.config)
+        pd.testing.assert_frame_equal(build_features_parallel(df, self.config, n_workers=2), expected,
+                                      check_exact=False, rtol=1e-12)
+
+    def test_single_partition_runs_in_process(self):
+        pd.testing.assert_frame_equal(build_features_parallel(self.df, n_workers=1), build_features(self.df))
+
+    def test_partitions_keep_customers_together(self):
+        partitions = partition_ids(self.df['customer_id'], 4)
+        self.assertTrue((pd.Series(partitions).groupby(self.df['customer_id'].to_numpy()).nunique() == 1).all())
+        # Same values give the same partitions whatever the dtype
+        np.testing.assert_array_equal(partition_ids(self.df['customer_id'].astype('category'), 4), partitions)
+
+    def test_chained_interactions_are_rejected(self):
+        config = {'interactions': [
+            {'col1': 'amount', 'col2': 'merchant_category', 'new_col_name': 'value_by_category'},
+            {'col1': 'value_by_category', 'col2': 'channel', 'new_col_name': 'nested'}
+        ]}
+        with self.assertRaises(ValueError):
+            build_features_parallel(self.df, config, n_workers=2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import sys
+import unittest
+from unittest import mock
+import pandas as pd
+from fraud_predictor.preprocessors import preprocessing
+from fraud_predictor.preprocessors.preprocessing import load_df, drop_unnecessary_columns
+from fraud_predictor.merging.table_cache import enrich_transactions
+from fraud_predictor.features.features_creation import DEFAULT_FEATURE_CONFIG, create_features
+from fraud_predictor.pipeline.dag import Step, Pipeline
+from fraud_predictor.pipeline.notebook import notebook_pipeline
+
+BEST_PARAMS = {'n_estimators': 10, 'max_depth': 3, 'learning_rate': 0.1, 'max_bin': 255, 'num_leaves': 7}
+
+def add_one(value):
+    return value + 1
+
+def add(value, other, amount):
+    return value + other + amount
+
+OFFSET = 1
+
+def offset(value):
+    return value + OFFSET
+
+def add_offset(value):
+    return offset(value)
+
+def append_item(items):
+    items.append(len(items))
+    return items
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def statuses(self, pipeline):
+        return {entry['step']: entry['status'] for entry in pipeline.report_}
+
+    def test_config_change_reruns_the_step_and_the_steps_after_it(self):
+        steps = [
+            Step('start', lambda start: start, config=['start']),
+            Step('plus_one', add_one, inputs=['start']),
+            Step('total', add, inputs=['plus_one', 'start'], config=['amount'])
+        ]
+        pipeline = Pipeline(steps, config={'start': 1, 'amount': 10}, cache_dir=self.cache_dir)
+        self.assertDictEqual(pipeline.run(), {'start': 1, 'plus_one': 2, 'total': 13})
+        self.assertSetEqual(set(self.statuses(pipeline).values()), {'ran'})
+
+        self.assertDictEqual(pipeline.run('total'), {'total': 13})
+        self.assertDictEqual(self.statuses(pipeline), {'total': 'cached'})
+
+        pipeline.config['amount'] = 20
+        self.assertDictEqual(pipeline.run('total'), {'total': 23})
+        self.assertDictEqual(self.statuses(pipeline), {'start': 'cached', 'plus_one': 'cached', 'total': 'ran'})
+
+        self.assertDictEqual(pipeline.run('plus_one', refresh=['plus_one']), {'plus_one': 2})
+        self.assertDictEqual(self.statuses(pipeline), {'start': 'cached', 'plus_one': 'ran'})
+
+    def test_refresh_reruns_the_steps_up_to_the_targets(self):
+        calls = []
+        steps = [
+            Step('start', lambda start: calls.append('start') or start, config=['start']),
+            Step('plus_one', add_one, inputs=['start']),
+            Step('total', add, inputs=['plus_one', 'start'], config=['amount'])
+        ]
+        pipeline = Pipeline(steps, config={'start': 1, 'amount': 10}, cache_dir=self.cache_dir)
+        pipeline.run()
+        self.assertDictEqual(pipeline.run('total', refresh=['start']), {'total': 13})
+        self.assertDictEqual(self.statuses(pipeline), {'start': 'ran', 'plus_one': 'ran', 'total': 'ran'})
+        self.assertListEqual(calls, ['start', 'start'])
+
+        # Only the refreshed step and the steps after it rerun
+        self.assertDictEqual(pipeline.run('total', refresh=['plus_one']), {'total': 13})
+        self.assertDictEqual(self.statuses(pipeline), {'start': 'cached', 'plus_one': 'ran', 'total': 'ran'})
+
+    def test_code_change_gives_a_new_key(self):
+        keys = Pipeline([Step('total', add_one)], cache_dir=self.cache_dir).keys()
+        self.assertNotEqual(Pipeline([Step('total', append_item)], cache_dir=self.cache_dir).keys(), keys)
+        self.assertEqual(Pipeline([Step('total', add_one)], cache_dir=self.cache_dir).keys(), keys)
+
+    def test_helper_and_constant_changes_give_a_new_key(self):
+        # add_offset only reads OFFSET through the helper offset
+        keys = Pipeline([Step('total', add_offset)], cache_dir=self.cache_dir).keys()
+        with mock.patch.object(sys.modules[__name__], 'OFFSET', 2):
+            self.assertNotEqual(Pipeline([Step('total', add_offset)], cache_dir=self.cache_dir).keys(), keys)
+        self.assertEqual(Pipeline([Step('total', add_offset)], cache_dir=self.cache_dir).keys(), keys)
+
+    def test_mutating_steps_get_copies(self):
+        steps = [
+            Step('items', lambda: [0]),
+            Step('appended', append_item, inputs=['items'], mutates=True)
+        ]
+        outputs = Pipeline(steps, cache_dir=self.cache_dir).run()
+        self.assertListEqual(outputs['items'], [0])
+        self.assertListEqual(outputs['appended'], [0, 1])
+
+    def test_invalid_pipelines(self):
+        with self.assertRaises(ValueError):
+            Pipeline([Step('total', add_one, inputs=['start'])])
+        with self.assertRaises(ValueError):
+            Pipeline([Step('total', add, config=['amount'])], cache_dir=self.cache_dir).keys()
+        with self.assertRaises(ValueError):
+            Pipeline([Step('total', add_one)], cache_dir=self.cache_dir).run('unknown')
+
+
+class TestNotebookPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.transactions_file = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        load_df().head(1000).to_csv(self.transactions_file, index=False)
+        self.config = {'transactions_file': self.transactions_file, 'best_params': BEST_PARAMS}
+        self.pipeline = notebook_pipeline(self.config, cache_dir=os.path.join(self.tmp_dir.name, 'cache'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_features_match_the_notebook_functions(self):
+        features = self.pipeline.run('payment_safety')['payment_safety']
+        expected = create_features(enrich_transactions(drop_unnecessary_columns(pd.read_csv(self.transactions_file))))
+        pd.testing.assert_frame_equal(features, expected)
+
+    def test_module_constant_change_gives_new_keys_from_its_step(self):
+        keys = self.pipeline.keys()
+        columns_to_drop = preprocessing.COLUMNS_TO_DROP + ['city_size']
+        with mock.patch.object(preprocessing, 'COLUMNS_TO_DROP', columns_to_drop):
+            new_keys = self.pipeline.keys()
+        changed = [name for name in keys if new_keys[name] != keys[name]]
+        self.assertListEqual(changed, list(keys)[1:])
+
+    def test_device_mapping_change_reruns_payment_safety_and_after(self):
+        metrics = self.pipeline.run('evaluate')['evaluate']
+        self.assertTrue({'roc_auc', 'pr_auc', 'f1', 'accuracy'} <= set(metrics))
+
+        self.pipeline.config['device_mapping'] = {**DEFAULT_FEATURE_CONFIG['device_mapping'], 'Edge': 2}
+        self.pipeline.run('evaluate')
+        ran = [entry['step'] for entry in self.pipeline.report_ if entry['status'] == 'ran']
+        self.assertListEqual(ran, ['payment_safety', 'split', 'categorize', 'tune', 'train', 'evaluate'])
+        cached = [entry['step'] for entry in self.pipeline.report_ if entry['status'] == 'cached']
+        self.assertListEqual(cached, ['interactions'])
+
+
+if __name__ == '__main__':
+    unittest.main()
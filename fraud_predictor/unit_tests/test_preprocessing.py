@@ -1,7 +1,11 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 import pandas as pd
-from fraud_predictor.preprocessors.preprocessing import load_df, drop_unnecessary_columns
+from fraud_predictor.preprocessors.preprocessing import (
+    load_df, drop_unnecessary_columns, load_df_in_chunks, load_df_chunked, COMPACT_DTYPES
+)
 
 class TestPreprocessingFunctions(unittest.TestCase):
 
@@ -60,5 +64,38 @@ class TestPreprocessingFunctions(unittest.TestCase):
         for col in columns_to_check:
             self.assertNotIn(col, df_dropped.columns, f"{col} should be dropped")
 
+
+class TestChunkedLoading(unittest.TestCase):
+
+    def setUp(self):
+        # Write a small file with the schema of the full dataset (the sample df has every original column)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        load_df().head(1000).to_csv(self.file_path, index=False)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_df_in_chunks_bounded_size(self):
+        chunks = list(load_df_in_chunks(self.file_path, chunksize=300))
+        self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+
+    def test_load_df_in_chunks_drops_columns_and_uses_compact_dtypes(self):
+        chunk = next(load_df_in_chunks(self.file_path, chunksize=300))
+        for col in ['merchant', 'city', 'velocity_last_hour', 'transaction_id', 'card_number']:
+            self.assertNotIn(col, chunk.columns)
+        self.assertEqual(chunk['country'].dtype.name, 'category')
+        self.assertEqual(chunk['amount'].dtype.name, 'float32')
+        self.assertEqual(chunk['transaction_hour'].dtype.name, 'int32')
+
+    def test_load_df_chunked_matches_eager_load(self):
+        eager = drop_unnecessary_columns(pd.read_csv(self.file_path)).astype(COMPACT_DTYPES)
+        chunked = load_df_chunked(self.file_path, chunksize=256)
+        pd.testing.assert_frame_equal(chunked, eager)
+
+    def test_load_df_in_chunks_invalid_chunksize(self):
+        with self.assertRaises(ValueError):
+            next(load_df_in_chunks(self.file_path, chunksize=0))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.profiling.profiler import Profiler, profiled, profiled_stage, active_profiler, count_rows
+
+@profiled
+def double_rows(df):
+    return pd.concat([df, df], ignore_index=True)
+
+@profiled
+def pipeline(df):
+    with profiled_stage('inner_block', rows_in=len(df)) as stage:
+        stage.output = double_rows(df)
+    return np.ones(len(stage.output) * 10_000)
+
+class Scorer:
+
+    @profiled
+    def predict_proba(self, rows):
+        return [0.5] * len(rows)
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({'amount': np.arange(10.0)})
+
+    def test_disabled_records_nothing(self):
+        self.assertIsNone(active_profiler())
+        profiler = Profiler()
+        pd.testing.assert_frame_equal(double_rows(self.df), pd.concat([self.df, self.df], ignore_index=True))
+        self.assertEqual(profiler.records, [])
+
+    def test_nested_stages(self):
+        with Profiler(trace_memory=True) as profiler:
+            self.assertIs(active_profiler(), profiler)
+            pipeline(self.df)
+        self.assertIsNone(active_profiler())
+
+        records = {record['stage']: record for record in profiler.records}
+        # Stages are recorded when they end, the innermost first
+        self.assertEqual([record['stage'] for record in profiler.records], ['double_rows', 'inner_block', 'pipeline'])
+        self.assertEqual((records['double_rows']['rows_in'], records['double_rows']['rows_out']), (10, 20))
+        self.assertEqual((records['inner_block']['rows_in'], records['inner_block']['rows_out']), (10, 20))
+        self.assertEqual(records['pipeline']['rows_out'], 200_000)
+        self.assertGreaterEqual(records['pipeline']['bytes_allocated'], 200_000 * 8)
+        self.assertGreaterEqual(records['pipeline']['seconds'], records['inner_block']['seconds'])
+        self.assertGreaterEqual(records['pipeline']['peak_rss_mb'], records['double_rows']['peak_rss_mb'])
+        self.assertTrue(all(record['cpu_seconds'] >= 0 for record in profiler.records))
+
+    def test_methods_count_rows_after_self(self):
+        with Profiler(peak_rss=False) as profiler:
+            Scorer().predict_proba([{'amount': 1}, {'amount': 2}])
+        record = profiler.records[0]
+        self.assertEqual((record['stage'], record['rows_in'], record['rows_out']), ('Scorer.predict_proba', 2, 2))
+        self.assertIsNone(record['peak_rss_mb'])
+
+    def test_exceptions_are_recorded_and_raised(self):
+        with Profiler(peak_rss=False) as profiler, self.assertRaises(ValueError):
+            double_rows(None)
+        self.assertEqual(profiler.summary()['double_rows']['calls'], 1)
+
+    def test_chrome_trace(self):
+        with Profiler(peak_rss=False) as profiler:
+            pipeline(self.df)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'trace.json')
+            profiler.to_chrome_trace(path)
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+        self.assertEqual(len(events), 3)
+        outer = next(event for event in events if event['name'] == 'pipeline')
+        inner = next(event for event in events if event['name'] == 'double_rows')
+        self.assertEqual(outer['ph'], 'X')
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'], inner['ts'] + inner['dur'])
+        self.assertEqual(inner['args']['rows_out'], 20)
+
+    def test_totals_and_prometheus(self):
+        with Profiler(peak_rss=False, max_records=1) as profiler:
+            for _ in range(3):
+                double_rows(self.df)
+        self.assertEqual((len(profiler.records), profiler.dropped_records), (1, 2))
+        summary = profiler.summary()['double_rows']
+        self.assertEqual((summary['calls'], summary['rows_in'], summary['rows_out']), (3, 30, 60))
+
+        text = profiler.to_prometheus()
+        self.assertIn('# TYPE fraud_predictor_stage_calls_total counter', text)
+        self.assertIn('fraud_predictor_stage_calls_total{stage="double_rows"} 3', text)
+        self.assertIn('fraud_predictor_stage_rows_out_total{stage="double_rows"} 60', text)
+        self.assertNotIn('peak_rss', text)
+
+    def test_count_rows(self):
+        self.assertEqual(count_rows((self.df, self.df.iloc[:3])), 10)
+        self.assertEqual(count_rows({'amount': 1}), 1)
+        self.assertIsNone(count_rows('file.csv'))
+
+if __name__ == '__main__':
+    unittest.main()
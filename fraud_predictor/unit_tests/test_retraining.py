@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from fraud_predictor.model.model_and_metrics import train_optimized_lightgbm
+from fraud_predictor.model.retraining import (
+    align_categories, continue_training, refit_leaves, IncrementalTrainer, compare_retraining
+)
+
+PARAMS = {'n_estimators': 20, 'max_depth': 3, 'learning_rate': 0.1, 'num_leaves': 7, 'verbose': -1}
+
+
+def make_slice(n, seed, channels=('web', 'pos', 'mobile')):
+    rng = np.random.default_rng(seed)
+    amount = rng.random(n) * 100
+    channel = rng.choice(list(channels), n)
+    y = ((amount > 70) & (channel == 'web')) | (rng.random(n) < 0.05)
+    X = pd.DataFrame({'amount': amount, 'channel': pd.Categorical(channel)})
+    return X, pd.Series(y.astype(int))
+
+class TestRetraining(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = make_slice(2000, 0)
+        self.model = train_optimized_lightgbm(self.X, self.y, PARAMS)
+
+    def test_continue_training_adds_trees(self):
+        X_new, y_new = make_slice(500, 1)
+        model = continue_training(self.model, X_new, y_new, PARAMS, n_estimators=5)
+        self.assertEqual(model.booster_.num_trees(), self.model.booster_.num_trees() + 5)
+        self.assertEqual(self.model.booster_.num_trees(), 20)
+
+    def test_continue_training_from_saved_model(self):
+        X_new, y_new = make_slice(500, 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model.txt')
+            self.model.booster_.save_model(path)
+            model = continue_training(path, X_new, y_new, PARAMS, n_estimators=5)
+        self.assertEqual(model.booster_.num_trees(), 25)
+        self.assertListEqual(list(model.classes_), [0, 1])
+        np.testing.assert_allclose(model.predict_proba(self.X)[:, 1],
+                                   continue_training(self.model, X_new, y_new, PARAMS, 5).predict_proba(self.X)[:, 1])
+
+    def test_single_class_slice(self):
+        # A slice without frauds (or with only frauds) must keep the classes of the model
+        X_new, y_new = make_slice(500, 1)
+        for label in [0, 1]:
+            with self.subTest(label=label):
+                model = continue_training(self.model, X_new, pd.Series(label, index=y_new.index), PARAMS,
+                                          n_estimators=5)
+                self.assertListEqual(list(model.classes_), [0, 1])
+                self.assertEqual(set(model.predict(self.X)), {0, 1})
+                # The new trees learn from the slice alone, moving the scores toward its class
+                self.assertEqual(model.booster_.num_trees(), 25)
+                shift = model.predict_proba(self.X)[:, 1].mean() - self.model.predict_proba(self.X)[:, 1].mean()
+                self.assertGreater(shift if label else -shift, 0)
+        with self.assertRaises(ValueError):
+            continue_training(self.model, X_new, pd.Series(2, index=y_new.index), PARAMS)
+
+    def test_matches_the_classifier_on_two_classes(self):
+        X_new, y_new = make_slice(500, 1)
+        model = continue_training(self.model, X_new, y_new, PARAMS, n_estimators=5)
+        expected = lgb.LGBMClassifier(**{**PARAMS, 'n_estimators': 5}).fit(X_new, y_new,
+                                                                            init_model=self.model.booster_)
+        np.testing.assert_allclose(model.predict_proba(self.X), expected.predict_proba(self.X))
+        np.testing.assert_array_equal(model.predict(self.X), expected.predict(self.X))
+
+    def test_align_categories(self):
+        # Another set of categories (a new channel, a missing one) must keep the codes of the model
+        X_new, _ = make_slice(500, 1, channels=('atm', 'web', 'pos'))
+        aligned = align_categories(X_new.copy(), self.model)
+        self.assertEqual(list(aligned['channel'].cat.categories), ['mobile', 'pos', 'web'])
+        self.assertTrue(aligned['channel'][X_new['channel'] == 'atm'].isna().all())
+        self.assertTrue((aligned['channel'][X_new['channel'] == 'web'] == 'web').all())
+
+    def test_continued_model_keeps_category_codes(self):
+        # The rows of the old trees must go down the same branches whatever the categories of the new slice
+        X_new, y_new = make_slice(500, 1, channels=('web', 'pos'))
+        model = continue_training(self.model, X_new, y_new, PARAMS, n_estimators=1)
+        old_scores = self.model.booster_.predict(self.X, raw_score=True)
+        new_scores = model.booster_.predict(self.X, raw_score=True, num_iteration=20)
+        np.testing.assert_allclose(new_scores, old_scores)
+
+    def test_refit_leaves_keeps_trees(self):
+        X_recent, y_recent = make_slice(500, 2)
+        refitted = refit_leaves(self.model, X_recent, y_recent, decay_rate=0.5)
+        self.assertEqual(refitted.booster_.num_trees(), self.model.booster_.num_trees())
+        self.assertFalse(np.allclose(refitted.predict_proba(self.X), self.model.predict_proba(self.X)))
+        # decay_rate=1 keeps the old leaf values
+        kept = refit_leaves(self.model, X_recent, y_recent, decay_rate=1.0)
+        np.testing.assert_allclose(kept.predict_proba(self.X), self.model.predict_proba(self.X))
+
+class TestIncrementalTrainer(unittest.TestCase):
+
+    def test_full_retrain_every(self):
+        slices = [make_slice(300, seed) for seed in range(1, 6)]
+        history = [make_slice(1000, 0)]
+
+        def load_history():
+            return (pd.concat([X for X, _ in history], ignore_index=True),
+                    pd.concat([y for _, y in history], ignore_index=True))
+
+        trainer = IncrementalTrainer(PARAMS, load_history, full_retrain_every=3, n_estimators=5)
+        trainer.fit(*history[0])
+        for X_new, y_new in slices:
+            history.append((X_new, y_new))
+            trainer.update(X_new, y_new)
+        self.assertEqual([entry['mode'] for entry in trainer.report_],
+                         ['full', 'incremental', 'incremental', 'full', 'incremental', 'incremental'])
+        self.assertEqual([entry['trees'] for entry in trainer.report_], [20, 25, 30, 20, 25, 30])
+        self.assertEqual(trainer.report_[3]['rows'], 1900)
+
+    def test_refit_window(self):
+        X, y = make_slice(1000, 0)
+        trainer = IncrementalTrainer(PARAMS, full_retrain_every=None, n_estimators=5, refit_window=2).fit(X, y)
+        for seed in range(1, 4):
+            trainer.update(*make_slice(300, seed))
+        # A slice without frauds goes through the update and the refit like any other
+        X_new, y_new = make_slice(300, 4)
+        trainer.update(X_new, y_new * 0)
+        self.assertListEqual(list(trainer.model.classes_), [0, 1])
+        self.assertEqual(len(trainer._recent), 2)
+        self.assertEqual(trainer.model.booster_.num_trees(), 40)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            IncrementalTrainer(PARAMS, full_retrain_every=3)
+        with self.assertRaises(ValueError):
+            IncrementalTrainer(PARAMS, full_retrain_every=None).update(*make_slice(100, 1))
+
+    def test_compare_retraining(self):
+        X, y = make_slice(1000, 0)
+        slices = [make_slice(300, seed) for seed in range(1, 4)]
+        report = compare_retraining(X, y, slices, PARAMS, n_estimators=5)
+        self.assertEqual(list(report.columns), ['slice', 'incremental_seconds', 'incremental_roc_auc',
+                                                'incremental_trees', 'full_seconds', 'full_roc_auc',
+                                                'full_trees'])
+        self.assertEqual(len(report), 2)
+        self.assertEqual(report['incremental_trees'].tolist(), [25, 30])
+        self.assertEqual(report['full_trees'].tolist(), [20, 20])
+        self.assertTrue((report[['incremental_roc_auc', 'full_roc_auc']] > 0.7).all().all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.features.rolling_windows import create_window_features, CustomerWindows
+
+WINDOWS = {'1h': pd.Timedelta('1h'), '24h': pd.Timedelta('24h'), '7d': pd.Timedelta('7d')}
+
+class TestWindowFeatures(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+        start = pd.Timestamp('2024-10-01', tz='UTC')
+        self.df = pd.DataFrame({
+            'customer_id': rng.choice(['C1', 'C2', 'C3', None], n, p=[0.4, 0.35, 0.2, 0.05]),
+            # Minutes, so many transactions share a timestamp
+            'timestamp': (start + pd.to_timedelta(rng.integers(0, 14 * 24 * 60, n), unit='min')).astype(str),
+            'amount': rng.random(n) * 100,
+            'country': rng.choice(['FR', 'US', 'JP'], n),
+            'merchant_category': rng.choice(['retail', 'travel', 'gas', 'food'], n)
+        })
+
+    def test_matches_brute_force(self):
+        features = create_window_features(self.df.copy())
+        times = pd.to_datetime(self.df['timestamp'], utc=True)
+        for i in np.random.default_rng(1).choice(len(self.df), 200, replace=False):
+            customer = self.df['customer_id'].iloc[i]
+            for window, length in WINDOWS.items():
+                if customer is None:
+                    self.assertTrue(np.isnan(features[f'txn_count_{window}'].iloc[i]))
+                    continue
+                # Strictly earlier transactions of the customer within the window
+                earlier = ((self.df['customer_id'] == customer) & (times < times.iloc[i])
+                           & (times >= times.iloc[i] - length))
+                self.assertEqual(features[f'txn_count_{window}'].iloc[i], earlier.sum())
+                self.assertAlmostEqual(features[f'amount_sum_{window}'].iloc[i], self.df['amount'][earlier].sum())
+                self.assertEqual(features[f'distinct_countries_{window}'].iloc[i],
+                                 self.df['country'][earlier].nunique())
+                self.assertEqual(features[f'distinct_merchant_categories_{window}'].iloc[i],
+                                 self.df['merchant_category'][earlier].nunique())
+
+    def test_no_leakage_from_same_time(self):
+        df = pd.DataFrame({
+            'customer_id': ['A', 'A', 'A'],
+            'timestamp': ['2024-10-01 10:00', '2024-10-01 10:00', '2024-10-01 10:30'],
+            'amount': [1.0, 2.0, 4.0],
+            'country': ['FR', 'US', 'FR'],
+            'merchant_category': ['gas', 'gas', 'food']
+        })
+        features = create_window_features(df, {'windows': {'1h': '1h'}})
+        self.assertListEqual(features['txn_count_1h'].tolist(), [0, 0, 2])
+        self.assertListEqual(features['amount_sum_1h'].tolist(), [0.0, 0.0, 3.0])
+        self.assertListEqual(features['distinct_countries_1h'].tolist(), [0, 0, 2])
+
+    def test_chunks_match_single_pass(self):
+        times = pd.to_datetime(self.df['timestamp'], utc=True)
+        df = self.df.iloc[np.argsort(times.to_numpy(), kind='stable')].reset_index(drop=True)
+        expected = create_window_features(df.copy())
+        windows = CustomerWindows()
+        chunks = [windows.transform(df.iloc[start:start + 300].copy()) for start in range(0, len(df), 300)]
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+        # Only the last 7 days are kept as history
+        self.assertLess(len(windows), len(df))
+
+        with self.assertRaises(ValueError):
+            windows.transform(df.head(10).copy())
+
+    def test_too_many_distinct_values(self):
+        with self.assertRaises(ValueError):
+            create_window_features(self.df.copy(), {'max_distinct_values': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+from fraud_predictor.model.model_and_metrics import predict_proba
+from fraud_predictor.model.scoring import TransactionScorer, lightgbm_input_dtype
+from fraud_predictor.unit_tests.fixtures import make_fraud_frame, split_categorized, train_small_model
+
+class TestTransactionScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.df = make_fraud_frame(400, with_bool=True)
+        self.X_train, self.X_test, y_train, self.y_test = split_categorized(self.df)
+        self.model = train_small_model(self.X_train, y_train)
+        self.scorer = TransactionScorer(self.model, self.X_train)
+
+    def test_dict_rows_match_predict_proba(self):
+        rows = self.X_test.astype(object).to_dict('records')
+        np.testing.assert_allclose(self.scorer.predict_proba(rows), predict_proba(self.model, self.X_test), rtol=1e-12)
+
+    def test_single_dict(self):
+        row = self.X_test.iloc[[0]]
+        proba = self.scorer.predict_proba(row.astype(object).to_dict('records')[0])
+        self.assertEqual(proba.shape, (1,))
+        self.assertAlmostEqual(proba[0], predict_proba(self.model, row)[0], places=12)
+
+    def test_numpy_object_batch(self):
+        rows = self.X_test.astype(object).to_numpy()
+        np.testing.assert_allclose(self.scorer.predict_proba(rows), predict_proba(self.model, self.X_test), rtol=1e-12)
+
+    def test_numpy_encoded_row(self):
+        encoded = self.scorer.encode(self.X_test.astype(object).to_numpy()[0])
+        np.testing.assert_array_equal(self.scorer.predict_proba(encoded[0]), self.scorer.predict_proba(encoded))
+
+    def test_unseen_category_is_missing(self):
+        row = {'feature_num': 0.3, 'feature_cat': 'Z', 'feature_bool': True}
+        self.assertTrue(np.isnan(self.scorer.encode(row)[0, 1]))
+
+    def test_wrong_number_of_features(self):
+        with self.assertRaises(ValueError):
+            self.scorer.encode(np.zeros((1, 2)))
+
+    def test_reference_columns_must_match_model(self):
+        with self.assertRaises(ValueError):
+            TransactionScorer(self.model, self.X_train[['feature_cat', 'feature_num', 'feature_bool']])
+
+    def test_lightgbm_input_dtype(self):
+        self.assertEqual(lightgbm_input_dtype(self.X_train), np.float32)
+        self.assertEqual(lightgbm_input_dtype(self.X_train[['feature_num', 'feature_cat']]), np.float64)
+
+if __name__ == '__main__':
+    unittest.main()
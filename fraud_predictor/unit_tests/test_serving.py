@@ -0,0 +1,247 @@
+import asyncio
+import json
+import threading
+import unittest
+from fraud_predictor.serving.batching import Histogram, MicroBatcher
+from fraud_predictor.serving.http_server import ScoringServer
+from fraud_predictor.profiling.profiler import Profiler, profiled
+
+class RecordingModel:
+    """A stand-in for `TransactionScorer.predict_proba` that records the batches it scores."""
+
+    def __init__(self):
+        self.batches = []
+        self.threads = set()
+
+    def __call__(self, transactions):
+        self.batches.append(len(transactions))
+        self.threads.add(threading.current_thread().name)
+        return [t['amount'] / 100 for t in transactions]
+
+class SwappingModel(RecordingModel):
+    """A stand-in for `HotSwapScorer`: every reload moves to the next version."""
+
+    def __init__(self):
+        super().__init__()
+        self.version = 'v000001'
+        self.fail = False
+        self.watching = None
+
+    def swap(self, version=None):
+        if self.fail:
+            raise OSError("unreadable bundle")
+        self.version = f'v{int(self.version[1:]) + 1:06d}'
+        return True
+
+    async def watch(self, interval):
+        self.watching = True
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            self.watching = False
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_requests_share_a_batch(self):
+        model = RecordingModel()
+
+        async def run():
+            batcher = await MicroBatcher(model, max_batch_size=8, max_delay=0.05).start()
+            results = await asyncio.gather(*(batcher.score({'amount': i}) for i in range(20)))
+            await batcher.stop()
+            return results, batcher.metrics.snapshot()
+
+        results, metrics = asyncio.run(run())
+        self.assertEqual(results, [i / 100 for i in range(20)])
+        self.assertEqual(model.batches, [8, 8, 4])
+        self.assertTrue(all(name.startswith('scoring') for name in model.threads))
+        self.assertEqual(metrics['requests'], 20)
+        self.assertEqual(metrics['batch_size']['count'], 3)
+        self.assertEqual(metrics['request_latency_seconds']['count'], 20)
+
+    def test_deadline_flushes_partial_batch(self):
+        model = RecordingModel()
+
+        async def run():
+            batcher = await MicroBatcher(model, max_batch_size=64, max_delay=0.001).start()
+            first = await batcher.score({'amount': 10})
+            second = await batcher.score({'amount': 20})
+            await batcher.stop()
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), (0.1, 0.2))
+        self.assertEqual(model.batches, [1, 1])
+
+    def test_errors_are_propagated(self):
+        def failing(transactions):
+            raise RuntimeError("model failure")
+
+        async def run():
+            batcher = await MicroBatcher(failing, max_delay=0.001).start()
+            try:
+                with self.assertRaises(RuntimeError):
+                    await batcher.score({'amount': 1})
+            finally:
+                await batcher.stop()
+            return batcher.metrics.errors
+
+        self.assertEqual(asyncio.run(run()), 1)
+
+    def test_wrong_number_of_scores_fails_the_batch(self):
+        def one_score_short(transactions):
+            return [0.5] * (len(transactions) - 1)
+
+        async def run():
+            batcher = await MicroBatcher(one_score_short, max_batch_size=4, max_delay=0.05).start()
+            try:
+                results = await asyncio.wait_for(
+                    asyncio.gather(*(batcher.score({'amount': i}) for i in range(4)), return_exceptions=True), 5
+                )
+            finally:
+                await batcher.stop()
+            return results, batcher.metrics.errors
+
+        results, errors = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(errors, 4)
+
+    def test_stop_scores_the_batch_being_collected(self):
+        model = RecordingModel()
+
+        async def run():
+            batcher = await MicroBatcher(model, max_batch_size=64, max_delay=0.05).start()
+            pending = asyncio.ensure_future(batcher.score({'amount': 30}))
+            # The transaction is off the queue, its batch waiting for the deadline
+            await asyncio.sleep(0.01)
+            await asyncio.wait_for(batcher.stop(), 1)
+            result = await asyncio.wait_for(pending, 1)
+            with self.assertRaises(RuntimeError):
+                await batcher.score({'amount': 1})
+            return result
+
+        self.assertEqual(asyncio.run(run()), 0.3)
+        self.assertEqual(model.batches, [1])
+
+    def test_score_requires_start(self):
+        with self.assertRaises(RuntimeError):
+            asyncio.run(MicroBatcher(RecordingModel()).score({'amount': 1}))
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            MicroBatcher(RecordingModel(), max_batch_size=0)
+
+class TestHistogram(unittest.TestCase):
+
+    def test_observe_and_quantile(self):
+        histogram = Histogram((1, 2, 4))
+        for value in (1, 1, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.snapshot()['buckets'], {'1': 2, '2': 0, '4': 1, '+Inf': 1})
+        self.assertEqual(histogram.quantile(0.5), 1)
+        self.assertEqual(histogram.quantile(0.75), 4)
+        self.assertEqual(histogram.quantile(1.0), float('inf'))
+
+class TestScoringServer(unittest.TestCase):
+
+    async def _post(self, port, path, payload):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        writer.write(
+            f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        response = await reader.read()
+        writer.close()
+        return status, json.loads(response.split(b'\r\n\r\n', 1)[1])
+
+    def test_score_endpoints(self):
+        async def run():
+            server = await ScoringServer(MicroBatcher(RecordingModel(), max_delay=0.001), port=0).start()
+            try:
+                return (
+                    await self._post(server.port, '/score', {'transaction': {'amount': 50}}),
+                    await self._post(server.port, '/score', {'transactions': [{'amount': 10}, {'amount': 30}]}),
+                    await self._post(server.port, '/score', b'not json'),
+                    await self._post(server.port, '/score', []),
+                    await self._post(server.port, '/score', 'x'),
+                    await self._post(server.port, '/unknown', {}),
+                    await self._post(server.port, '/metrics', {})
+                )
+            finally:
+                await server.stop()
+
+        single, batch, invalid, json_list, json_string, unknown, metrics = asyncio.run(run())
+        self.assertEqual(single, (200, {'probability': 0.5}))
+        self.assertEqual(batch, (200, {'probabilities': [0.1, 0.3]}))
+        self.assertEqual(invalid[0], 400)
+        self.assertEqual(json_list[0], 400)
+        self.assertEqual(json_string[0], 400)
+        self.assertEqual(unknown[0], 404)
+        self.assertEqual(metrics[1]['requests'], 3)
+
+    def test_health_and_reload(self):
+        async def run():
+            model = SwappingModel()
+            server = await ScoringServer(MicroBatcher(model, max_delay=0.001), port=0, model=model).start()
+            plain = await ScoringServer(MicroBatcher(RecordingModel(), max_delay=0.001), port=0).start()
+            try:
+                return (
+                    await self._post(server.port, '/health', {}),
+                    await self._post(server.port, '/reload', {}),
+                    await self._post(server.port, '/health', {}),
+                    await self._post(plain.port, '/reload', {}),
+                    await failing_reload(server, model)
+                )
+            finally:
+                await server.stop()
+                await plain.stop()
+
+        async def failing_reload(server, model):
+            model.fail = True
+            return await self._post(server.port, '/reload', {})
+
+        health, reload, health_after, plain_reload, failed = asyncio.run(run())
+        self.assertEqual(health, (200, {'status': 'ok', 'model_version': 'v000001'}))
+        self.assertEqual(reload, (200, {'swapped': True, 'model_version': 'v000002'}))
+        self.assertEqual(health_after[1]['model_version'], 'v000002')
+        self.assertEqual(plain_reload[0], 404)
+        self.assertEqual(failed, (500, {'error': "unreadable bundle", 'model_version': 'v000002'}))
+
+    def test_watch_task_lives_with_the_server(self):
+        async def run():
+            model = SwappingModel()
+            server = await ScoringServer(MicroBatcher(model, max_delay=0.001), port=0, model=model,
+                                         poll_seconds=5).start()
+            await asyncio.sleep(0)
+            running = model.watching
+            await server.stop()
+            return running, model.watching
+
+        self.assertEqual(asyncio.run(run()), (True, False))
+
+    def test_prometheus_metrics(self):
+        async def run():
+            profiler = Profiler(peak_rss=False)
+            server = await ScoringServer(MicroBatcher(profiled(RecordingModel().__call__), max_delay=0.001), port=0,
+                                         profiler=profiler).start()
+            try:
+                with profiler:
+                    await self._post(server.port, '/score', {'transactions': [{'amount': 10}, {'amount': 30}]})
+                reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+                writer.write(b"GET /metrics/prometheus HTTP/1.1\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                return response.decode()
+            finally:
+                await server.stop()
+
+        headers, text = asyncio.run(run()).split('\r\n\r\n', 1)
+        self.assertIn('Content-Type: text/plain', headers)
+        self.assertIn('fraud_predictor_serving_requests_total 2', text)
+        self.assertIn('fraud_predictor_serving_batch_size_bucket{le="+Inf"} 1', text)
+        self.assertIn('fraud_predictor_stage_rows_in_total{stage="RecordingModel.__call__"} 2', text)
+
+if __name__ == '__main__':
+    unittest.main()
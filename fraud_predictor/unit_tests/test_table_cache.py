@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from fraud_predictor.preprocessors.preprocessing import load_df
+from fraud_predictor.merging.table_cache import (
+    build_merged_table, cache_key, write_table_cache, read_table_cache, load_merged_table, _rename_through_categories
+)
+
+class TestTableCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+        self.transactions_file = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        load_df().head(500).to_csv(self.transactions_file, index=False)
+        self.config = {'transactions_file': self.transactions_file, 'chunksize': 200}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_and_read_keep_rows_order_and_dtypes(self):
+        df = pd.DataFrame({
+            'country': ['B', 'A', 'B', 'C', 'A'],
+            'channel': pd.Categorical(['web', 'pos', 'web', 'mobile', 'pos']),
+            'amount': [1.5, 2.5, 3.5, 4.5, 5.5]
+        })
+        path = write_table_cache(df, os.path.join(self.cache_dir, 'table'), partition_col='country')
+        pd.testing.assert_frame_equal(read_table_cache(path), df)
+
+    def test_read_projected_and_filtered(self):
+        df = pd.DataFrame({'country': ['B', 'A', 'B', 'C'], 'amount': [1.0, 2.0, 3.0, 4.0], 'other': [0, 0, 0, 0]})
+        path = write_table_cache(df, os.path.join(self.cache_dir, 'table'), partition_col='country')
+        subset = read_table_cache(path, columns=['amount'], filters=[('country', '=', 'B')])
+        self.assertListEqual(list(subset.columns), ['amount'])
+        self.assertListEqual(subset.index.tolist(), [0, 2])
+        self.assertListEqual(subset['amount'].tolist(), [1.0, 3.0])
+
+    def test_read_unknown_column(self):
+        df = pd.DataFrame({'country': ['A'], 'amount': [1.0]})
+        path = write_table_cache(df, os.path.join(self.cache_dir, 'table'), partition_col='country')
+        with self.assertRaises(ValueError):
+            read_table_cache(path, columns=['GDP'])
+
+    def test_cache_key_depends_on_config(self):
+        other_config = {**self.config, 'country_mapping': {'country': {'USA': 'United States'}}}
+        self.assertEqual(cache_key(self.config), cache_key(dict(self.config)))
+        self.assertNotEqual(cache_key(self.config), cache_key(other_config))
+
+    def test_load_merged_table_matches_build(self):
+        expected = build_merged_table(self.config)
+        pd.testing.assert_frame_equal(load_merged_table(self.config, cache_dir=self.cache_dir), expected)
+
+    def test_lookup_enrichment_matches_merge(self):
+        # With the exact-case mapping, the merges and the one-pass lookup attach the same values
+        mapping = {'country': {'USA': 'United States', 'UK': 'United Kingdom', 'Russia': 'Russian Federation'}}
+        merged = build_merged_table({**self.config, 'country_mapping': mapping})
+        looked_up = build_merged_table({**self.config, 'country_mapping': mapping, 'country_enrichment': 'lookup'})
+        self.assertEqual(len(looked_up), 500)
+        self.assertFalse(looked_up['GDP'].isna().any())
+        self.assertIn('United States', set(looked_up['country']))
+        # The lookup keeps the categorical country of the loader, the merges give back object names
+        self.assertIsInstance(looked_up['country'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(looked_up.astype({'country': object}), merged)
+
+    def test_rename_through_categories(self):
+        mapping = {'USA': 'United States'}
+        values = ['USA', None, 'United States', 'France']
+        expected = ['United States', None, 'United States', 'France']
+        # 'USA' is renamed into a category that already exists, and the missing value stays missing
+        renamed = _rename_through_categories(pd.Series(values, dtype='category', name='country'), mapping)
+        pd.testing.assert_series_equal(renamed, pd.Series(expected, dtype='category', name='country'))
+        renamed = _rename_through_categories(pd.Series(values, name='country'), mapping)
+        pd.testing.assert_series_equal(renamed, pd.Series(expected, name='country').fillna(float('nan')))
+
+    def test_unknown_country_enrichment(self):
+        with self.assertRaises(ValueError):
+            build_merged_table({**self.config, 'country_enrichment': 'join'})
+
+    def test_load_merged_table_warm_start_skips_build(self):
+        load_merged_table(self.config, cache_dir=self.cache_dir)
+        with patch("fraud_predictor.merging.table_cache.build_merged_table") as mock_build:
+            df = load_merged_table(self.config, cache_dir=self.cache_dir, columns=['amount', 'GDP'])
+            mock_build.assert_not_called()
+        self.assertListEqual(list(df.columns), ['amount', 'GDP'])
+        self.assertEqual(len(df), 500)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.model.model_and_metrics import (
+    tune_lightgbm, tune_lightgbm_on_subsample, PARAM_DIST
+)
+from fraud_predictor.model.tuning import (
+    SuccessiveHalvingSearch, lightgbm_train_params, stratified_subsample, recalibrate_probabilities
+)
+from fraud_predictor.unit_tests.fixtures import make_fraud_frame, split_categorized
+
+class TestSuccessiveHalvingSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.X_train, _, self.y_train, _ = split_categorized(make_fraud_frame(600))
+
+    def test_rungs_shrink_candidates(self):
+        search = SuccessiveHalvingSearch(PARAM_DIST, n_iter=9, cv=3, eta=3, min_samples=30).fit(self.X_train, self.y_train)
+        rungs = np.array(search.cv_results_['rung'])
+        fractions = np.array(search.cv_results_['train_fraction'])
+        self.assertEqual([int((rungs == r).sum()) for r in range(3)], [9, 3, 1])
+        np.testing.assert_allclose(np.unique(fractions), [1 / 9, 1 / 3, 1])
+        # The final model gets the number of trees that was validated, not the sampled maximum
+        self.assertEqual(search.best_params_, {**search.cv_results_['params'][-1],
+                                               'n_estimators': search.cv_results_['best_iteration'][-1]})
+        self.assertEqual(search.best_score_, search.cv_results_['mean_test_score'][-1])
+        self.assertTrue(all(
+            it <= params['n_estimators'] for it, params in zip(search.cv_results_['best_iteration'], search.cv_results_['params'])
+        ))
+
+    def test_min_samples_limits_rungs(self):
+        search = SuccessiveHalvingSearch(PARAM_DIST, n_iter=9, cv=3, min_samples=10_000)
+        self.assertEqual(search._fractions(len(self.y_train)), [1])
+
+    def test_tune_lightgbm_halving(self):
+        best_params, search = tune_lightgbm(self.X_train, self.y_train, n_iter=4, cv=2, verbose=0, method='halving')
+        self.assertEqual(set(best_params), set(PARAM_DIST))
+        self.assertIsInstance(search, SuccessiveHalvingSearch)
+        self.assertGreater(search.best_score_, 0.5)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            tune_lightgbm(self.X_train, self.y_train, method='grid')
+
+    def test_lightgbm_train_params(self):
+        params = lightgbm_train_params({'n_estimators': 50, 'num_leaves': 31}, random_state=3, n_jobs=2)
+        self.assertNotIn('n_estimators', params)
+        self.assertEqual((params['num_leaves'], params['seed'], params['num_threads']), (31, 3, 2))
+
+
+class TestSubsampleTuning(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+        self.X = pd.DataFrame({'feature_num': rng.normal(size=n), 'feature_cat': pd.Categorical(rng.choice(['A', 'B'], n))})
+        self.y = pd.Series(rng.random(n) < 0.1)
+        self.X['feature_num'] += self.y * 2
+
+    def test_stratified_subsample(self):
+        positions = stratified_subsample(self.y, 500, random_state=0)
+        self.assertEqual(len(positions), 500)
+        self.assertTrue(np.all(np.diff(positions) > 0))
+        self.assertAlmostEqual(self.y.iloc[positions].mean(), self.y.mean(), delta=0.005)
+
+        downsampled = stratified_subsample(self.y, negative_rate=0.25, random_state=0)
+        self.assertEqual(int(self.y.iloc[downsampled].sum()), int(self.y.sum()))
+        self.assertAlmostEqual((~self.y.iloc[downsampled]).sum() / (~self.y).sum(), 0.25, delta=0.05)
+        with self.assertRaises(ValueError):
+            stratified_subsample(self.y, negative_rate=0)
+
+    def test_recalibrate_probabilities(self):
+        # A model trained on a quarter of the negatives sees odds 4 times too high
+        np.testing.assert_allclose(recalibrate_probabilities([0.8, 0.5, 0.0], 0.25), [0.5, 0.2, 0.0])
+        np.testing.assert_allclose(recalibrate_probabilities([0.3], 1.0), [0.3])
+
+    def test_tune_lightgbm_on_subsample(self):
+        best_params, model, report = tune_lightgbm_on_subsample(
+            self.X, self.y, sample_size=400, negative_rate=0.5, validation_sizes=[1000], n_iter=3, cv=2, verbose=0
+        )
+        self.assertEqual(set(best_params), set(PARAM_DIST))
+        self.assertEqual(list(report['step']), ['tune', 'validate', 'refit'])
+        self.assertEqual(list(report['rows'][1:]), [1000, 2000])
+        self.assertLess(report['rows'][0], 400)
+        self.assertGreater(report['roc_auc'][1], 0.7)
+        self.assertEqual(model.n_features_in_, 2)
+
+if __name__ == '__main__':
+    unittest.main()
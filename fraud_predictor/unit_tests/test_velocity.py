@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from fraud_predictor.preprocessors.preprocessing import load_df, load_df_chunked, load_df_in_chunks
+from fraud_predictor.preprocessors.velocity import (
+    VELOCITY_DTYPES, parse_velocity, parse_velocity_literal_eval, expand_velocity
+)
+
+class TestVelocity(unittest.TestCase):
+
+    def setUp(self):
+        self.values = load_df()['velocity_last_hour'].head(500)
+
+    def test_matches_literal_eval(self):
+        parsed = parse_velocity(self.values)
+        pd.testing.assert_frame_equal(parsed, parse_velocity_literal_eval(self.values))
+        self.assertDictEqual({col: dtype.name for col, dtype in parsed.dtypes.items()}, VELOCITY_DTYPES)
+        self.assertEqual(parsed['num_transactions'].iloc[0], 504)
+        # The amounts keep every digit of the file
+        self.assertEqual(parse_velocity(pd.Series(["{'num_transactions': 504, 'total_amount': 14433970.6, "
+                                                   "'unique_merchants': 105, 'unique_countries': 12, "
+                                                   "'max_single_amount': 1733838.83}"]))['total_amount'].iloc[0],
+                         14433970.6)
+
+    def test_missing_values(self):
+        values = self.values.copy()
+        values.iloc[[0, 10, len(values) - 1]] = np.nan
+        parsed = parse_velocity(values)
+        pd.testing.assert_frame_equal(parsed, parse_velocity_literal_eval(values))
+        self.assertTrue(parsed.iloc[[0, 10, -1]].isna().all(axis=None))
+        self.assertDictEqual({col: dtype.name for col, dtype in parsed.dtypes.items()}, VELOCITY_DTYPES)
+
+    def test_other_layouts_fall_back_to_literal_eval(self):
+        values = self.values.head(3).copy()
+        values.iloc[1] = ("{'total_amount': 10.5, 'num_transactions': 3, 'unique_merchants': 2, "
+                          "'unique_countries': 1, 'max_single_amount': 1e-05}")
+        parsed = parse_velocity(values)
+        self.assertEqual(parsed['num_transactions'].iloc[1], 3)
+        self.assertAlmostEqual(parsed['total_amount'].iloc[1], 10.5)
+        self.assertAlmostEqual(parsed['max_single_amount'].iloc[1], 1e-05)
+
+    def test_expand_velocity_keeps_index_and_position(self):
+        df = pd.DataFrame({'a': [1, 2], 'velocity_last_hour': self.values.head(2).tolist(), 'b': [3, 4]},
+                          index=[10, 20])
+        expanded = expand_velocity(df)
+        self.assertListEqual(list(expanded.columns), ['a', *VELOCITY_DTYPES, 'b'])
+        self.assertListEqual(expanded.index.tolist(), [10, 20])
+        with self.assertRaises(ValueError):
+            expand_velocity(df.drop(columns='velocity_last_hour'))
+
+    def test_chunked_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'transactions.csv')
+            # One chunk with a missing value, the others without: every chunk must get the same dtypes
+            df = load_df().head(1000)
+            df.loc[5, 'velocity_last_hour'] = np.nan
+            df.to_csv(file_path, index=False)
+            chunks = list(load_df_in_chunks(file_path, chunksize=300, parse_velocity=True))
+            for chunk in chunks:
+                self.assertDictEqual({col: chunk[col].dtype.name for col in VELOCITY_DTYPES}, VELOCITY_DTYPES)
+            df = load_df_chunked(file_path, chunksize=300, parse_velocity=True)
+            self.assertDictEqual({col: df[col].dtype.name for col in VELOCITY_DTYPES}, VELOCITY_DTYPES)
+            self.assertNotIn('velocity_last_hour', df.columns)
+            pd.testing.assert_frame_equal(df[list(VELOCITY_DTYPES)],
+                                          parse_velocity_literal_eval(pd.read_csv(file_path)['velocity_last_hour']))
+            self.assertNotIn('num_transactions', load_df_chunked(file_path, chunksize=300).columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,13 +3,14 @@ from setuptools import setup, find_packages
 setup(
     name='fraud_predictor',
     version='0.1',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     install_requires=[
         'pandas',
         'numpy',
         'scikit-learn',
         'lightgbm',
         'matplotlib',
+        'pyarrow',
         'pytest',
         'pytest-cov',
     ],